@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import DataPoint, Plant
+from .models import Backfill, BackfillChunk, DataPoint, Plant
 
 
 @admin.register(Plant)
@@ -26,3 +26,30 @@ class DataPointAdmin(admin.ModelAdmin):
     )
 
     search_fields = ["plant__name"]
+
+
+@admin.register(Backfill)
+class BackfillAdmin(admin.ModelAdmin):
+    readonly_fields = ["id"]
+    list_display = (
+        "id",
+        "from_date",
+        "to_date",
+        "chunk_days",
+        "created_at",
+    )
+
+
+@admin.register(BackfillChunk)
+class BackfillChunkAdmin(admin.ModelAdmin):
+    readonly_fields = ["id"]
+    list_display = (
+        "id",
+        "backfill",
+        "plant",
+        "from_date",
+        "to_date",
+        "status",
+        "attempts",
+    )
+    list_filter = ["status"]
@@ -0,0 +1,350 @@
+import json
+import math
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from functools import cache
+from http import HTTPStatus
+from typing import Iterator, Optional
+
+import requests
+from django.conf import settings
+from django_redis import get_redis_connection
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    The monitoring service is considered down and requests fail fast.
+
+    It is a `RequestException`, so callers handle it like any other
+    failed request.
+    """
+
+
+class TokenBucket:
+    """
+    Rate limit shared by every worker, stored in Redis.
+
+    The bucket holds up to `capacity` tokens and is refilled with `rate`
+    tokens per second. Every request takes a token and waits for the
+    refill when the bucket is empty.
+    """
+
+    def __init__(self, connection, key: str, rate: float, capacity: float):
+        self.redis = connection
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+
+    def _refill(self, bucket: dict, now: float) -> float:
+        if not bucket:
+            return self.capacity
+        tokens = float(bucket[b"tokens"])
+        elapsed = max(now - float(bucket[b"updated_at"]), 0)
+        return min(self.capacity, tokens + elapsed * self.rate)
+
+    def try_acquire(self) -> float:
+        """
+        Take a token. Return 0 on success, otherwise the seconds to wait
+        until a token is available.
+        """
+        wait = 0.0
+
+        def take(pipe):
+            nonlocal wait
+            now = time.time()
+            tokens = self._refill(pipe.hgetall(self.key), now)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            pipe.multi()
+            pipe.hset(self.key, mapping={"tokens": tokens, "updated_at": now})
+            # Once refilled the bucket is the same as a missing one.
+            pipe.expire(self.key, math.ceil(self.capacity / self.rate))
+
+        self.redis.transaction(take, self.key)
+        return wait
+
+    def acquire(self):
+        while wait := self.try_acquire():
+            time.sleep(wait)
+
+    def state(self) -> dict:
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": self._refill(self.redis.hgetall(self.key), time.time()),
+        }
+
+
+class AdaptiveConcurrency:
+    """
+    Limit of concurrent requests of this process, adjusted with AIMD.
+
+    The limit grows by one every `limit` successful responses (so roughly
+    by one per round of requests) and is halved whenever a request fails
+    or is slower than `latency_target`. The current limit is published in
+    Redis for inspection.
+    """
+
+    DECREASE_FACTOR = 0.5
+
+    def __init__(
+        self,
+        connection,
+        key: str,
+        minimum: int,
+        maximum: int,
+        latency_target: float,
+    ):
+        self.redis = connection
+        self.key = key
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def adjust(self, latency: float, failed: bool):
+        with self.condition:
+            previous = int(self.limit)
+            if failed or latency > self.latency_target:
+                self.limit = max(
+                    self.minimum, self.limit * self.DECREASE_FACTOR
+                )
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            changed = int(self.limit) != previous
+            self.condition.notify_all()
+        if changed:
+            self.publish()
+
+    def publish(self):
+        self.redis.hset(
+            self.key,
+            self.worker,
+            json.dumps({"limit": int(self.limit), "updated_at": time.time()}),
+        )
+
+    def state(self) -> dict:
+        return {
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "latency_target": self.latency_target,
+            "workers": {
+                worker.decode(): json.loads(value)
+                for worker, value in self.redis.hgetall(self.key).items()
+            },
+        }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by every worker, stored in Redis.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests fail fast with `CircuitOpenError`. Once `reset_timeout`
+    seconds have passed a single probe request is let through (half
+    open), which closes the circuit on success or opens it again on
+    failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        connection,
+        key: str,
+        failure_threshold: int,
+        reset_timeout: float,
+    ):
+        self.redis = connection
+        self.key = key
+        self.probe_key = f"{key}:probe"
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    def _status(self, breaker: dict, now: float) -> str:
+        if breaker.get(b"opened_at") is None:
+            return self.CLOSED
+        if now - float(breaker[b"opened_at"]) < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_request(self):
+        status = self._status(self.redis.hgetall(self.key), time.time())
+        if status == self.CLOSED:
+            return
+        if status == self.HALF_OPEN and self.redis.set(
+            self.probe_key, 1, nx=True, px=int(self.reset_timeout * 1000)
+        ):
+            return
+        raise CircuitOpenError("The monitoring service circuit is open.")
+
+    def record_success(self):
+        self.redis.delete(self.key, self.probe_key)
+
+    def record_failure(self):
+        failures = self.redis.hincrby(self.key, "failures", 1)
+        if failures >= self.failure_threshold:
+            pipeline = self.redis.pipeline()
+            pipeline.hset(self.key, "opened_at", time.time())
+            pipeline.delete(self.probe_key)
+            pipeline.execute()
+
+    def state(self) -> dict:
+        breaker = self.redis.hgetall(self.key)
+        opened_at = breaker.get(b"opened_at")
+        return {
+            "status": self._status(breaker, time.time()),
+            "failures": int(breaker.get(b"failures", 0)),
+            "failure_threshold": self.failure_threshold,
+            "opened_at": float(opened_at) if opened_at else None,
+            "retry_at": (
+                float(opened_at) + self.reset_timeout if opened_at else None
+            ),
+        }
+
+
+def is_service_failure(response: requests.Response) -> bool:
+    """
+    Whether a response means the service is overloaded or down, as
+    opposed to a bad request for a single plant.
+    """
+    return (
+        response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        or response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+
+class MonitoringClient:
+    """
+    Client of the monitoring service.
+
+    Every request goes through the circuit breaker, the shared rate limit
+    and the adaptive concurrency limit, in that order, so a slow or down
+    service is neither hammered nor waited on plant after plant.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        connection=None,
+        prefix: Optional[str] = None,
+    ):
+        connection = connection or get_redis_connection("default")
+        prefix = prefix or settings.MONITORING_CLIENT_KEY_PREFIX
+        self.session = session
+        self.rate_limit = TokenBucket(
+            connection,
+            f"{prefix}:rate_limit",
+            rate=settings.MONITORING_RATE_LIMIT,
+            capacity=settings.MONITORING_RATE_LIMIT_BURST,
+        )
+        self.concurrency = AdaptiveConcurrency(
+            connection,
+            f"{prefix}:concurrency",
+            minimum=settings.MONITORING_MIN_CONCURRENCY,
+            maximum=settings.MONITORING_FETCH_CONCURRENCY,
+            latency_target=settings.MONITORING_LATENCY_TARGET,
+        )
+        self.breaker = CircuitBreaker(
+            connection,
+            f"{prefix}:breaker",
+            failure_threshold=settings.MONITORING_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.MONITORING_BREAKER_RESET_TIMEOUT,
+        )
+
+    def _record(self, started: float, failed: bool):
+        self.concurrency.adjust(time.monotonic() - started, failed)
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    @contextmanager
+    def get(self, url: str, **kwargs) -> Iterator[requests.Response]:
+        """
+        Perform a GET request and yield its successful response.
+
+        The concurrency slot is held until the response is consumed, so
+        streamed responses count against the limit while being read.
+        """
+        self.breaker.before_request()
+        self.rate_limit.acquire()
+        self.concurrency.acquire()
+        try:
+            started = time.monotonic()
+            try:
+                response = self.session.get(
+                    url,
+                    timeout=(
+                        settings.MONITORING_CONNECT_TIMEOUT,
+                        settings.MONITORING_READ_TIMEOUT,
+                    ),
+                    **kwargs,
+                )
+            except requests.exceptions.RequestException:
+                self._record(started, failed=True)
+                raise
+            self._record(started, failed=is_service_failure(response))
+
+            with response:
+                response.raise_for_status()
+                yield response
+        finally:
+            self.concurrency.release()
+
+    def state(self) -> dict:
+        return {
+            "circuit_breaker": self.breaker.state(),
+            "rate_limit": self.rate_limit.state(),
+            "concurrency": self.concurrency.state(),
+        }
+
+
+@cache
+def get_session() -> requests.Session:
+    """
+    Return the process wide session used to talk to the monitoring service.
+
+    The session keeps a pool of keep-alive connections sized to the fetch
+    concurrency, so concurrent requests reuse sockets instead of paying
+    a new TCP handshake per plant.
+    """
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.MONITORING_FETCH_CONCURRENCY,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@cache
+def get_client() -> MonitoringClient:
+    """
+    Return the process wide monitoring service client.
+    """
+    return MonitoringClient(get_session())
@@ -0,0 +1,50 @@
+from typing import Callable, List, TypeVar
+
+Row = TypeVar("Row")
+# The first and last rows, and at least one bucket in between.
+MIN_POINTS = 3
+
+
+def lttb(
+    rows: List[Row],
+    points: int,
+    x: Callable[[Row], float],
+    y: Callable[[Row], float],
+) -> List[Row]:
+    """
+    Largest-Triangle-Three-Buckets downsampling of the rows, ordered by
+    `x`, to `points` rows.
+
+    The first and last rows are kept, and each bucket of rows in between
+    is represented by the row forming the largest triangle with the row
+    kept for the previous bucket and the average of the next bucket, so
+    peaks and drops of the `y` series survive.
+    """
+    if points < MIN_POINTS or len(rows) <= points:
+        return rows
+
+    xs = [x(row) for row in rows]
+    ys = [y(row) for row in rows]
+
+    def bucket_start(bucket):
+        # Rows between the first and the last one, split evenly.
+        return bucket * (len(rows) - 2) // (points - 2) + 1
+
+    sampled = [rows[0]]
+    previous = 0
+    for bucket in range(points - 2):
+        start, end = bucket_start(bucket), bucket_start(bucket + 1)
+        next_end = min(bucket_start(bucket + 2), len(rows))
+        next_x = sum(xs[end:next_end]) / (next_end - end)
+        next_y = sum(ys[end:next_end]) / (next_end - end)
+        previous_x, previous_y = xs[previous], ys[previous]
+        previous = max(
+            range(start, end),
+            key=lambda index: abs(
+                (previous_x - next_x) * (ys[index] - previous_y)
+                - (previous_x - xs[index]) * (next_y - previous_y)
+            ),
+        )
+        sampled.append(rows[previous])
+    sampled.append(rows[-1])
+    return sampled
@@ -0,0 +1,107 @@
+"""
+Streaming exports of data points as NDJSON or CSV.
+
+Rows are read through a server-side cursor and encoded a chunk at a time,
+so memory stays constant and the first rows are sent right away however
+many rows are exported. ASGI servers are given an asynchronous stream,
+they would otherwise build the whole export before sending it.
+"""
+
+import csv
+import json
+from io import StringIO
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, List
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from applications.plants.manager import MEASUREMENT_FIELDS
+
+EXPORT_COLUMNS = (
+    "id",
+    "plant_id",
+    "plant_name",
+    "datetime",
+    *MEASUREMENT_FIELDS,
+    "datapoints",
+)
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_rows(queryset, chunk_size: int) -> Iterator[dict]:
+    """
+    Rows of the queryset, fetched `chunk_size` at a time from a named
+    cursor of the queryset database.
+
+    The cursor is declared in a transaction: outside of one it would be
+    WITH HOLD, and PostgreSQL materializes the whole result of such a
+    cursor before the first row can be fetched.
+    """
+    with transaction.atomic(using=queryset.db):
+        for row in queryset.iterator(chunk_size=chunk_size):
+            yield {
+                **row,
+                "id": str(row["id"]),
+                "plant_id": str(row["plant_id"]),
+                "datetime": row["datetime"].isoformat(),
+            }
+
+
+def chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def ndjson_stream(rows: Iterable[dict], chunk_size: int) -> Iterator[str]:
+    for chunk in chunks(rows, chunk_size):
+        yield "".join(
+            json.dumps({column: row[column] for column in EXPORT_COLUMNS})
+            + "\n"
+            for row in chunk
+        )
+
+
+def csv_stream(rows: Iterable[dict], chunk_size: int) -> Iterator[str]:
+    buffer = StringIO()
+    writer = csv.DictWriter(
+        buffer, EXPORT_COLUMNS, extrasaction="ignore", lineterminator="\n"
+    )
+    writer.writeheader()
+    for chunk in chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty export.
+        yield buffer.getvalue()
+
+
+def export_stream(
+    queryset, file_format: str, chunk_size: int
+) -> Iterator[str]:
+    """
+    Encoded rows of the `for_datapoint_export` queryset, one string per
+    chunk of `chunk_size` rows.
+    """
+    encode = {"ndjson": ndjson_stream, "csv": csv_stream}[file_format]
+    return encode(export_rows(queryset, chunk_size), chunk_size)
+
+
+async def async_export_stream(
+    queryset, file_format: str, chunk_size: int
+) -> AsyncIterator[str]:
+    """
+    `export_stream` for ASGI responses. Each chunk is encoded in the
+    thread of the request, where the named cursor and its transaction
+    stay open until the stream ends or is closed.
+    """
+    stream = export_stream(queryset, file_format, chunk_size)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(stream, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(stream.close, thread_sensitive=True)()
@@ -1,6 +1,5 @@
 import random
 from datetime import datetime, timedelta, timezone
-from decimal import Decimal
 
 import factory
 
@@ -25,26 +24,27 @@ class DataPointFactory(factory.django.DjangoModelFactory):
     """
 
     plant = factory.SubFactory(PlantFactory)
-    datetime = factory.LazyFunction(
-        lambda: (
-            datetime.now(timezone.utc)
-            - timedelta(
-                days=random.randint(0, 30),
-                hours=random.randint(0, 23),
+    # Data points are unique per plant and datetime,
+    # so every data point gets a distinct hour.
+    datetime = factory.Sequence(
+        lambda n: (
+            datetime.now(timezone.utc).replace(
+                minute=0, second=0, microsecond=0
             )
-        ).replace(minute=0, second=0, microsecond=0)
+            - timedelta(hours=n)
+        )
     )
     energy_expected = factory.LazyFunction(
-        lambda: Decimal(f"{random.uniform(5.0, 10.0):.10f}")
+        lambda: round(random.uniform(5.0, 10.0), 10)
     )
     irradiation_expected = factory.LazyFunction(
-        lambda: Decimal(f"{random.uniform(40.0, 60.0):.10f}")
+        lambda: round(random.uniform(40.0, 60.0), 10)
     )
     energy_observed = factory.LazyFunction(
-        lambda: Decimal(f"{random.uniform(70.0, 90.0):.10f}")
+        lambda: round(random.uniform(70.0, 90.0), 10)
     )
     irradiation_observed = factory.LazyFunction(
-        lambda: Decimal(f"{random.uniform(70.0, 100.0):.10f}")
+        lambda: round(random.uniform(70.0, 100.0), 10)
     )
 
     class Meta:
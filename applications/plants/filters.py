@@ -1,13 +1,28 @@
-from django.db.models import Q
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import DateTimeField, Q
+from django.utils import timezone
 from rest_framework import filters
+from rest_framework.serializers import ValidationError
+
+
+def parse_datetime_param(request, name: str):
+    if not (value := request.query_params.get(name)):
+        return None
+    try:
+        parsed = DateTimeField().to_python(value)
+    except DjangoValidationError as err:
+        raise ValidationError({name: err.messages}) from err
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
 
 class ReportsFilterBackend(filters.BaseFilterBackend):
     def filter_queryset(self, request, queryset, view):
-        if start_datetime := request.query_params.get("start_datetime"):
-            queryset = queryset.filter(datetime__gte=start_datetime)
-        if end_datetime := request.query_params.get("end_datetime"):
-            queryset = queryset.filter(datetime__lte=end_datetime)
+        queryset = queryset.filter_datetime_range(
+            parse_datetime_param(request, "start_datetime"),
+            parse_datetime_param(request, "end_datetime"),
+        )
 
         show_archived = (
             request.query_params.get("show_archived", "false").lower()
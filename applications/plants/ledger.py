@@ -0,0 +1,155 @@
+import json
+from datetime import datetime, timedelta
+from typing import Iterable, List, NamedTuple, Optional
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+
+class LedgerEntry(NamedTuple):
+    plant_id: str
+    plant_name: str
+    from_date: datetime
+    to_date: datetime
+    attempts: int
+    error: str
+    failed_at: datetime
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {
+                **self._asdict(),
+                "from_date": self.from_date.isoformat(),
+                "to_date": self.to_date.isoformat(),
+                "failed_at": self.failed_at.isoformat(),
+            }
+        )
+
+    @classmethod
+    def loads(cls, value) -> "LedgerEntry":
+        data = json.loads(value)
+        return cls(
+            **{
+                **data,
+                "from_date": datetime.fromisoformat(data["from_date"]),
+                "to_date": datetime.fromisoformat(data["to_date"]),
+                "failed_at": datetime.fromisoformat(data["failed_at"]),
+            }
+        )
+
+
+class FailureLedger:
+    """
+    Plants whose monitoring data could not be fetched, stored in Redis.
+
+    Each failed plant is recorded once along with the window that was
+    requested, so only the failed plants are fetched again. Entries are
+    retried with an exponential backoff and moved to a dead letter hash
+    after `INGESTION_RETRY_MAX_ATTEMPTS` failed attempts.
+
+    Keys:
+    - `<prefix>:failures` hash of plant id to entry.
+    - `<prefix>:failures:due` sorted set of plant id by next attempt.
+    - `<prefix>:dead_letter` hash of plant id to entry.
+    """
+
+    def __init__(self, connection=None, prefix: Optional[str] = None):
+        self.redis = connection or get_redis_connection("default")
+        prefix = prefix or settings.INGESTION_LEDGER_KEY_PREFIX
+        self.failures_key = f"{prefix}:failures"
+        self.due_key = f"{prefix}:failures:due"
+        self.dead_letter_key = f"{prefix}:dead_letter"
+
+    def get(self, plant_id) -> Optional[LedgerEntry]:
+        value = self.redis.hget(self.failures_key, str(plant_id))
+        return LedgerEntry.loads(value) if value else None
+
+    def record(
+        self,
+        plant,
+        from_date: datetime,
+        to_date: datetime,
+        error: Exception,
+        now: datetime,
+    ) -> LedgerEntry:
+        """
+        Record a failed fetch of a plant. A plant that already failed
+        keeps a single entry covering both windows, with one more attempt
+        and a doubled delay until its next retry.
+        """
+        previous = self.get(plant.pk)
+        if previous:
+            from_date = min(from_date, previous.from_date)
+            to_date = max(to_date, previous.to_date)
+
+        entry = LedgerEntry(
+            plant_id=str(plant.pk),
+            plant_name=plant.name,
+            from_date=from_date,
+            to_date=to_date,
+            attempts=previous.attempts + 1 if previous else 1,
+            error=repr(error),
+            failed_at=now,
+        )
+
+        pipeline = self.redis.pipeline()
+        if entry.attempts >= settings.INGESTION_RETRY_MAX_ATTEMPTS:
+            pipeline.hdel(self.failures_key, entry.plant_id)
+            pipeline.zrem(self.due_key, entry.plant_id)
+            pipeline.hset(self.dead_letter_key, entry.plant_id, entry.dumps())
+        else:
+            delay = min(
+                settings.INGESTION_RETRY_BASE_DELAY
+                * 2 ** (entry.attempts - 1),
+                settings.INGESTION_RETRY_MAX_DELAY,
+            )
+            next_attempt_at = now + timedelta(seconds=delay)
+            pipeline.hset(self.failures_key, entry.plant_id, entry.dumps())
+            pipeline.zadd(
+                self.due_key, {entry.plant_id: next_attempt_at.timestamp()}
+            )
+        pipeline.execute()
+        return entry
+
+    def due(self, now: datetime) -> List[LedgerEntry]:
+        """
+        Entries whose backoff has elapsed.
+        """
+        plant_ids = self.redis.zrangebyscore(
+            self.due_key, "-inf", now.timestamp()
+        )
+        if not plant_ids:
+            return []
+        values = self.redis.hmget(self.failures_key, plant_ids)
+        return [LedgerEntry.loads(value) for value in values if value]
+
+    def resolve(self, plant_ids: Iterable):
+        """
+        Remove the entries of plants whose data was fetched, including
+        the dead letters of plants that recovered.
+        """
+        plant_ids = [str(plant_id) for plant_id in plant_ids]
+        if not plant_ids:
+            return
+        pipeline = self.redis.pipeline()
+        pipeline.hdel(self.failures_key, *plant_ids)
+        pipeline.zrem(self.due_key, *plant_ids)
+        pipeline.hdel(self.dead_letter_key, *plant_ids)
+        pipeline.execute()
+
+    def failures(self) -> List[LedgerEntry]:
+        return [
+            LedgerEntry.loads(value)
+            for value in self.redis.hvals(self.failures_key)
+        ]
+
+    def dead_letters(self) -> List[LedgerEntry]:
+        return [
+            LedgerEntry.loads(value)
+            for value in self.redis.hvals(self.dead_letter_key)
+        ]
+
+    def clear(self):
+        self.redis.delete(
+            self.failures_key, self.due_key, self.dead_letter_key
+        )
@@ -0,0 +1,205 @@
+import csv
+import json
+from datetime import datetime, timezone
+from typing import IO, Dict
+
+from django.db import connection, transaction
+
+from applications.plants.identifiers import UUID7_SQL
+from applications.plants.manager import MEASUREMENT_FIELDS
+from applications.plants.models import DailyRollup, DataPoint, Plant
+from applications.plants.partitions import ensure_partitions
+
+STAGING_TABLE = "plants_datapoint_staging"
+# Columns of the loaded files, plants are given by name.
+FILE_COLUMNS = ("plant", "datetime", *MEASUREMENT_FIELDS)
+FORMATS = ("csv", "ndjson")
+COPY_CHUNK_SIZE = 2**20
+
+
+class LoadError(ValueError):
+    pass
+
+
+def create_staging_table(cursor):
+    """
+    Create the staging table of the session. It outlives the
+    transactions of the load and is dropped once the load is over.
+    """
+    measurements = ", ".join(
+        f"{name} double precision NOT NULL" for name in MEASUREMENT_FIELDS
+    )
+    cursor.execute(
+        f"""
+        CREATE TEMPORARY TABLE {STAGING_TABLE} (
+            line bigint GENERATED ALWAYS AS IDENTITY,
+            id uuid NOT NULL DEFAULT {UUID7_SQL},
+            plant text NOT NULL,
+            datetime timestamp with time zone NOT NULL,
+            {measurements}
+        )
+        """
+    )
+
+
+def copy_csv(cursor, file: IO[str]) -> int:
+    """
+    Stream a CSV file with a header row into the staging table, without
+    parsing its rows in Python.
+    """
+    header = next(csv.reader([file.readline()]), [])
+    if sorted(header) != sorted(FILE_COLUMNS):
+        raise LoadError(
+            f"Expected the columns {', '.join(FILE_COLUMNS)} in any order, "
+            f"got {', '.join(header)}."
+        )
+    with cursor.copy(
+        f"COPY {STAGING_TABLE} ({', '.join(header)}) FROM STDIN (FORMAT csv)"
+    ) as copy:
+        while chunk := file.read(COPY_CHUNK_SIZE):
+            copy.write(chunk)
+    return cursor.rowcount
+
+
+def copy_ndjson(cursor, file: IO[str]) -> int:
+    """
+    Stream a file of one JSON object per line into the staging table.
+    """
+    rows = 0
+    with cursor.copy(
+        f"COPY {STAGING_TABLE} ({', '.join(FILE_COLUMNS)}) FROM STDIN"
+    ) as copy:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                copy.write_row([record[column] for column in FILE_COLUMNS])
+            except (ValueError, KeyError, TypeError) as err:
+                raise LoadError(f"Invalid line {number}: {err!r}") from err
+            rows += 1
+    return rows
+
+
+def create_staged_partitions(cursor):
+    """
+    Create the missing partitions of the months of the staged rows, each
+    in its own short transaction.
+    """
+    cursor.execute(
+        f"""
+        SELECT DISTINCT date_trunc('month', datetime AT TIME ZONE 'UTC')
+        FROM {STAGING_TABLE}
+        """
+    )
+    ensure_partitions(month for (month,) in cursor.fetchall())
+
+
+def merge_staging_table(cursor) -> Dict[str, int]:
+    """
+    Upsert the staged rows of known plants into the data points, with
+    the semantics of `DataPoint.objects.upsert`, and refresh the daily
+    rollups and ingestion watermarks of the written rows.
+    """
+    plants = Plant._meta.db_table
+    measurements = ", ".join(f"staged.{name}" for name in MEASUREMENT_FIELDS)
+    # A single statement cannot upsert the same row twice, the last line
+    # of a plant and datetime wins.
+    rows = (
+        "SELECT DISTINCT ON (plant.id, staged.datetime) "
+        f"staged.id, plant.id, staged.datetime, {measurements} "
+        f"FROM {STAGING_TABLE} AS staged "
+        f"JOIN {plants} AS plant ON plant.name = staged.plant "
+        "ORDER BY plant.id, staged.datetime, staged.line DESC"
+    )
+    cursor.execute(
+        f"""
+        WITH written AS ({DataPoint.objects.upsert_sql(rows)})
+        SELECT
+            written.plant_id,
+            written.day,
+            count(*),
+            count(staged.id)
+        FROM written
+        LEFT JOIN {STAGING_TABLE} AS staged ON staged.id = written.id
+        GROUP BY written.plant_id, written.day
+        """
+    )
+    written = cursor.fetchall()
+    DailyRollup.objects.refresh(
+        (plant_id, day) for plant_id, day, _, _ in written
+    )
+
+    cursor.execute(
+        f"""
+        SELECT
+            count(DISTINCT (plant.id, staged.datetime))
+                FILTER (WHERE plant.id IS NOT NULL),
+            count(*) FILTER (WHERE plant.id IS NULL),
+            array_agg(DISTINCT staged.plant)
+                FILTER (WHERE plant.id IS NULL)
+        FROM {STAGING_TABLE} AS staged
+        LEFT JOIN {plants} AS plant ON plant.name = staged.plant
+        """
+    )
+    distinct, skipped, unknown_plants = cursor.fetchone()
+
+    cursor.execute(
+        f"""
+        SELECT plant.id, max(staged.datetime)
+        FROM {STAGING_TABLE} AS staged
+        JOIN {plants} AS plant ON plant.name = staged.plant
+        GROUP BY plant.id
+        """
+    )
+    # Data ahead of now is still subject to change,
+    # so the watermark never moves past it.
+    now = datetime.now(tz=timezone.utc)
+    Plant.objects.advance_ingestion_watermarks(
+        {plant_id: min(latest, now) for plant_id, latest in cursor}
+    )
+
+    created = sum(created for _, _, _, created in written)
+    updated = sum(count for _, _, count, _ in written) - created
+    return {
+        "created": created,
+        "updated": updated,
+        "unchanged": distinct - created - updated,
+        "skipped": skipped,
+        "unknown_plants": sorted(unknown_plants or []),
+    }
+
+
+def load_datapoints(file: IO[str], file_format: str) -> Dict[str, int]:
+    """
+    Load a CSV or NDJSON file of data points: the file is streamed with
+    COPY into a staging table, the partitions of its months are created,
+    then the staged rows are merged into the data points in a single
+    transaction.
+
+    Creating a partition locks the data points table, so it is never
+    done in the transaction of the merge, which can run for minutes.
+
+    Rows of unknown plants are skipped.
+    """
+    copy = {"csv": copy_csv, "ndjson": copy_ndjson}[file_format]
+    with connection.cursor() as cursor:
+        create_staging_table(cursor)
+        try:
+            with transaction.atomic():
+                rows = copy(cursor, file)
+            create_staged_partitions(cursor)
+            with transaction.atomic():
+                summary = {"rows": rows, **merge_staging_table(cursor)}
+        finally:
+            cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+    return summary
+
+
+def file_format(path: str) -> str:
+    for name in FORMATS:
+        if path.endswith(f".{name}"):
+            return name
+    if path.endswith((".jsonl", ".json")):
+        return "ndjson"
+    raise LoadError(f"Unknown format of {path}, use --format.")
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from applications.plants.loader import (
+    FORMATS,
+    LoadError,
+    file_format,
+    load_datapoints,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load historical data points from CSV or NDJSON files with COPY. "
+        "Rows have the plant name, datetime and the four measurements, "
+        "and are upserted like the data of the monitoring service."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Files to load.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Format of the files, guessed from their extension.",
+        )
+
+    def handle(self, *args, **options):
+        for path in options["paths"]:
+            start = time.perf_counter()
+            try:
+                with open(path, newline="") as file:
+                    summary = load_datapoints(
+                        file, options["format"] or file_format(path)
+                    )
+            except (OSError, LoadError, DatabaseError) as err:
+                raise CommandError(f"Cannot load {path}: {err}") from err
+            elapsed = time.perf_counter() - start
+
+            unknown_plants = summary.pop("unknown_plants")
+            self.stdout.write(
+                f"Loaded {path} in {elapsed:.1f}s "
+                f"({summary['rows'] / elapsed:,.0f} rows/s): "
+                + ", ".join(f"{key} {value}" for key, value in summary.items())
+            )
+            if unknown_plants:
+                self.stderr.write(
+                    f"Skipped unknown plants: {', '.join(unknown_plants)}"
+                )
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from applications.plants.partitions import (
+    create_future_partitions,
+    list_partitions,
+    remove_expired_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the data point partitions of the coming months and "
+        "detach (or drop) the partitions older than the retention."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.DATAPOINT_PARTITIONS_AHEAD,
+            help="Number of months to create partitions for in advance.",
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.DATAPOINT_RETENTION_MONTHS,
+            help="Months of data points to keep, 0 keeps every partition.",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            default=settings.DATAPOINT_DROP_EXPIRED_PARTITIONS,
+            help="Drop the expired partitions instead of only detaching.",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="Only list the partitions.",
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for partition in list_partitions():
+                self.stdout.write(partition.name)
+            return
+
+        today = datetime.now(tz=timezone.utc).date()
+        for partition in create_future_partitions(today, options["ahead"]):
+            self.stdout.write(f"Created {partition.name}")
+
+        if options["retention_months"]:
+            for partition in remove_expired_partitions(
+                today, options["retention_months"], drop=options["drop"]
+            ):
+                action = "Dropped" if options["drop"] else "Detached"
+                self.stdout.write(f"{action} {partition.name}")
@@ -1,18 +1,87 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.apps import apps
+from django.db import connections
 from django.db.models import (
     Avg,
-    DecimalField,
+    Case,
+    Count,
+    DateTimeField,
     ExpressionWrapper,
     F,
+    FloatField,
     Manager,
+    Q,
     QuerySet,
     Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Trunc, TruncDate
+
+from applications.plants.report_cache import invalidate_reports
+
+MEASUREMENT_FIELDS = (
+    "energy_expected",
+    "energy_observed",
+    "irradiation_expected",
+    "irradiation_observed",
+)
+
+# Position after every id, of the plants read without cursor.
+UUID_MAX = uuid.UUID(int=2**128 - 1)
+
+SERIES_BUCKETS = ("hour", "day", "week", "month")
+# Metrics of the series that are never null.
+SERIES_METRICS = tuple(
+    f"{name}_{function}"
+    for name in MEASUREMENT_FIELDS
+    for function in ("sum", "avg")
 )
 
 
+def start_of_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def hour_bit(timestamp: str) -> str:
+    """
+    SQL expression of the bit of the UTC hour of `timestamp` in the
+    `hours` bitmap of the daily rollups.
+    """
+    return f"(1 << extract(hour FROM {timestamp} AT TIME ZONE 'UTC')::int)"
+
+
 class PlantQuerySet(QuerySet):
     def filter_active(self):
         return self.filter(is_archived=False)
 
+    def advance_ingestion_watermarks(self, watermarks: dict):
+        """
+        Move the ingestion watermark of each plant (mapped by pk) forward,
+        never backwards, so overlapping ingestions cannot rewind each
+        other. All plants are updated with a single statement.
+        """
+        if not watermarks:
+            return 0
+
+        watermark = Case(
+            *(
+                When(pk=pk, then=Value(value))
+                for pk, value in watermarks.items()
+            ),
+            output_field=DateTimeField(),
+        )
+        return (
+            self.filter(pk__in=watermarks.keys())
+            .filter(
+                Q(last_ingested_at__isnull=True)
+                | Q(last_ingested_at__lt=watermark)
+            )
+            .update(last_ingested_at=watermark)
+        )
+
 
 class PlantManager(Manager.from_queryset(PlantQuerySet)):
     pass
@@ -44,6 +113,133 @@ class PlantDataPointQuerySet(QuerySet):
             plant_name=F("plant__name"),
         )
 
+    def upsert(self, data_points):
+        """
+        Insert data points or update the measurements of the ones
+        that already exist for the same plant and datetime. Data points
+        are any objects with `plant_id`, `datetime` and measurement
+        attributes, like `DataPointRecord` tuples.
+
+        Data points of any number of plants are written with a single
+        INSERT ... ON CONFLICT DO UPDATE statement. Existing rows whose
+        measurements did not change are left untouched, so re-ingesting
+        the same data does not produce dead tuples. Data points of hours
+        already covered by a compacted rollup are not written either,
+        their data is part of the rollup.
+
+        The daily rollups of the days with created or updated rows are
+        refreshed afterwards, the caller is expected to run both in a
+        transaction.
+
+        Returns the number of created, updated and unchanged rows.
+        """
+        counters = {"created": 0, "updated": 0, "unchanged": 0}
+        if not data_points:
+            return counters
+
+        row = f"({', '.join(['%s'] * (3 + len(MEASUREMENT_FIELDS)))})"
+        sql = self.upsert_sql(f"VALUES {', '.join([row] * len(data_points))}")
+        new_pks = [self.model._meta.pk.get_default() for _ in data_points]
+        params = [
+            value
+            for pk, data_point in zip(new_pks, data_points)
+            for value in (
+                pk,
+                data_point.plant_id,
+                data_point.datetime,
+                *(getattr(data_point, name) for name in MEASUREMENT_FIELDS),
+            )
+        ]
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            written = cursor.fetchall()
+
+        DailyRollup = apps.get_model("plants", "DailyRollup")
+        DailyRollup.objects.using(self.db).refresh(
+            {(plant_id, day) for _, plant_id, day in written}
+        )
+
+        counters["created"] = len(
+            set(new_pks).intersection(pk for pk, _, _ in written)
+        )
+        counters["updated"] = len(written) - counters["created"]
+        counters["unchanged"] = len(data_points) - len(written)
+        return counters
+
+    def upsert_sql(self, rows: str) -> str:
+        """
+        INSERT ... ON CONFLICT DO UPDATE statement of `upsert`, writing
+        the `rows` query (VALUES or SELECT) of the id, plant id, datetime
+        and measurement columns.
+
+        The statement returns the primary key, plant id and UTC date of
+        the created or updated rows. Rows of the hours covered by a
+        compacted rollup are left out.
+        """
+        quote_name = connections[self.db].ops.quote_name
+        opts = self.model._meta
+        rollups = apps.get_model("plants", "DailyRollup")._meta
+
+        def quoted_columns(*names, opts=opts):
+            return [quote_name(opts.get_field(name).column) for name in names]
+
+        table = quote_name(opts.db_table)
+        measurements = quoted_columns(*MEASUREMENT_FIELDS)
+        columns = ", ".join(
+            quoted_columns("id", "plant", "datetime", *MEASUREMENT_FIELDS)
+        )
+        conflict = ", ".join(quoted_columns("plant", "datetime"))
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in measurements)
+        current = ", ".join(f"{table}.{c}" for c in measurements)
+        excluded = ", ".join(f"EXCLUDED.{c}" for c in measurements)
+        plant, day, is_compacted, hours = quoted_columns(
+            "plant", "day", "is_compacted", "hours", opts=rollups
+        )
+        timestamp = f"data_point.{quoted_columns('datetime')[0]}"
+        covered = (
+            f"SELECT FROM {quote_name(rollups.db_table)} AS rollup "
+            f"WHERE rollup.{plant} = data_point.{quoted_columns('plant')[0]} "
+            f"AND rollup.{day} = ({timestamp} AT TIME ZONE 'UTC')::date "
+            f"AND rollup.{is_compacted} "
+            f"AND rollup.{hours} & {hour_bit(timestamp)} <> 0"
+        )
+        return (
+            f"INSERT INTO {table} ({columns}) "
+            f"SELECT * FROM ({rows}) AS data_point ({columns}) "
+            f"WHERE NOT EXISTS ({covered}) "
+            f"ON CONFLICT ({conflict}) DO UPDATE SET {assignments} "
+            f"WHERE ({current}) IS DISTINCT FROM ({excluded}) "
+            # Updated rows keep their primary key, so only inserted rows
+            # return one of the new keys. The xmax system column is not
+            # available on partitioned tables.
+            f"RETURNING {quote_name(opts.pk.column)}, "
+            f"{quoted_columns('plant')[0]}, "
+            f"({quoted_columns('datetime')[0]} AT TIME ZONE 'UTC')::date "
+            "AS day"
+        )
+
+    def rollup_days(self):
+        """
+        Distinct (plant id, UTC date) pairs of the data points.
+        """
+        return (
+            self.annotate(day=TruncDate("datetime", tzinfo=timezone.utc))
+            .values_list("plant_id", "day")
+            .distinct()
+        )
+
+    def delete_in_batches(self, batch_size: int) -> int:
+        """
+        Delete the data points with one statement per batch of
+        `batch_size` rows, so each statement only holds its locks
+        briefly. Returns the number of deleted rows.
+        """
+        deleted = 0
+        while pks := list(self.values_list("pk", flat=True)[:batch_size]):
+            count, _ = self.filter(pk__in=pks).delete()
+            deleted += count
+        return deleted
+
     def annotate_metrics(self):
         return self.values(plant_name=F("plant__name")).annotate(
             energy_expected_sum=Sum("energy_expected"),
@@ -52,7 +248,7 @@ class PlantDataPointQuerySet(QuerySet):
             energy_observed_avg=Avg("energy_observed"),
             energy_efficiency=ExpressionWrapper(
                 F("energy_observed_sum") / F("energy_expected_sum"),
-                output_field=DecimalField(max_digits=15, decimal_places=10),
+                output_field=FloatField(),
             ),
             irradiation_expected_sum=Sum("irradiation_expected"),
             irradiation_observed_sum=Sum("irradiation_observed"),
@@ -60,10 +256,462 @@ class PlantDataPointQuerySet(QuerySet):
             irradiation_observed_avg=Avg("irradiation_observed"),
             irradiation_efficiency=ExpressionWrapper(
                 F("irradiation_observed_sum") / F("irradiation_expected_sum"),
-                output_field=DecimalField(max_digits=15, decimal_places=10),
+                output_field=FloatField(),
             ),
         )
 
 
 class PlantDataPointManager(Manager.from_queryset(PlantDataPointQuerySet)):
     pass
+
+
+class DailyRollupQuerySet(QuerySet):
+    def refresh(self, plant_days):
+        """
+        Recompute the rollups of the given (plant id, UTC date) pairs
+        from their data points, with a single statement.
+
+        A day holds at most a few dozen data points per plant, so
+        recomputing it is cheap and keeps the minimums and maximums
+        exact when measurements are updated. Compacted rollups cannot be
+        recomputed, their data points no longer exist: late data points
+        of compacted days are deleted and merged into the rollup, once
+        per hour the rollup did not cover yet, so re-written data is not
+        counted twice. The cached reports of the days are invalidated.
+        """
+        plant_days = list(plant_days)
+        if not plant_days:
+            return
+
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        rollups = self.model._meta
+        data_points = apps.get_model("plants", "DataPoint")._meta
+
+        def column(opts, name):
+            return quote_name(opts.get_field(name).column)
+
+        def data_point_column(name):
+            return f"data_point.{column(data_points, name)}"
+
+        aggregates = {
+            column(rollups, f"{name}_{function}"): (
+                f"{function}({data_point_column(name)})"
+            )
+            for name in MEASUREMENT_FIELDS
+            for function in ("sum", "min", "max")
+        }
+        aggregates[column(rollups, "datapoints")] = "count(*)"
+        aggregates[column(rollups, "hours")] = (
+            f"bit_or({hour_bit(data_point_column('datetime'))})"
+        )
+        table = quote_name(rollups.db_table)
+        plant, day = column(rollups, "plant"), column(rollups, "day")
+        is_compacted = column(rollups, "is_compacted")
+        timestamp = data_point_column("datetime")
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in aggregates)
+        day_range = (
+            f"{timestamp} >= days.day::timestamp AT TIME ZONE 'UTC' "
+            f"AND {timestamp} < (days.day + 1)::timestamp AT TIME ZONE 'UTC'"
+        )
+        # Sums and counts add up and minimums and maximums combine, so
+        # the late data points of compacted days are merged into their
+        # rollup and deleted.
+        combine = {
+            "sum": "{} + {}",
+            "min": "least({}, {})",
+            "max": "greatest({}, {})",
+        }
+        late_aggregates = [
+            (
+                column(rollups, f"{name}_{function}"),
+                f"{function}({column(data_points, name)})",
+                combine[function],
+            )
+            for name in MEASUREMENT_FIELDS
+            for function in combine
+        ]
+        late_aggregates.append(
+            (column(rollups, "datapoints"), "count(*)", combine["sum"])
+        )
+        late_aggregates.append(
+            (column(rollups, "hours"), "bit_or(hour)", "{} | {}")
+        )
+        measurements = ", ".join(
+            data_point_column(name) for name in MEASUREMENT_FIELDS
+        )
+        late_columns = ", ".join(
+            f"{aggregate} AS {c}" for c, aggregate, _ in late_aggregates
+        )
+        merge_assignments = ", ".join(
+            f"{c} = {template.format(f'{table}.{c}', f'late.{c}')}"
+            for c, _, template in late_aggregates
+        )
+        compacted = (
+            f"SELECT FROM {table} AS rollup "
+            f"WHERE rollup.{plant} = days.plant_id "
+            f"AND rollup.{day} = days.day AND rollup.{is_compacted}"
+        )
+        sql = (
+            "WITH days AS ("
+            "SELECT DISTINCT * "
+            "FROM unnest(%s::uuid[], %s::date[]) AS days (plant_id, day)"
+            "), late_data_points AS ("
+            f"DELETE FROM {quote_name(data_points.db_table)} AS data_point "
+            f"USING days WHERE EXISTS ({compacted}) "
+            f"AND {data_point_column('plant')} = days.plant_id "
+            f"AND {day_range} "
+            f"RETURNING days.plant_id, days.day, "
+            f"{hour_bit(timestamp)} AS hour, {measurements}"
+            # A single data point of each hour the rollup does not cover.
+            "), new_hours AS ("
+            "SELECT DISTINCT ON (late.plant_id, late.day, late.hour) late.* "
+            f"FROM late_data_points AS late JOIN {table} AS rollup "
+            f"ON rollup.{plant} = late.plant_id AND rollup.{day} = late.day "
+            f"WHERE rollup.{column(rollups, 'hours')} & late.hour = 0 "
+            "ORDER BY late.plant_id, late.day, late.hour"
+            "), late AS ("
+            f"SELECT plant_id, day, {late_columns} "
+            "FROM new_hours GROUP BY plant_id, day"
+            "), merged AS ("
+            f"UPDATE {table} SET {merge_assignments} FROM late "
+            f"WHERE {table}.{plant} = late.plant_id "
+            f"AND {table}.{day} = late.day"
+            ") "
+            f"INSERT INTO {table} "
+            f"({column(rollups, 'id')}, {plant}, {day}, {is_compacted}, "
+            f"{', '.join(aggregates)}) "
+            f"SELECT gen_random_uuid(), days.plant_id, days.day, false, "
+            f"{', '.join(aggregates.values())} "
+            "FROM days "
+            f"JOIN {quote_name(data_points.db_table)} AS data_point "
+            f"ON {data_point_column('plant')} = days.plant_id "
+            f"AND {day_range} "
+            f"WHERE NOT EXISTS ({compacted}) "
+            "GROUP BY days.plant_id, days.day "
+            f"ON CONFLICT ({plant}, {day}) DO UPDATE SET {assignments} "
+            f"WHERE NOT {table}.{is_compacted}"
+        )
+        plant_ids, days = zip(*plant_days)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [list(plant_ids), list(days)])
+        invalidate_reports(days, using=self.db)
+
+    def compact(self, before) -> int:
+        """
+        Refresh the rollups of the data points older than the `before`
+        date and mark every rollup of those days as compacted, so their
+        data points can be deleted. Returns the number of newly
+        compacted rollups.
+        """
+        DataPoint = apps.get_model("plants", "DataPoint")
+        self.refresh(
+            DataPoint.objects.using(self.db)
+            .filter(
+                datetime__lt=datetime.combine(
+                    before, datetime.min.time(), tzinfo=timezone.utc
+                )
+            )
+            .rollup_days()
+        )
+        return self.filter(day__lt=before, is_compacted=False).update(
+            is_compacted=True
+        )
+
+
+class DailyRollupManager(Manager.from_queryset(DailyRollupQuerySet)):
+    pass
+
+
+class ReportSourceQuerySet(QuerySet):
+    def filter_active(self):
+        return self.filter(plant__is_archived=False)
+
+    def datapoint_rows(self):
+        """
+        Data points, with the compacted days represented by their rollup.
+        """
+        return self.filter(Q(is_rollup=False) | Q(is_compacted=True)).values(
+            "id",
+            "energy_expected",
+            "energy_observed",
+            "irradiation_expected",
+            "irradiation_observed",
+            "datetime",
+            "datapoints",
+            "plant_id",
+            plant_name=F("plant__name"),
+        )
+
+    def for_datapoint_list(self, plant_id: str):
+        return (
+            self.filter(plant_id=plant_id)
+            .datapoint_rows()
+            .order_by("-datetime", "-id")
+        )
+
+    def filter_datapoints(self, start=None, end=None):
+        """
+        Data points within [start, end], with the compacted days
+        represented by their rollup whenever they overlap the range.
+        """
+        queryset = self.filter(Q(is_rollup=False) | Q(is_compacted=True))
+        if start is not None:
+            queryset = queryset.filter(
+                Q(datetime__gte=start)
+                | Q(is_rollup=True, datetime__gt=start - timedelta(days=1))
+            )
+        if end is not None:
+            queryset = queryset.filter(datetime__lte=end)
+        return queryset
+
+    def latest_per_plant(
+        self, plant_ids, limit: int, start=None, end=None, cursors=None
+    ) -> list:
+        """
+        Data point rows (see `datapoint_rows`) of the active plants among
+        `plant_ids` within [start, end], at most the `limit` newest per
+        plant, ordered like `plant_ids` then newest first. `cursors` map
+        plant ids to the (datetime, id) position to continue them after.
+
+        Each plant reads the `limit` newest rows of both sides of the
+        report source, the data points and the compacted rollups, from
+        their (plant, datetime) indexes with a LATERAL subquery. The cost
+        grows with the number of plants and `limit`, not with the history
+        of the plants, in a single query.
+        """
+        DataPoint = apps.get_model("plants", "DataPoint")
+        DailyRollup = apps.get_model("plants", "DailyRollup")
+        Plant = apps.get_model("plants", "Plant")
+        cursors = cursors or {}
+        plant_ids = list(plant_ids)
+        if not plant_ids:
+            return []
+
+        day_start = "(rollup.day::timestamp AT TIME ZONE 'UTC')"
+        data_point_conditions = ["data_point.plant_id = plant.id"]
+        rollup_conditions = [
+            "rollup.plant_id = plant.id",
+            "rollup.is_compacted",
+        ]
+        data_point_params, rollup_params = [], []
+        if start is not None:
+            data_point_conditions.append("data_point.datetime >= %s")
+            data_point_params.append(start)
+            # Compacted days overlapping the start are represented by
+            # their rollup.
+            rollup_conditions.append(f"{day_start} > %s")
+            rollup_params.append(start - timedelta(days=1))
+        if end is not None:
+            data_point_conditions.append("data_point.datetime <= %s")
+            data_point_params.append(end)
+            rollup_conditions.append(f"{day_start} <= %s")
+            rollup_params.append(end)
+        # Plants without cursor start after the end of time, so the
+        # position bounds the index scans of every plant.
+        for conditions, datetime_column, pk in (
+            (data_point_conditions, "data_point.datetime", "data_point.id"),
+            (rollup_conditions, day_start, "rollup.id"),
+        ):
+            conditions.append(
+                f"{datetime_column} <= plant.cursor_datetime AND "
+                f"({datetime_column} < plant.cursor_datetime "
+                f"OR {pk} < plant.cursor_id)"
+            )
+        measurements = ", ".join(MEASUREMENT_FIELDS)
+        rollup_measurements = ", ".join(
+            f"{name}_sum AS {name}" for name in MEASUREMENT_FIELDS
+        )
+        # Rows of a plant and datetime are unique, the plant index gives
+        # the data points in order without sorting on id.
+        sql = f"""
+            SELECT
+                latest.id,
+                {", ".join(f"latest.{name}" for name in MEASUREMENT_FIELDS)},
+                latest.datetime,
+                latest.datapoints,
+                plant.id,
+                active_plant.name
+            FROM unnest(%s::uuid[], %s::timestamptz[], %s::uuid[])
+                WITH ORDINALITY
+                AS plant (id, cursor_datetime, cursor_id, ordinal)
+            JOIN {Plant._meta.db_table} AS active_plant
+                ON active_plant.id = plant.id AND NOT active_plant.is_archived
+            CROSS JOIN LATERAL (
+                (
+                    SELECT
+                        data_point.id,
+                        {measurements},
+                        data_point.datetime,
+                        1 AS datapoints
+                    FROM {DataPoint._meta.db_table} AS data_point
+                    WHERE {" AND ".join(data_point_conditions)}
+                    ORDER BY data_point.datetime DESC
+                    LIMIT %s
+                )
+                UNION ALL
+                (
+                    SELECT
+                        rollup.id,
+                        {rollup_measurements},
+                        {day_start},
+                        rollup.datapoints
+                    FROM {DailyRollup._meta.db_table} AS rollup
+                    WHERE {" AND ".join(rollup_conditions)}
+                    ORDER BY {day_start} DESC, rollup.id DESC
+                    LIMIT %s
+                )
+                ORDER BY datetime DESC, id DESC
+                LIMIT %s
+            ) AS latest
+            ORDER BY plant.ordinal, latest.datetime DESC, latest.id DESC
+        """
+        no_cursor = (datetime.max.replace(tzinfo=timezone.utc), UUID_MAX)
+        positions = [cursors.get(pk, no_cursor) for pk in plant_ids]
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                sql,
+                [
+                    plant_ids,
+                    [position[0] for position in positions],
+                    [position[1] for position in positions],
+                    *data_point_params,
+                    limit,
+                    *rollup_params,
+                    limit,
+                    limit,
+                ],
+            )
+            columns = (
+                "id",
+                *MEASUREMENT_FIELDS,
+                "datetime",
+                "datapoints",
+                "plant_id",
+                "plant_name",
+            )
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def for_datapoint_export(self, plant_ids=None, start=None, end=None):
+        """
+        Data point rows of the plants (every plant when None) within
+        [start, end], ordered by plant and datetime.
+        """
+        queryset = self.filter_datapoints(start, end).datapoint_rows()
+        if plant_ids is not None:
+            queryset = queryset.filter(plant_id__in=plant_ids)
+        return queryset.order_by("plant_id", "datetime", "id")
+
+    def filter_datetime_range(self, start=None, end=None):
+        """
+        Keep the rollups of the days entirely within [start, end] and the
+        data points of the partial days at the edges of the range.
+
+        Compacted days no longer have data points, their rollup is kept
+        whenever the day overlaps the range.
+        """
+        whole_days = Q()
+        if start is not None:
+            start = start.astimezone(timezone.utc)
+            first_day = start.replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+            if first_day < start:
+                first_day += timedelta(days=1)
+            whole_days &= Q(datetime__gte=first_day)
+        if end is not None:
+            end = end.astimezone(timezone.utc)
+            # The end is inclusive, a day is whole when its last
+            # microsecond is within the range.
+            after_end = end + timedelta(microseconds=1)
+            whole_days &= Q(datetime__lt=start_of_day(after_end))
+        if not whole_days:
+            return self.filter(is_rollup=True)
+
+        edges = ~whole_days
+        overlapping_days = Q(is_compacted=True)
+        if start is not None:
+            edges &= Q(datetime__gte=start)
+            overlapping_days &= Q(datetime__gt=start - timedelta(days=1))
+        if end is not None:
+            edges &= Q(datetime__lte=end)
+            overlapping_days &= Q(datetime__lte=end)
+        return self.filter(
+            Q(is_rollup=True) & (whole_days | overlapping_days)
+            | Q(is_rollup=False) & edges
+        )
+
+    @staticmethod
+    def metrics():
+        def average(name):
+            return ExpressionWrapper(
+                Sum(name) / Sum("datapoints"), output_field=FloatField()
+            )
+
+        return {
+            "energy_expected_sum": Sum("energy_expected"),
+            "energy_observed_sum": Sum("energy_observed"),
+            "energy_expected_avg": average("energy_expected"),
+            "energy_observed_avg": average("energy_observed"),
+            "energy_efficiency": ExpressionWrapper(
+                F("energy_observed_sum") / F("energy_expected_sum"),
+                output_field=FloatField(),
+            ),
+            "irradiation_expected_sum": Sum("irradiation_expected"),
+            "irradiation_observed_sum": Sum("irradiation_observed"),
+            "irradiation_expected_avg": average("irradiation_expected"),
+            "irradiation_observed_avg": average("irradiation_observed"),
+            "irradiation_efficiency": ExpressionWrapper(
+                F("irradiation_observed_sum") / F("irradiation_expected_sum"),
+                output_field=FloatField(),
+            ),
+        }
+
+    def annotate_metrics(self):
+        """
+        Same metrics as `PlantDataPointQuerySet.annotate_metrics`, from
+        the sums and counts of the rollups and data points.
+        """
+        return self.values(plant_name=F("plant__name")).annotate(
+            **self.metrics()
+        )
+
+    def series(self, bucket: str, start=None, end=None):
+        """
+        Metrics of each `bucket` (hour, day, week or month, in UTC) of
+        the range, oldest first.
+
+        Day and longer buckets read whole days from the rollups. Hourly
+        buckets read the data points, a compacted day being counted in
+        its first hour.
+        """
+        if bucket == "hour":
+            queryset = self.filter_datapoints(start, end)
+        else:
+            queryset = self.filter_datetime_range(start, end)
+        return (
+            queryset.values(
+                bucket=Trunc("datetime", bucket, tzinfo=timezone.utc)
+            )
+            .annotate(**self.metrics())
+            .order_by("bucket")
+        )
+
+
+class ReportSourceManager(Manager.from_queryset(ReportSourceQuerySet)):
+    pass
+
+
+class BackfillQuerySet(QuerySet):
+    def annotate_progress(self):
+        return self.annotate(
+            chunks_total=Count("chunks"),
+            chunks_completed=Count(
+                "chunks", filter=Q(chunks__status="completed")
+            ),
+            chunks_failed=Count("chunks", filter=Q(chunks__status="failed")),
+        )
+
+
+class BackfillManager(Manager.from_queryset(BackfillQuerySet)):
+    pass
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+def populate_last_ingested_at(apps, schema_editor):
+    Plant = apps.get_model('plants', 'Plant')
+    DataPoint = apps.get_model('plants', 'DataPoint')
+    latest = DataPoint.objects.filter(
+        plant_id=models.OuterRef('pk')
+    ).order_by('-datetime').values('datetime')[:1]
+    Plant.objects.update(last_ingested_at=models.Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plant',
+            name='last_ingested_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            populate_last_ingested_at, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0002_plant_last_ingested_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Backfill',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('from_date', models.DateField()),
+                ('to_date', models.DateField()),
+                ('chunk_days', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('plants', models.ManyToManyField(related_name='backfills', to='plants.plant')),
+            ],
+            options={
+                'verbose_name': 'Backfill',
+                'verbose_name_plural': 'Backfills',
+            },
+        ),
+        migrations.CreateModel(
+            name='BackfillChunk',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('from_date', models.DateField()),
+                ('to_date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('backfill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='plants.backfill')),
+                ('plant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='backfill_chunks', to='plants.plant')),
+            ],
+            options={
+                'verbose_name': 'Backfill Chunk',
+                'verbose_name_plural': 'Backfill Chunks',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='backfillchunk',
+            constraint=models.UniqueConstraint(fields=('backfill', 'plant', 'from_date'), name='unique_backfill_chunk'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The unique index is built concurrently so that ingestion and
+    # reads keep working while it is created on a large table.
+    atomic = False
+
+    dependencies = [
+        ('plants', '0003_backfill'),
+    ]
+
+    operations = [
+        # Keep a single data point per plant and datetime.
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM plants_datapoint AS duplicate
+                USING plants_datapoint AS kept
+                WHERE duplicate.plant_id = kept.plant_id
+                  AND duplicate.datetime = kept.datetime
+                  AND duplicate.id < kept.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='datapoint',
+                    constraint=models.UniqueConstraint(fields=('plant', 'datetime'), name='unique_datapoint_plant_datetime'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS
+                        unique_datapoint_plant_datetime
+                        ON plants_datapoint (plant_id, datetime);
+                    """,
+                    reverse_sql="""
+                        DROP INDEX CONCURRENTLY IF EXISTS
+                        unique_datapoint_plant_datetime;
+                    """,
+                ),
+                migrations.RunSQL(
+                    sql="""
+                        ALTER TABLE plants_datapoint
+                        ADD CONSTRAINT unique_datapoint_plant_datetime
+                        UNIQUE USING INDEX unique_datapoint_plant_datetime;
+                    """,
+                    reverse_sql="""
+                        ALTER TABLE plants_datapoint
+                        DROP CONSTRAINT unique_datapoint_plant_datetime;
+                    """,
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:40
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Every index is built concurrently so that ingestion and reads keep
+    # working while they are created on a large table.
+    atomic = False
+
+    dependencies = [
+        ('plants', '0004_datapoint_unique_datapoint_plant_datetime'),
+    ]
+
+    operations = [
+        # Make the (plant, datetime) unique index cover the measurements,
+        # so lookups by plant and datetime are answered by index only scans.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name='datapoint',
+                    name='unique_datapoint_plant_datetime',
+                ),
+                migrations.AddConstraint(
+                    model_name='datapoint',
+                    constraint=models.UniqueConstraint(fields=('plant', 'datetime'), include=('energy_expected', 'energy_observed', 'irradiation_expected', 'irradiation_observed'), name='unique_datapoint_plant_datetime'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS
+                        unique_datapoint_plant_datetime_covering
+                        ON plants_datapoint (plant_id, datetime)
+                        INCLUDE (
+                            energy_expected,
+                            energy_observed,
+                            irradiation_expected,
+                            irradiation_observed
+                        );
+                    """,
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+                # Both statements run in a single implicit transaction, so
+                # the table is never left without the constraint.
+                migrations.RunSQL(
+                    sql="""
+                        ALTER TABLE plants_datapoint
+                        DROP CONSTRAINT unique_datapoint_plant_datetime;
+                        ALTER TABLE plants_datapoint
+                        ADD CONSTRAINT unique_datapoint_plant_datetime
+                        UNIQUE USING INDEX
+                        unique_datapoint_plant_datetime_covering;
+                    """,
+                    reverse_sql="""
+                        ALTER TABLE plants_datapoint
+                        DROP CONSTRAINT unique_datapoint_plant_datetime;
+                        ALTER TABLE plants_datapoint
+                        ADD CONSTRAINT unique_datapoint_plant_datetime
+                        UNIQUE USING INDEX
+                        unique_datapoint_plant_datetime_plain;
+                    """,
+                ),
+                # Reversed first, so the previous index exists before the
+                # constraint is swapped back.
+                migrations.RunSQL(
+                    sql=migrations.RunSQL.noop,
+                    reverse_sql="""
+                        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS
+                        unique_datapoint_plant_datetime_plain
+                        ON plants_datapoint (plant_id, datetime);
+                    """,
+                ),
+            ],
+        ),
+        # The foreign key index is a prefix of the unique index.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='datapoint',
+                    name='plant',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='datapoints', to='plants.plant'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                        DROP INDEX CONCURRENTLY IF EXISTS
+                        plants_datapoint_plant_id_8137c464;
+                    """,
+                    reverse_sql="""
+                        CREATE INDEX CONCURRENTLY IF NOT EXISTS
+                        plants_datapoint_plant_id_8137c464
+                        ON plants_datapoint (plant_id);
+                    """,
+                ),
+            ],
+        ),
+        # Reports filter every plant over a datetime range. Data points are
+        # mostly appended in datetime order, so a tiny BRIN index narrows
+        # those scans down to the matching blocks.
+        AddIndexConcurrently(
+            model_name='datapoint',
+            index=django.contrib.postgres.indexes.BrinIndex(autosummarize=True, fields=['datetime'], name='datapoint_datetime_brin'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:00
+
+from django.db import migrations
+
+COLUMNS = """
+    id,
+    energy_expected,
+    energy_observed,
+    irradiation_expected,
+    irradiation_observed,
+    datetime,
+    plant_id
+"""
+
+TABLE_DEFINITION = """
+    id uuid NOT NULL,
+    energy_expected numeric(15, 10) NOT NULL,
+    energy_observed numeric(15, 10) NOT NULL,
+    irradiation_expected numeric(15, 10) NOT NULL,
+    irradiation_observed numeric(15, 10) NOT NULL,
+    datetime timestamp with time zone NOT NULL,
+    plant_id uuid NOT NULL
+        REFERENCES plants_plant (id) DEFERRABLE INITIALLY DEFERRED,
+    CONSTRAINT unique_datapoint_plant_datetime
+        UNIQUE (plant_id, datetime)
+        INCLUDE (
+            energy_expected,
+            energy_observed,
+            irradiation_expected,
+            irradiation_observed
+        )
+"""
+
+# Old constraints and indexes are dropped first, their names are reused by
+# the new table and the copy is faster without them.
+DROP_CONSTRAINTS = """
+    ALTER TABLE plants_datapoint RENAME TO plants_datapoint_previous;
+    ALTER TABLE plants_datapoint_previous
+        DROP CONSTRAINT plants_datapoint_pkey,
+        DROP CONSTRAINT unique_datapoint_plant_datetime;
+    DROP INDEX datapoint_datetime_brin;
+"""
+
+CREATE_BRIN_INDEX = """
+    CREATE INDEX datapoint_datetime_brin ON plants_datapoint
+    USING brin (datetime) WITH (autosummarize = on);
+"""
+
+COPY_ROWS = f"""
+    INSERT INTO plants_datapoint ({COLUMNS})
+    SELECT {COLUMNS} FROM plants_datapoint_previous;
+    DROP TABLE plants_datapoint_previous;
+"""
+
+
+class Migration(migrations.Migration):
+    # The table is rebuilt and its rows copied in a single transaction, the
+    # conversion of a large table has to run in a maintenance window.
+
+    dependencies = [
+        ('plants', '0005_datapoint_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=DROP_CONSTRAINTS
+            + f"""
+            -- Primary and unique keys of a partitioned table must include
+            -- the partition key, the ORM keeps using `id` as primary key.
+            CREATE TABLE plants_datapoint (
+                {TABLE_DEFINITION},
+                CONSTRAINT plants_datapoint_pkey PRIMARY KEY (id, datetime)
+            ) PARTITION BY RANGE (datetime);
+            """
+            + CREATE_BRIN_INDEX
+            + """
+            -- Monthly partitions covering the existing data points and
+            -- the next three months.
+            DO $$
+            DECLARE
+                month timestamp;
+            BEGIN
+                FOR month IN
+                    SELECT generate_series(
+                        date_trunc('month', LEAST(
+                            min(datetime), now()
+                        ) AT TIME ZONE 'UTC'),
+                        date_trunc('month', GREATEST(
+                            max(datetime), now() + interval '3 months'
+                        ) AT TIME ZONE 'UTC'),
+                        interval '1 month'
+                    )
+                    FROM plants_datapoint_previous
+                LOOP
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF plants_datapoint '
+                        'FOR VALUES FROM (%L) TO (%L)',
+                        'plants_datapoint_' || to_char(month, '"y"YYYY"m"MM'),
+                        month AT TIME ZONE 'UTC',
+                        (month + interval '1 month') AT TIME ZONE 'UTC'
+                    );
+                END LOOP;
+            END
+            $$;
+            """
+            + COPY_ROWS,
+            reverse_sql=DROP_CONSTRAINTS
+            + f"""
+            CREATE TABLE plants_datapoint (
+                {TABLE_DEFINITION},
+                CONSTRAINT plants_datapoint_pkey PRIMARY KEY (id)
+            );
+            """
+            + CREATE_BRIN_INDEX
+            + COPY_ROWS,
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+MEASUREMENT_FIELDS = (
+    'energy_expected',
+    'energy_observed',
+    'irradiation_expected',
+    'irradiation_observed',
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0006_partition_datapoint'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='datapoint',
+                    name=name,
+                    field=models.FloatField(),
+                )
+                for name in MEASUREMENT_FIELDS
+            ],
+            # Every column is converted by a single statement, so the
+            # partitions and their indexes are rewritten only once.
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                        ALTER TABLE plants_datapoint
+                        ALTER COLUMN energy_expected
+                            TYPE double precision,
+                        ALTER COLUMN energy_observed
+                            TYPE double precision,
+                        ALTER COLUMN irradiation_expected
+                            TYPE double precision,
+                        ALTER COLUMN irradiation_observed
+                            TYPE double precision;
+                    """,
+                    reverse_sql="""
+                        ALTER TABLE plants_datapoint
+                        ALTER COLUMN energy_expected
+                            TYPE numeric(15, 10),
+                        ALTER COLUMN energy_observed
+                            TYPE numeric(15, 10),
+                        ALTER COLUMN irradiation_expected
+                            TYPE numeric(15, 10),
+                        ALTER COLUMN irradiation_observed
+                            TYPE numeric(15, 10);
+                    """,
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0007_datapoint_float_measurements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSource',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('datetime', models.DateTimeField()),
+                ('is_rollup', models.BooleanField()),
+                ('datapoints', models.PositiveIntegerField()),
+                ('energy_expected', models.FloatField()),
+                ('energy_observed', models.FloatField()),
+                ('irradiation_expected', models.FloatField()),
+                ('irradiation_observed', models.FloatField()),
+            ],
+            options={
+                'db_table': 'plants_reportsource',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('datapoints', models.PositiveIntegerField()),
+                ('energy_expected_sum', models.FloatField()),
+                ('energy_expected_min', models.FloatField()),
+                ('energy_expected_max', models.FloatField()),
+                ('energy_observed_sum', models.FloatField()),
+                ('energy_observed_min', models.FloatField()),
+                ('energy_observed_max', models.FloatField()),
+                ('irradiation_expected_sum', models.FloatField()),
+                ('irradiation_expected_min', models.FloatField()),
+                ('irradiation_expected_max', models.FloatField()),
+                ('irradiation_observed_sum', models.FloatField()),
+                ('irradiation_observed_min', models.FloatField()),
+                ('irradiation_observed_max', models.FloatField()),
+                ('plant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='plants.plant')),
+            ],
+            options={
+                'verbose_name': 'Daily Rollup',
+                'verbose_name_plural': 'Daily Rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(fields=('plant', 'day'), name='unique_dailyrollup_plant_day'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                CREATE VIEW plants_reportsource AS
+                SELECT
+                    id,
+                    plant_id,
+                    day::timestamp AT TIME ZONE 'UTC' AS datetime,
+                    true AS is_rollup,
+                    datapoints,
+                    energy_expected_sum AS energy_expected,
+                    energy_observed_sum AS energy_observed,
+                    irradiation_expected_sum AS irradiation_expected,
+                    irradiation_observed_sum AS irradiation_observed
+                FROM plants_dailyrollup
+                UNION ALL
+                SELECT
+                    id,
+                    plant_id,
+                    datetime,
+                    false AS is_rollup,
+                    1 AS datapoints,
+                    energy_expected,
+                    energy_observed,
+                    irradiation_expected,
+                    irradiation_observed
+                FROM plants_datapoint;
+            """,
+            reverse_sql="DROP VIEW plants_reportsource;",
+        ),
+        # Ranges of the report source filter rollups on the start of
+        # their day.
+        migrations.RunSQL(
+            sql="""
+                CREATE INDEX dailyrollup_day_start
+                ON plants_dailyrollup (
+                    (day::timestamp AT TIME ZONE 'UTC')
+                );
+            """,
+            reverse_sql="DROP INDEX dailyrollup_day_start;",
+        ),
+        # Roll up the existing data points.
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO plants_dailyrollup (
+                    id,
+                    plant_id,
+                    day,
+                    datapoints,
+                    energy_expected_sum,
+                    energy_expected_min,
+                    energy_expected_max,
+                    energy_observed_sum,
+                    energy_observed_min,
+                    energy_observed_max,
+                    irradiation_expected_sum,
+                    irradiation_expected_min,
+                    irradiation_expected_max,
+                    irradiation_observed_sum,
+                    irradiation_observed_min,
+                    irradiation_observed_max
+                )
+                SELECT
+                    gen_random_uuid(),
+                    plant_id,
+                    (datetime AT TIME ZONE 'UTC')::date,
+                    count(*),
+                    sum(energy_expected),
+                    min(energy_expected),
+                    max(energy_expected),
+                    sum(energy_observed),
+                    min(energy_observed),
+                    max(energy_observed),
+                    sum(irradiation_expected),
+                    min(irradiation_expected),
+                    max(irradiation_expected),
+                    sum(irradiation_observed),
+                    min(irradiation_observed),
+                    max(irradiation_observed)
+                FROM plants_datapoint
+                GROUP BY plant_id, (datetime AT TIME ZONE 'UTC')::date;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
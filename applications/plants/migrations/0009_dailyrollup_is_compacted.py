@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+REPORT_SOURCE_VIEW = """
+    SELECT
+        id,
+        plant_id,
+        day::timestamp AT TIME ZONE 'UTC' AS datetime,
+        true AS is_rollup,
+        datapoints,
+        energy_expected_sum AS energy_expected,
+        energy_observed_sum AS energy_observed,
+        irradiation_expected_sum AS irradiation_expected,
+        irradiation_observed_sum AS irradiation_observed{rollup_columns}
+    FROM plants_dailyrollup
+    UNION ALL
+    SELECT
+        id,
+        plant_id,
+        datetime,
+        false AS is_rollup,
+        1 AS datapoints,
+        energy_expected,
+        energy_observed,
+        irradiation_expected,
+        irradiation_observed{datapoint_columns}
+    FROM plants_datapoint
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0008_dailyrollup_reportsource'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='is_compacted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunSQL(
+            sql="CREATE OR REPLACE VIEW plants_reportsource AS "
+            + REPORT_SOURCE_VIEW.format(
+                rollup_columns=",\n        is_compacted",
+                datapoint_columns=",\n        false AS is_compacted",
+            ),
+            # Columns cannot be removed from a replaced view.
+            reverse_sql="DROP VIEW plants_reportsource; "
+            "CREATE VIEW plants_reportsource AS "
+            + REPORT_SOURCE_VIEW.format(
+                rollup_columns="", datapoint_columns=""
+            ),
+        ),
+    ]
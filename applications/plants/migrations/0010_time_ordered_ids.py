@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:30
+
+import applications.plants.identifiers
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0009_dailyrollup_is_compacted'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='datapoint',
+            name='id',
+            field=models.UUIDField(default=applications.plants.identifiers.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='plant',
+            name='id',
+            field=models.UUIDField(default=applications.plants.identifiers.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
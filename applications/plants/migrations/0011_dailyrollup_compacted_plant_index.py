@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # The index is built concurrently so that ingestion and reads keep
+    # working while it is created.
+    atomic = False
+
+    dependencies = [
+        ('plants', '0010_time_ordered_ids'),
+    ]
+
+    operations = [
+        # Data point lists merge the data points and the compacted rollups
+        # of a plant newest first. Without a per plant index, the rollup
+        # side walks the day index of every plant before its first row.
+        migrations.RunSQL(
+            sql="""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS
+                dailyrollup_compacted_plant_day_start
+                ON plants_dailyrollup (
+                    plant_id,
+                    (day::timestamp AT TIME ZONE 'UTC') DESC,
+                    id DESC
+                )
+                WHERE is_compacted;
+            """,
+            reverse_sql="""
+                DROP INDEX CONCURRENTLY IF EXISTS
+                dailyrollup_compacted_plant_day_start;
+            """,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0011_dailyrollup_compacted_plant_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='hours',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # The hours of the rollups compacted so far are unknown, they are
+        # considered covered so re-written data is never counted twice.
+        # Other rollups are recomputed before they are compacted.
+        migrations.RunSQL(
+            sql="""
+                UPDATE plants_dailyrollup
+                SET hours = (1 << 24) - 1
+                WHERE is_compacted;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
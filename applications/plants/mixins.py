@@ -1,3 +1,10 @@
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from core.renderers import FastJSONRenderer
+from core.replica import read_from, replica_for
+
+
 class SerializerActionClassMixin(object):
     def get_serializer_class(self):
         """
@@ -21,3 +28,36 @@ class SerializerActionClassMixin(object):
             return self.serializer_action_classes[self.action]
         except (KeyError, AttributeError):
             return super().get_serializer_class()
+
+
+class ReplicaReadMixin(object):
+    # Set by views whose every request only reads, like queries sent
+    # with POST.
+    read_only = False
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Serve the reads of safe requests from the replica database,
+        unless it lags or the client asked to read its own writes.
+        See `core.replica`.
+        """
+        if self.read_only:
+            request.read_only = True
+        with read_from(replica_for(request)):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ValuesListMixin(object):
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the `.values()` rows of the queryset as they are, without
+        going through the serializer: the rows already hold the fields of
+        the serializer, with values the renderer encodes the same way.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(list(queryset))
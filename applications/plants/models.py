@@ -1,13 +1,24 @@
 import uuid
+from datetime import timedelta, timezone
 
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from applications.plants.manager import PlantDataPointManager, PlantManager
+from applications.plants.identifiers import uuid7
+from applications.plants.manager import (
+    MEASUREMENT_FIELDS,
+    BackfillManager,
+    DailyRollupManager,
+    PlantDataPointManager,
+    PlantManager,
+    ReportSourceManager,
+)
+from applications.plants.report_cache import invalidate_reports
 
 
 class Plant(models.Model):
-    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    id = models.UUIDField(default=uuid7, editable=False, primary_key=True)
     # NOTE: I am making the assumption that
     # 'plant-id' from monitoring service is
     # a unique identifier and mapping it with field name.
@@ -15,6 +26,11 @@ class Plant(models.Model):
         max_length=256, blank=False, null=False, editable=True, unique=True
     )
     is_archived = models.BooleanField(default=False)
+    # Datetime of the latest data point stored by the ingestion.
+    # Periodic fetching resumes from this point.
+    last_ingested_at = models.DateTimeField(
+        blank=True, null=True, editable=False
+    )
 
     objects = PlantManager()
 
@@ -25,6 +41,16 @@ class Plant(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Reports list the plants by name, and archived ones on demand.
+        super().save(*args, **kwargs)
+        invalidate_reports()
+
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        invalidate_reports()
+        return deleted
+
     def archive(self):
         """
         Archives the Plant entry instead of deleting it.
@@ -34,26 +60,20 @@ class Plant(models.Model):
 
 
 class DataPoint(models.Model):
-    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    id = models.UUIDField(default=uuid7, editable=False, primary_key=True)
     plant = models.ForeignKey(
         "Plant",
         on_delete=models.CASCADE,
         related_name="datapoints",
         blank=False,
         null=False,
+        # Covered by the (plant, datetime) unique index.
+        db_index=False,
     )
-    energy_expected = models.DecimalField(
-        max_digits=15, decimal_places=10, blank=False, null=False
-    )
-    energy_observed = models.DecimalField(
-        max_digits=15, decimal_places=10, blank=False, null=False
-    )
-    irradiation_expected = models.DecimalField(
-        max_digits=15, decimal_places=10, blank=False, null=False
-    )
-    irradiation_observed = models.DecimalField(
-        max_digits=15, decimal_places=10, blank=False, null=False
-    )
+    energy_expected = models.FloatField(blank=False, null=False)
+    energy_observed = models.FloatField(blank=False, null=False)
+    irradiation_expected = models.FloatField(blank=False, null=False)
+    irradiation_observed = models.FloatField(blank=False, null=False)
     datetime = models.DateTimeField(blank=False, null=False)
 
     objects = PlantDataPointManager()
@@ -61,6 +81,223 @@ class DataPoint(models.Model):
     class Meta:
         verbose_name = _("Data Point")
         verbose_name_plural = _("Data Points")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["plant", "datetime"],
+                include=MEASUREMENT_FIELDS,
+                name="unique_datapoint_plant_datetime",
+            )
+        ]
+        indexes = [
+            BrinIndex(
+                fields=["datetime"],
+                autosummarize=True,
+                name="datapoint_datetime_brin",
+            )
+        ]
 
     def __str__(self):
         return f"Data point of plant {self.plant.name}"
+
+    def save(self, *args, **kwargs):
+        """
+        Keep the rollup of the day of the data point up to date.
+        Ingestion writes through `DataPoint.objects.upsert` instead.
+        """
+        super().save(*args, **kwargs)
+        DailyRollup.objects.refresh(
+            [(self.plant_id, self.datetime.astimezone(timezone.utc).date())]
+        )
+
+    def delete(self, *args, **kwargs):
+        plant_day = (
+            self.plant_id,
+            self.datetime.astimezone(timezone.utc).date(),
+        )
+        deleted = super().delete(*args, **kwargs)
+        DailyRollup.objects.refresh([plant_day])
+        return deleted
+
+
+class DailyRollup(models.Model):
+    """
+    Aggregates of the data points of a plant over a UTC day.
+
+    Rollups are refreshed by every upsert of data points, so reports
+    read one row per plant and day instead of every data point. Once
+    the data points of its day are deleted by the retention, a rollup
+    is compacted and no longer refreshed, only data points of the hours
+    it does not cover yet are merged into it.
+    """
+
+    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    plant = models.ForeignKey(
+        "Plant", on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    day = models.DateField(blank=False, null=False)
+    is_compacted = models.BooleanField(default=False)
+    # Bitmap of the UTC hours of the day with data points.
+    hours = models.PositiveIntegerField(default=0)
+    datapoints = models.PositiveIntegerField(blank=False, null=False)
+    energy_expected_sum = models.FloatField(blank=False, null=False)
+    energy_expected_min = models.FloatField(blank=False, null=False)
+    energy_expected_max = models.FloatField(blank=False, null=False)
+    energy_observed_sum = models.FloatField(blank=False, null=False)
+    energy_observed_min = models.FloatField(blank=False, null=False)
+    energy_observed_max = models.FloatField(blank=False, null=False)
+    irradiation_expected_sum = models.FloatField(blank=False, null=False)
+    irradiation_expected_min = models.FloatField(blank=False, null=False)
+    irradiation_expected_max = models.FloatField(blank=False, null=False)
+    irradiation_observed_sum = models.FloatField(blank=False, null=False)
+    irradiation_observed_min = models.FloatField(blank=False, null=False)
+    irradiation_observed_max = models.FloatField(blank=False, null=False)
+
+    objects = DailyRollupManager()
+
+    class Meta:
+        verbose_name = _("Daily Rollup")
+        verbose_name_plural = _("Daily Rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["plant", "day"], name="unique_dailyrollup_plant_day"
+            )
+        ]
+
+    def __str__(self):
+        return f"Rollup of plant {self.plant.name} on {self.day}"
+
+
+class ReportSource(models.Model):
+    """
+    Database view of the daily rollups and the data points, with the
+    measurement sums and counts of each row.
+
+    Rollups start at the beginning of their day and count their data
+    points, data points count as one. See
+    `ReportSourceQuerySet.filter_datetime_range`.
+    """
+
+    id = models.UUIDField(primary_key=True)
+    plant = models.ForeignKey(
+        "Plant", on_delete=models.DO_NOTHING, related_name="+"
+    )
+    datetime = models.DateTimeField()
+    is_rollup = models.BooleanField()
+    datapoints = models.PositiveIntegerField()
+    energy_expected = models.FloatField()
+    energy_observed = models.FloatField()
+    irradiation_expected = models.FloatField()
+    irradiation_observed = models.FloatField()
+    is_compacted = models.BooleanField()
+
+    objects = ReportSourceManager()
+
+    class Meta:
+        managed = False
+        db_table = "plants_reportsource"
+
+
+class Backfill(models.Model):
+    """
+    Historical ingestion of a set of plants over a date range.
+
+    The range is split in chunks per plant which are fetched in parallel
+    and checkpointed individually, so an interrupted backfill resumes
+    from the chunks that are not completed yet.
+    """
+
+    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    plants = models.ManyToManyField("Plant", related_name="backfills")
+    from_date = models.DateField(blank=False, null=False)
+    to_date = models.DateField(blank=False, null=False)
+    chunk_days = models.PositiveIntegerField(blank=False, null=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = BackfillManager()
+
+    class Meta:
+        verbose_name = _("Backfill")
+        verbose_name_plural = _("Backfills")
+
+    def __str__(self):
+        return f"Backfill from {self.from_date} to {self.to_date}"
+
+    def create_chunks(self):
+        """
+        Split the date range of every plant into chunks of `chunk_days`.
+        Chunks that already exist are left untouched.
+        """
+        chunks = [
+            BackfillChunk(
+                backfill=self,
+                plant=plant,
+                from_date=from_date,
+                to_date=to_date,
+            )
+            for plant in self.plants.all()
+            for from_date, to_date in split_date_range(
+                self.from_date, self.to_date, self.chunk_days
+            )
+        ]
+        BackfillChunk.objects.bulk_create(chunks, ignore_conflicts=True)
+
+
+class BackfillChunk(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        COMPLETED = "completed", _("Completed")
+        FAILED = "failed", _("Failed")
+
+    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    backfill = models.ForeignKey(
+        "Backfill",
+        on_delete=models.CASCADE,
+        related_name="chunks",
+        blank=False,
+        null=False,
+    )
+    plant = models.ForeignKey(
+        "Plant",
+        on_delete=models.CASCADE,
+        related_name="backfill_chunks",
+        blank=False,
+        null=False,
+    )
+    from_date = models.DateField(blank=False, null=False)
+    to_date = models.DateField(blank=False, null=False)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Backfill Chunk")
+        verbose_name_plural = _("Backfill Chunks")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["backfill", "plant", "from_date"],
+                name="unique_backfill_chunk",
+            )
+        ]
+
+    def __str__(self):
+        return f"Backfill chunk {self.from_date} - {self.to_date}"
+
+
+def split_date_range(from_date, to_date, chunk_days: int):
+    """
+    Split a date range in consecutive (from, to) windows of `chunk_days`.
+
+    Consecutive windows share their boundary date, so no day is missed
+    whether the monitoring service treats `to` as inclusive or not.
+    """
+    windows = []
+    start = from_date
+    while True:
+        end = min(start + timedelta(days=chunk_days), to_date)
+        windows.append((start, end))
+        if end >= to_date:
+            return windows
+        start = end
@@ -0,0 +1,238 @@
+import codecs
+import json
+import math
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from django.conf import settings
+
+from applications.plants.client import get_client
+
+
+def make_request(url: str):
+    with get_client().get(url) as response:
+        return response.json()
+
+
+def stream_request(url: str) -> Iterator[Any]:
+    """
+    Yield the entries of a monitoring service response while it is
+    being downloaded, so memory does not grow with the response size.
+    """
+    with get_client().get(url, stream=True) as response:
+        yield from iter_json_array(
+            response.iter_content(
+                chunk_size=settings.MONITORING_STREAM_CHUNK_SIZE
+            )
+        )
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Incrementally decode the elements of a JSON array from chunks of
+    UTF-8 encoded bytes.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    array_decoder = JSONArrayDecoder()
+    for chunk in chunks:
+        yield from array_decoder.feed(text_decoder.decode(chunk))
+    yield from array_decoder.feed(text_decoder.decode(b"", final=True), True)
+
+
+class JSONArrayDecoder:
+    """
+    Decoder of the elements of a JSON array received in pieces.
+
+    Only the element currently being decoded is buffered, every complete
+    element is returned as soon as its last character has been fed.
+    """
+
+    WHITESPACE = re.compile(r"[ \t\n\r]*")
+    ELEMENT_END = frozenset(",] \t\n\r")
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.opened = False
+        self.closed = False
+        self.expect_element = True
+
+    def feed(self, text: str, final: bool = False) -> List[Any]:
+        self.buffer += text
+        elements = []
+        position = 0
+        while not self.closed:
+            position = self.WHITESPACE.match(self.buffer, position).end()
+            if position == len(self.buffer):
+                break
+
+            char = self.buffer[position]
+            if not self.opened:
+                if char != "[":
+                    raise ValueError("Expected a JSON array.")
+                self.opened = True
+                position += 1
+            elif char == "]":
+                self.closed = True
+            elif char == "," and not self.expect_element:
+                self.expect_element = True
+                position += 1
+            elif not self.expect_element:
+                raise ValueError(f"Unexpected {char!r} in JSON array.")
+            else:
+                decoded = self._decode_element(position, final)
+                if decoded is None:
+                    # The element continues in the next piece.
+                    break
+                element, position = decoded
+                elements.append(element)
+                self.expect_element = False
+
+        self.buffer = self.buffer[position:]
+        if final and not self.closed:
+            raise ValueError("Unterminated JSON array.")
+        return elements
+
+    def _decode_element(self, position: int, final: bool):
+        try:
+            element, end = self.decoder.raw_decode(self.buffer, position)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None
+        # A number is only complete once a delimiter follows it.
+        if not final and (
+            end == len(self.buffer) or self.buffer[end] not in self.ELEMENT_END
+        ):
+            return None
+        return element, end
+
+
+class DataPointRecord(NamedTuple):
+    """
+    A decoded monitoring service entry, ready to be upserted.
+    """
+
+    plant_id: Any
+    datetime: datetime
+    energy_expected: float
+    energy_observed: float
+    irradiation_expected: float
+    irradiation_observed: float
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse an ISO 8601 datetime of the monitoring service as UTC.
+    Naive values are UTC. Every plant reports the same hours, so
+    parsed values are cached.
+    """
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def parse_measurement(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TypeError(f"{value!r} is not a number.")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number.")
+    return number
+
+
+def decode_entries(
+    plant_id, entries: Iterable[dict], since: Optional[datetime] = None
+) -> Iterator[DataPointRecord]:
+    """
+    Validate and decode the entries of a monitoring service response in
+    a single pass, one entry at a time so streamed responses are never
+    held in memory as a whole.
+
+    Invalid entries are reported and skipped. Entries at or before
+    `since` are skipped as well, the service only accepts dates so the
+    hours of the first day that are already stored are dropped here.
+    """
+    for entry in entries:
+        try:
+            expected = entry["expected"]
+            observed = entry["observed"]
+            record = DataPointRecord(
+                plant_id,
+                parse_timestamp(entry["datetime"]),
+                parse_measurement(expected["energy"]),
+                parse_measurement(observed["energy"]),
+                parse_measurement(expected["irradiation"]),
+                parse_measurement(observed["irradiation"]),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            print("Invalid data:", entry, repr(e))
+            continue
+
+        if since is not None and record.datetime <= since:
+            continue
+        yield record
+
+
+def fetch_concurrently(
+    fetch: Callable[[str], Any],
+    requests_by_key: Iterable[Tuple[Hashable, str]],
+    max_workers: Optional[int] = None,
+    catch: Tuple[Type[BaseException], ...] = (),
+) -> Iterator[Tuple[Hashable, Any]]:
+    """
+    Run `fetch` for every (key, url) pair on a bounded thread pool and
+    yield (key, result) pairs in completion order.
+
+    Only the network calls happen in the pool, the caller consumes the
+    results in its own thread so database access stays single threaded.
+    At most twice as many requests as workers are submitted at once,
+    topped up as results are consumed, so a slow consumer never holds
+    the responses of every plant in memory.
+
+    Exceptions of the `catch` types are yielded as the result of their
+    key. Any other failing fetch is re-raised and the requests that have
+    not started yet are cancelled.
+    """
+    max_workers = max_workers or settings.MONITORING_FETCH_CONCURRENCY
+    pending_requests = iter(requests_by_key)
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="monitoring-fetch"
+    )
+    try:
+        futures = {}
+
+        def submit(count: int):
+            for key, url in islice(pending_requests, count):
+                futures[executor.submit(fetch, url)] = key
+
+        submit(max_workers * 2)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures.pop(future)
+                try:
+                    result = future.result()
+                except catch as e:
+                    result = e
+                yield key, result
+                submit(1)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
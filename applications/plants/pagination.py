@@ -1,4 +1,13 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class PageNumberPagination(PageNumberPagination):
@@ -11,3 +20,89 @@ class PageNumberPagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class DataPointCursorPagination(BasePagination):
+    """
+    Keyset pagination of data points, newest first, on (datetime, id).
+
+    Each page starts right after the last data point of the previous one,
+    given by an opaque cursor (e.x. ?cursor=...), so deep pages cost the
+    same as the first one: there is no COUNT(*) and no OFFSET. Supports
+    the same `page_size` query parameter as `PageNumberPagination`.
+    """
+
+    page_size = PageNumberPagination.page_size
+    page_size_query_param = PageNumberPagination.page_size_query_param
+    max_page_size = PageNumberPagination.max_page_size
+    cursor_query_param = "cursor"
+    ordering = ("-datetime", "-id")
+    invalid_cursor_message = "Invalid cursor."
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, data_point: dict) -> str:
+        position = f"{data_point['datetime'].isoformat()}|{data_point['id']}"
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            position = base64.urlsafe_b64decode(cursor.encode()).decode()
+            datetime, pk = position.split("|")
+            datetime, pk = parse_datetime(datetime), uuid.UUID(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError) as err:
+            raise NotFound(self.invalid_cursor_message) from err
+        if datetime is None:
+            raise NotFound(self.invalid_cursor_message)
+        return datetime, pk
+
+    def after(self, datetime, pk) -> Q:
+        """
+        Data points following the (datetime, pk) position of a cursor.
+        """
+        # The inclusive bound on datetime alone lets the (plant, datetime)
+        # index seek to the cursor.
+        return Q(datetime__lte=datetime) & (
+            Q(datetime__lt=datetime) | Q(id__lt=pk)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        if cursor := request.query_params.get(self.cursor_query_param):
+            queryset = queryset.filter(self.after(*self.decode_cursor(cursor)))
+        # One more data point tells whether there is a next page.
+        results = list(queryset[: page_size + 1])
+        self.page = results[:page_size]
+        self.has_next = len(results) > page_size
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,154 @@
+import re
+from datetime import date, datetime, timezone
+from typing import Iterable, Iterator, List, NamedTuple
+
+from django.db import connection, transaction
+
+PARENT_TABLE = "plants_datapoint"
+PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(value) -> date:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def as_utc(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class Partition(NamedTuple):
+    """
+    A monthly partition of the data points table, holding the data
+    points from the first day of `month` until the next month.
+    """
+
+    month: date
+
+    @property
+    def name(self) -> str:
+        return f"{PARENT_TABLE}_y{self.month.year:04}m{self.month.month:02}"
+
+    @property
+    def end(self) -> date:
+        return add_months(self.month, 1)
+
+
+def list_partitions() -> List[Partition]:
+    """
+    Monthly partitions attached to the data points table, oldest first.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            [PARENT_TABLE],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        if match := PARTITION_NAME.match(name):
+            year, month = match.groups()
+            partitions.append(Partition(date(int(year), int(month), 1)))
+    return sorted(partitions)
+
+
+def months_between(start: date, end: date) -> Iterator[date]:
+    """
+    First day of every month from the month of `start` to the month of
+    `end`, both included.
+    """
+    month, last = month_start(start), month_start(end)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def create_partitions(months: Iterable[date]) -> List[Partition]:
+    """
+    Create the missing partitions of the given months and return them.
+
+    Creating a partition locks the data points table until commit, for
+    readers of every partition too, so each partition is created in its
+    own short transaction: call it before opening the transaction that
+    writes the data points. Months that already have a partition run no
+    DDL.
+    """
+    missing = sorted({Partition(month_start(month)) for month in months})
+    if not missing:
+        return []
+    existing = set(list_partitions())
+    missing = [partition for partition in missing if partition not in existing]
+    for partition in missing:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {partition.name}
+                PARTITION OF {PARENT_TABLE}
+                FOR VALUES FROM (%s) TO (%s)
+                """,
+                [as_utc(partition.month), as_utc(partition.end)],
+            )
+    return missing
+
+
+def ensure_partitions(datetimes: Iterable[datetime]) -> List[Partition]:
+    """
+    Create the partitions needed to store data points at `datetimes`,
+    e.g. before backfilling months that were never pre-created.
+    """
+    return create_partitions({month_start(value) for value in datetimes})
+
+
+def create_future_partitions(today: date, ahead: int) -> List[Partition]:
+    """
+    Create the partitions of the current month and the `ahead` months
+    after it.
+    """
+    current = month_start(today)
+    return create_partitions(
+        add_months(current, months) for months in range(ahead + 1)
+    )
+
+
+def remove_expired_partitions(
+    today: date, retention_months: int, drop: bool = False
+) -> List[Partition]:
+    """
+    Detach the partitions whose whole month is older than the retention,
+    and drop them as well when `drop` is set.
+
+    Detached partitions are left as standalone tables, so they can be
+    archived before being dropped by hand.
+    """
+    oldest_kept = add_months(month_start(today), -retention_months)
+    expired = [
+        partition
+        for partition in list_partitions()
+        if partition.end <= oldest_kept
+    ]
+    # Concurrent detaching does not block queries on the data points
+    # table, but cannot run inside a transaction.
+    concurrently = "" if connection.in_atomic_block else "CONCURRENTLY"
+    with connection.cursor() as cursor:
+        for partition in expired:
+            cursor.execute(
+                f"""
+                ALTER TABLE {PARENT_TABLE}
+                DETACH PARTITION {partition.name} {concurrently}
+                """
+            )
+            if drop:
+                cursor.execute(f"DROP TABLE {partition.name}")
+    return expired
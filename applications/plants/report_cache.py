@@ -0,0 +1,182 @@
+import hashlib
+import json
+import time
+from datetime import date
+from functools import partial
+from typing import Callable, Iterable, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from core.replica import read_from
+
+# Member of the changed days standing for every day.
+EVERY_DAY = "*"
+LOCK_POLL_INTERVAL = 0.05
+
+
+class ReportCache:
+    """
+    Reports cached in Redis until data of the UTC days they cover
+    changes, or REPORT_CACHE_TIMEOUT seconds.
+
+    Every data change increments a version and records it as the latest
+    change of the days it touched. A cached report keeps the version it
+    was computed at and is stale once one of its days changed after it,
+    so ingesting today's data leaves the reports of past ranges cached.
+
+    Keys:
+    - `<prefix>:version` counter of the data changes.
+    - `<prefix>:changed_days` sorted set of ISO days by the version of
+      their latest change.
+    - `<prefix>:entry:<key>` report and the version it was computed at.
+    - `<prefix>:lock:<key>` held while the report is computed.
+    """
+
+    def __init__(self, connection=None, prefix: Optional[str] = None):
+        self.redis = connection or get_redis_connection("default")
+        self.prefix = prefix or settings.REPORT_CACHE_KEY_PREFIX
+        self.version_key = f"{self.prefix}:version"
+        self.changed_days_key = f"{self.prefix}:changed_days"
+
+    def key(self, kind: str, params: dict) -> str:
+        digest = hashlib.sha256(
+            json.dumps(params, sort_keys=True).encode()
+        ).hexdigest()
+        return f"{self.prefix}:{kind}:{digest}"
+
+    def invalidate(self, days: Optional[Iterable[date]] = None):
+        """
+        Mark the UTC `days` as changed, or every day when None.
+        """
+        members = (
+            [EVERY_DAY]
+            if days is None
+            else sorted({day.isoformat() for day in days})
+        )
+        if not members:
+            return
+        try:
+            version = self.redis.incr(self.version_key)
+            self.redis.zadd(
+                self.changed_days_key, dict.fromkeys(members, version)
+            )
+        except RedisError as e:
+            print(f"Error invalidating the report cache: {e}")
+
+    def get(
+        self, params: dict, first_day: Optional[str], last_day: Optional[str]
+    ):
+        """
+        Cached report of the `params`, None when it is missing or one of
+        the days between `first_day` and `last_day` (ISO days, unbounded
+        when None) changed since it was computed.
+        """
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.get(self.key("entry", params))
+        pipeline.get(self.version_key)
+        entry, version = pipeline.execute()
+        if entry is None:
+            return None
+
+        entry, version = json.loads(entry), int(version or 0)
+        if version < entry["version"]:
+            # The counter was reset since.
+            return None
+        if version > entry["version"]:
+            for member in self.redis.zrangebyscore(
+                self.changed_days_key, f"({entry['version']}", "+inf"
+            ):
+                day = member.decode()
+                if day == EVERY_DAY or (
+                    (first_day is None or day >= first_day)
+                    and (last_day is None or day <= last_day)
+                ):
+                    return None
+        return entry["data"]
+
+    def set(self, params: dict, version: int, data):
+        self.redis.set(
+            self.key("entry", params),
+            json.dumps({"version": version, "data": data}),
+            ex=settings.REPORT_CACHE_TIMEOUT,
+        )
+
+    def get_or_compute(
+        self,
+        params: dict,
+        first_day: Optional[str],
+        last_day: Optional[str],
+        compute: Callable,
+    ):
+        """
+        Cached report of the `params`, computed by `compute` on a miss.
+
+        Concurrent misses of the same report compute it once: the request
+        holding the lock computes it while the others wait, up to
+        REPORT_CACHE_LOCK_TIMEOUT seconds, for it to be cached.
+
+        Reports that are cached are computed on the default database. A
+        lagging replica could miss the changes that invalidated them, and
+        the stale report would be cached under the new version.
+        """
+        if not settings.REPORT_CACHE_TIMEOUT:
+            return compute()
+
+        lock_key = self.key("lock", params)
+        lock_timeout = settings.REPORT_CACHE_LOCK_TIMEOUT
+        deadline = time.monotonic() + lock_timeout
+        try:
+            while True:
+                data = self.get(params, first_day, last_day)
+                if data is not None:
+                    return data
+                if self.redis.set(
+                    lock_key, 1, nx=True, px=max(1, int(lock_timeout * 1000))
+                ):
+                    break
+                if time.monotonic() >= deadline:
+                    # The request holding the lock is too slow.
+                    return compute()
+                time.sleep(LOCK_POLL_INTERVAL)
+            # Read before computing, so changes committed meanwhile make
+            # the report stale.
+            version = int(self.redis.get(self.version_key) or 0)
+        except RedisError as e:
+            print(f"Error reading the report cache: {e}")
+            return compute()
+
+        try:
+            with read_from(None):
+                data = compute()
+            self.set(params, version, data)
+        except RedisError as e:
+            print(f"Error caching the report: {e}")
+        finally:
+            try:
+                self.redis.delete(lock_key)
+            except RedisError as e:
+                print(f"Error releasing the report cache lock: {e}")
+        return data
+
+    def clear(self):
+        keys = list(self.redis.scan_iter(f"{self.prefix}:*"))
+        if keys:
+            self.redis.delete(*keys)
+
+
+def invalidate_reports(
+    days: Optional[Iterable[date]] = None, using: str = DEFAULT_DB_ALIAS
+):
+    """
+    Invalidate the cached reports covering the UTC `days` (every report
+    when None) right away, for the reads of the current transaction, and
+    again once it commits, for the reads of everyone else.
+    """
+    if days is not None:
+        days = list(days)
+    cache = ReportCache()
+    cache.invalidate(days)
+    transaction.on_commit(partial(cache.invalidate, days), using=using)
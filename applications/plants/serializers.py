@@ -1,6 +1,14 @@
+import uuid
+
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 
-from .models import Plant
+from .downsampling import MIN_POINTS
+from .exports import CONTENT_TYPES
+from .manager import SERIES_BUCKETS, SERIES_METRICS
+from .models import Backfill, Plant
+from .pagination import DataPointCursorPagination, PageNumberPagination
 
 
 class PlantSerializer(serializers.ModelSerializer):
@@ -45,8 +53,13 @@ class DataPointSerializer(serializers.Serializer):
 class PlantDataPointSerializer(DataPointSerializer):
     """
     Display of plants with datapoints.
+
+    Compacted days are listed as a single data point of their day,
+    holding the sums of its `datapoints`.
     """
 
+    datapoints = serializers.IntegerField()
+
     plant_id = serializers.CharField()
     plant_name = serializers.CharField()
 
@@ -65,7 +78,147 @@ class ReportsSerializer(serializers.Serializer):
     irradiation_efficiency = serializers.FloatField()
 
 
-class MonitoringServiceSerializer(serializers.Serializer):
-    datetime = serializers.DateTimeField()
-    expected = serializers.DictField(child=serializers.FloatField())
-    observed = serializers.DictField(child=serializers.FloatField())
+class BackfillSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Backfill model including its progress.
+    """
+
+    plants = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Plant.objects.filter_active()
+    )
+    chunk_days = serializers.IntegerField(
+        min_value=1,
+        default=settings.MONITORING_BACKFILL_CHUNK_DAYS,
+    )
+    status = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Backfill
+        fields = [
+            "id",
+            "plants",
+            "from_date",
+            "to_date",
+            "chunk_days",
+            "created_at",
+            "status",
+            "progress",
+        ]
+
+        read_only_fields = [
+            "id",
+            "created_at",
+        ]
+
+    def validate(self, attrs):
+        if attrs["from_date"] > attrs["to_date"]:
+            raise serializers.ValidationError(
+                "from_date should not be after to_date."
+            )
+        return attrs
+
+    def get_progress(self, obj):
+        total = getattr(obj, "chunks_total", 0)
+        completed = getattr(obj, "chunks_completed", 0)
+        failed = getattr(obj, "chunks_failed", 0)
+        return {
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "pending": total - completed - failed,
+        }
+
+    def get_status(self, obj):
+        progress = self.get_progress(obj)
+        if not progress["total"]:
+            return "pending"
+        if progress["pending"]:
+            return "running"
+        if progress["failed"]:
+            return "failed"
+        return "completed"
+
+
+class DatetimeRangeSerializer(serializers.Serializer):
+    start_datetime = serializers.DateTimeField(required=False)
+    end_datetime = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        start, end = attrs.get("start_datetime"), attrs.get("end_datetime")
+        if start and end and start > end:
+            raise serializers.ValidationError(
+                "start_datetime should not be after end_datetime."
+            )
+        return attrs
+
+
+class DataPointExportSerializer(DatetimeRangeSerializer):
+    """
+    Query parameters of a data point export. Every plant is exported
+    when no `plants` are given.
+    """
+
+    plants = serializers.ListField(
+        child=serializers.UUIDField(), required=False
+    )
+    file_format = serializers.ChoiceField(
+        choices=list(CONTENT_TYPES), default="ndjson"
+    )
+
+
+class SeriesSerializer(DatetimeRangeSerializer):
+    """
+    Query parameters of the series of a plant. The series is downsampled
+    to `points` buckets, preserving the shape of its `metric`, when given.
+    """
+
+    bucket = serializers.ChoiceField(choices=SERIES_BUCKETS, default="day")
+    points = serializers.IntegerField(min_value=MIN_POINTS, required=False)
+    metric = serializers.ChoiceField(
+        choices=SERIES_METRICS, default="energy_observed_sum"
+    )
+
+
+class DataPointBatchSerializer(DatetimeRangeSerializer):
+    """
+    Query of the latest data points of several plants, at most `limit`
+    per plant. `cursors` map plants to the `next` cursor of a previous
+    response, to continue them. Plants requested more than once are
+    returned once, in the order of their first occurrence.
+    """
+
+    plants = serializers.ListField(
+        child=serializers.UUIDField(),
+        min_length=1,
+        max_length=settings.DATAPOINT_BATCH_MAX_PLANTS,
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=PageNumberPagination.max_page_size,
+        default=PageNumberPagination.page_size,
+    )
+    cursors = serializers.DictField(
+        child=serializers.CharField(), required=False, default=dict
+    )
+
+    def validate_plants(self, value):
+        return list(dict.fromkeys(value))
+
+    def validate_cursors(self, value):
+        pagination = DataPointCursorPagination()
+        try:
+            return {
+                uuid.UUID(plant_id): pagination.decode_cursor(cursor)
+                for plant_id, cursor in value.items()
+            }
+        except (ValueError, NotFound) as err:
+            raise serializers.ValidationError("Invalid cursor.") from err
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if not set(attrs["cursors"]) <= set(attrs["plants"]):
+            raise serializers.ValidationError(
+                "cursors should only continue the requested plants."
+            )
+        return attrs
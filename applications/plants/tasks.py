@@ -1,13 +1,35 @@
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
 
 import requests
-from celery import shared_task
+from celery import chord, group, shared_task
 from django.conf import settings
-from django.utils.dateparse import parse_datetime
+from django.db import transaction
 
-from applications.plants.models import DataPoint, Plant
-from applications.plants.serializers import MonitoringServiceSerializer
+from applications.plants.ledger import FailureLedger
+from applications.plants.models import (
+    Backfill,
+    BackfillChunk,
+    DailyRollup,
+    DataPoint,
+    Plant,
+)
+from applications.plants.monitoring import (
+    DataPointRecord,
+    decode_entries,
+    fetch_concurrently,
+    make_request,
+    stream_request,
+)
+from applications.plants.partitions import (
+    create_future_partitions,
+    create_partitions,
+    ensure_partitions,
+    months_between,
+    remove_expired_partitions,
+)
+from applications.plants.report_cache import invalidate_reports
 
 MONITORING_API_URL_TEMPLATE = (
     settings.INTERNAL_MONITORING_API_URL
@@ -44,68 +66,146 @@ def execute_fetching_in_background(plant_names: List):
     return result.id
 
 
-def make_request(url: str):
-    response = requests.get(url, timeout=10)
-    response.raise_for_status()
+def build_monitoring_url(plant_name: str, from_date, to_date) -> str:
+    """
+    Url of the monitoring service data of a plant between two dates.
+    """
+    return MONITORING_API_URL_TEMPLATE.format(
+        plant_id=plant_name,
+        from_date=from_date.strftime("%Y-%m-%d"),
+        to_date=to_date.strftime("%Y-%m-%d"),
+    )
 
-    return response.json()
 
+def get_fetch_start(plant: Plant, now: datetime) -> datetime:
+    """
+    Start of the window to request for a plant.
 
-def bulk_update_or_create(
-    datetime_plant_mapping: dict, existing_mapping: dict, plant: Plant
-):
-    new_data_points = []
-    updated_data_points = []
+    Plants that were ingested before resume from their watermark, so
+    a skipped run is caught up by the next one. Plants that were never
+    ingested look back `MONITORING_INITIAL_LOOKBACK_DAYS` days.
+    """
+    if plant.last_ingested_at:
+        return plant.last_ingested_at
+    return now - timedelta(days=settings.MONITORING_INITIAL_LOOKBACK_DAYS)
 
-    for timestamp, entry in datetime_plant_mapping.items():
-        existing = existing_mapping.get(timestamp)
 
-        expected = entry.get("expected", {})
-        observed = entry.get("observed", {})
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
-        if existing:
-            # NOTE: Existing data might be the same so we probably
-            # should skip the update action (currently not handled)
 
-            # Update existing data point
-            existing.energy_expected = expected.get("energy")
-            existing.energy_observed = observed.get("energy")
-            existing.irradiation_expected = expected.get("irradiation")
-            existing.irradiation_observed = observed.get("irradiation")
-            updated_data_points.append(existing)
-        else:
-            # Create new data point
-            new_data_points.append(
-                DataPoint(
-                    plant=plant,
-                    datetime=timestamp,
-                    energy_expected=expected.get("energy"),
-                    energy_observed=observed.get("energy"),
-                    irradiation_expected=expected.get("irradiation"),
-                    irradiation_observed=observed.get("irradiation"),
-                )
-            )
+def new_ingestion_summary():
+    """
+    Counters reported by an ingestion run. `datapoints` is the number
+    of data points received, which are either created, updated or left
+    unchanged because their measurements did not change. `failed` is
+    the number of plants recorded in the failure ledger.
+    """
+    return {
+        "plants": 0,
+        "datapoints": 0,
+        "created": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "failed": 0,
+    }
+
+
+def add_counters(summary: dict, counters: dict):
+    for key, value in counters.items():
+        summary[key] += value
+
+
+def store_data_points(data_points: List[DataPointRecord], now: datetime):
+    """
+    Upsert data point records of any number of plants with a single statement
+    and advance the ingestion watermark of their plants, in a single
+    transaction.
+    """
+    # A single statement cannot upsert the same row twice,
+    # the last data point of a plant and datetime wins.
+    data_points = list(
+        {
+            (data_point.plant_id, data_point.datetime): data_point
+            for data_point in data_points
+        }.values()
+    )
+    watermarks = {}
+    for data_point in data_points:
+        # Data ahead of now is still subject to change,
+        # so the watermark never moves past it.
+        watermark = min(data_point.datetime, now)
+        current = watermarks.get(data_point.plant_id)
+        if current is None or watermark > current:
+            watermarks[data_point.plant_id] = watermark
+
+    # Partitions are created before the upsert transaction, so the lock
+    # on the data points table is not held while it runs.
+    ensure_partitions(data_point.datetime for data_point in data_points)
+    with transaction.atomic():
+        counters = DataPoint.objects.upsert(data_points)
+        Plant.objects.advance_ingestion_watermarks(watermarks)
+    return counters
+
+
+def ingest_plants(windows: dict, now: datetime, ledger: FailureLedger):
+    """
+    Fetch the data of each plant over its (from_date, to_date) window
+    and upsert the responses in batches spanning several plants.
+
+    Plants whose request fails are recorded in the failure ledger to be
+    retried on their own, plants that were fetched are resolved.
+    """
+    urls = (
+        (plant, build_monitoring_url(plant.name, from_date, to_date))
+        for plant, (from_date, to_date) in windows.items()
+    )
 
-    if new_data_points:
-        DataPoint.objects.bulk_create(new_data_points)
-
-    if updated_data_points:
-        DataPoint.objects.bulk_update(
-            updated_data_points,
-            [
-                "energy_expected",
-                "energy_observed",
-                "irradiation_expected",
-                "irradiation_observed",
-            ],
+    summary = new_ingestion_summary()
+    data_points = []
+    fetched = []
+
+    for plant, data in fetch_concurrently(
+        make_request, urls, catch=(requests.exceptions.RequestException,)
+    ):
+        if isinstance(data, requests.exceptions.RequestException):
+            print(f"Error fetching data of plant {plant.name}: {data}")
+            ledger.record(plant, *windows[plant], data, now)
+            summary["failed"] += 1
+            continue
+
+        fetched.append(plant.pk)
+        plant_data_points = list(
+            decode_entries(plant.pk, data, since=plant.last_ingested_at)
         )
+        if not plant_data_points:
+            continue
 
+        data_points.extend(plant_data_points)
+        summary["plants"] += 1
+        summary["datapoints"] += len(plant_data_points)
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def fetch_monitoring_data(self, plant_names: Optional[List[str]] = None):
+        if len(data_points) >= settings.MONITORING_UPSERT_BATCH_SIZE:
+            add_counters(summary, store_data_points(data_points, now))
+            data_points = []
+
+    if data_points:
+        add_counters(summary, store_data_points(data_points, now))
+    ledger.resolve(fetched)
+
+    return summary
+
+
+@shared_task
+def fetch_monitoring_data(plant_names: Optional[List[str]] = None):
     """
     Background task to fetch monitoring data from the
     monitoring service and store it.
+
+    A failed request does not retry the task, the plant is recorded in
+    the failure ledger and retried by `retry_failed_ingestions`.
     """
     try:
         if plant_names:
@@ -114,54 +214,249 @@ def fetch_monitoring_data(self, plant_names: Optional[List[str]] = None):
             plants = Plant.objects.filter_active()
         if not plants:
             print("No active plants found!")
-            return
+            return new_ingestion_summary()
 
         now = datetime.now(timezone.utc)
-        from_date = now - timedelta(days=1)
-        to_date = now
-
-        from_date_str = from_date.strftime("%Y-%m-%d")
-        to_date_str = to_date.strftime("%Y-%m-%d")
-
-        # Fetch data for each plant
-        for plant in plants:
-            url = MONITORING_API_URL_TEMPLATE.format(
-                plant_id=plant.name,
-                from_date=from_date_str,
-                to_date=to_date_str,
-            )
-
-            data = make_request(url)
-
-            serializer = MonitoringServiceSerializer(data=data, many=True)
-            if serializer.is_valid():
-                datetime_plant_mapping = serializer.validated_data
-            else:
-                print("Invalid data:", serializer.errors)
-
-            datetime_plant_mapping = {}
-            for entry in data:
-                datetime_str = entry.get("datetime")
-                expected = entry.get("expected", {})
-                observed = entry.get("observed", {})
-                if datetime_str and expected and observed:
-                    timestamp = parse_datetime(datetime_str)
-                    datetime_plant_mapping[
-                        timestamp.replace(tzinfo=timezone.utc)
-                    ] = entry
-
-            existing_data_points = DataPoint.objects.select_related(
-                "plant"
-            ).filter(datetime__in=datetime_plant_mapping.keys(), plant=plant)
-
-            existing_mapping = {dp.datetime: dp for dp in existing_data_points}
-
-            bulk_update_or_create(
-                datetime_plant_mapping, existing_mapping, plant
-            )
+        windows = {
+            plant: (get_fetch_start(plant, now), now) for plant in plants
+        }
+        return ingest_plants(windows, now, FailureLedger())
 
-    except requests.exceptions.RequestException as e:
-        raise self.retry(exc=e) from e
     except Exception as e:
         print(f"Error fetching data: {e}")
         raise Exception from e
+
+
+@shared_task
+def retry_failed_ingestions():
+    """
+    Fetch again the plants of the failure ledger whose backoff elapsed,
+    over the window recorded when they failed.
+    """
+    ledger = FailureLedger()
+    now = datetime.now(timezone.utc)
+    entries = ledger.due(now)
+    if not entries:
+        return new_ingestion_summary()
+
+    plants = {
+        str(plant.pk): plant
+        for plant in Plant.objects.filter_active().filter(
+            pk__in=[entry.plant_id for entry in entries]
+        )
+    }
+    # Plants that were archived since are not retried anymore.
+    ledger.resolve(
+        entry.plant_id for entry in entries if entry.plant_id not in plants
+    )
+
+    windows = {
+        plants[entry.plant_id]: (entry.from_date, entry.to_date)
+        for entry in entries
+        if entry.plant_id in plants
+    }
+    return ingest_plants(windows, now, ledger)
+
+
+@shared_task
+def dispatch_monitoring_data_fetching(batch_size: Optional[int] = None):
+    """
+    Coordinator of the periodic ingestion.
+
+    Splits the active plants into batches and fetches each batch in its
+    own `fetch_monitoring_data` subtask, so the work spreads over every
+    available worker.
+    Per batch results are aggregated by `summarize_monitoring_data`.
+    """
+    batch_size = batch_size or settings.MONITORING_INGESTION_BATCH_SIZE
+    plant_names = list(
+        Plant.objects.filter_active()
+        .order_by("name")
+        .values_list("name", flat=True)
+    )
+    if not plant_names:
+        print("No active plants found!")
+        return None
+
+    batches = [
+        plant_names[index : index + batch_size]
+        for index in range(0, len(plant_names), batch_size)
+    ]
+    result = chord(
+        fetch_monitoring_data.s(plant_names=batch) for batch in batches
+    )(summarize_monitoring_data.s())
+    return result.id
+
+
+@shared_task
+def summarize_monitoring_data(batch_summaries: List[dict]):
+    """
+    Chord callback aggregating the summaries of every ingestion batch.
+    """
+    summary = {"batches": len(batch_summaries), **new_ingestion_summary()}
+    for batch_summary in batch_summaries:
+        add_counters(summary, batch_summary)
+
+    print("Monitoring data ingestion finished:", summary)
+    return summary
+
+
+def execute_backfill_in_background(backfill: Backfill):
+    result = start_backfill.delay(str(backfill.id))
+    return result.id
+
+
+@shared_task
+def start_backfill(backfill_id: str):
+    """
+    Create the chunks of a backfill and fetch every chunk that is not
+    completed yet in its own subtask.
+
+    Running it again for the same backfill resumes it, chunks that were
+    already stored are not fetched again.
+    """
+    backfill = Backfill.objects.filter(pk=backfill_id).first()
+    if backfill is None:
+        print(f"Backfill {backfill_id} not found!")
+        return None
+
+    backfill.create_chunks()
+    chunk_ids = list(
+        backfill.chunks.exclude(status=BackfillChunk.Status.COMPLETED)
+        .order_by("from_date")
+        .values_list("id", flat=True)
+    )
+    if not chunk_ids:
+        return None
+
+    result = group(
+        run_backfill_chunk.s(str(chunk_id)) for chunk_id in chunk_ids
+    ).apply_async()
+    return result.id
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def run_backfill_chunk(self, chunk_id: str):
+    """
+    Fetch and store a single backfill chunk.
+
+    The chunk is marked completed in the same transaction as its data,
+    which is the checkpoint a resumed backfill starts from. Chunks that
+    keep failing after all retries are marked failed so the rest of the
+    backfill can go on.
+    """
+    chunk = (
+        BackfillChunk.objects.select_related("plant")
+        .exclude(status=BackfillChunk.Status.COMPLETED)
+        .filter(pk=chunk_id)
+        .first()
+    )
+    if chunk is None:
+        return 0
+
+    url = build_monitoring_url(
+        chunk.plant.name, chunk.from_date, chunk.to_date
+    )
+    now = datetime.now(timezone.utc)
+    stored = 0
+    try:
+        # The chunk is stored in a single transaction, its partitions are
+        # created before it so the data points table is not locked while
+        # the response is streamed.
+        create_partitions(months_between(chunk.from_date, chunk.to_date))
+        # Chunks may hold months of hourly data, so the response is parsed
+        # while it is downloaded and stored in batches as it goes.
+        data_points = decode_entries(chunk.plant_id, stream_request(url))
+        with transaction.atomic():
+            for batch in batched(
+                data_points, settings.MONITORING_UPSERT_BATCH_SIZE
+            ):
+                store_data_points(batch, now)
+                stored += len(batch)
+
+            chunk.attempts += 1
+            chunk.error = ""
+            chunk.status = BackfillChunk.Status.COMPLETED
+            chunk.save(
+                update_fields=["attempts", "error", "status", "updated_at"]
+            )
+    except Exception as e:
+        # Invalid responses and rejected data points are retried like
+        # failed requests, a chunk is never left pending.
+        chunk.attempts += 1
+        chunk.error = str(e)
+        if self.request.retries >= self.max_retries:
+            chunk.status = BackfillChunk.Status.FAILED
+            chunk.save(
+                update_fields=["attempts", "error", "status", "updated_at"]
+            )
+            return 0
+        chunk.save(update_fields=["attempts", "error", "updated_at"])
+        raise self.retry(exc=e) from e
+
+    return stored
+
+
+@shared_task
+def manage_datapoint_partitions():
+    """
+    Task to pre-create the data point partitions of the coming months,
+    and detach (or drop) the expired ones when a retention is set.
+    """
+    today = datetime.now(tz=timezone.utc).date()
+    summary = {
+        "created": [
+            partition.name
+            for partition in create_future_partitions(
+                today, settings.DATAPOINT_PARTITIONS_AHEAD
+            )
+        ],
+        "removed": [],
+    }
+    if settings.DATAPOINT_RETENTION_MONTHS:
+        summary["removed"] = [
+            partition.name
+            for partition in remove_expired_partitions(
+                today,
+                settings.DATAPOINT_RETENTION_MONTHS,
+                drop=settings.DATAPOINT_DROP_EXPIRED_PARTITIONS,
+            )
+        ]
+
+    print("Data point partitions updated:", summary)
+    return summary
+
+
+@shared_task
+def compact_datapoints(retention_days: Optional[int] = None):
+    """
+    Task to downsample the data points older than the retention to
+    their daily rollups, then delete them in small batches.
+
+    Reports and data point lists keep reading the compacted days from
+    the rollups.
+    """
+    if retention_days is None:
+        retention_days = settings.DATAPOINT_RAW_RETENTION_DAYS
+    if not retention_days:
+        return {"compacted": 0, "deleted": 0}
+
+    before = datetime.now(tz=timezone.utc).date() - timedelta(
+        days=retention_days
+    )
+    # Rollups are compacted before any deletion, a failed run is resumed
+    # by the next one without refreshing them from partial days.
+    with transaction.atomic():
+        compacted = DailyRollup.objects.compact(before)
+    deleted = DataPoint.objects.filter(
+        datetime__lt=datetime.combine(
+            before, datetime.min.time(), tzinfo=timezone.utc
+        )
+    ).delete_in_batches(settings.DATAPOINT_COMPACTION_BATCH_SIZE)
+    if compacted or deleted:
+        # Partial compacted days are read from their rollup from now on.
+        invalidate_reports()
+
+    summary = {"compacted": compacted, "deleted": deleted}
+    print("Data points compacted:", summary)
+    return summary
@@ -0,0 +1,188 @@
+from datetime import date
+from unittest.mock import patch
+
+import requests
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from applications.plants.factories.plant import PlantFactory
+from applications.plants.models import (
+    Backfill,
+    BackfillChunk,
+    DataPoint,
+    split_date_range,
+)
+from applications.plants.tasks import run_backfill_chunk, start_backfill
+from core.celery import app
+
+
+def monitoring_response(url):
+    """
+    Fake monitoring service returning one entry for the first
+    requested date.
+    """
+    from_date = url.split("from=")[1].split("&")[0]
+    return [
+        {
+            "datetime": f"{from_date}T00:00:00",
+            "expected": {"energy": 14.4, "irradiation": 49.7},
+            "observed": {"energy": 15.6, "irradiation": 31.5},
+        }
+    ]
+
+
+class SplitDateRangeTestCase(TestCase):
+    def test_split_date_range(self):
+        self.assertEqual(
+            split_date_range(date(2024, 1, 1), date(2024, 1, 25), 10),
+            [
+                (date(2024, 1, 1), date(2024, 1, 11)),
+                (date(2024, 1, 11), date(2024, 1, 21)),
+                (date(2024, 1, 21), date(2024, 1, 25)),
+            ],
+        )
+
+    def test_split_single_day(self):
+        self.assertEqual(
+            split_date_range(date(2024, 1, 1), date(2024, 1, 1), 10),
+            [(date(2024, 1, 1), date(2024, 1, 1))],
+        )
+
+
+class BackfillTaskTestCase(TestCase):
+    def setUp(self):
+        app.conf.task_always_eager = True
+        self.plants = PlantFactory.create_batch(size=2)
+        self.backfill = Backfill.objects.create(
+            from_date=date(2024, 1, 1),
+            to_date=date(2024, 1, 25),
+            chunk_days=10,
+        )
+        self.backfill.plants.set(self.plants)
+
+    def tearDown(self):
+        app.conf.task_always_eager = False
+
+    @patch("applications.plants.tasks.stream_request")
+    def test_backfill_stores_every_chunk(self, mock_get):
+        mock_get.side_effect = monitoring_response
+
+        start_backfill(str(self.backfill.id))
+
+        self.assertEqual(mock_get.call_count, 6)
+        self.assertEqual(DataPoint.objects.count(), 6)
+        progress = Backfill.objects.annotate_progress().get()
+        self.assertEqual(progress.chunks_total, 6)
+        self.assertEqual(progress.chunks_completed, 6)
+
+    @patch("applications.plants.tasks.stream_request")
+    def test_resume_skips_completed_chunks(self, mock_get):
+        mock_get.side_effect = monitoring_response
+        self.backfill.create_chunks()
+        self.backfill.chunks.filter(from_date=date(2024, 1, 1)).update(
+            status=BackfillChunk.Status.COMPLETED
+        )
+
+        start_backfill(str(self.backfill.id))
+
+        self.assertEqual(mock_get.call_count, 4)
+        self.assertFalse(
+            self.backfill.chunks.exclude(
+                status=BackfillChunk.Status.COMPLETED
+            ).exists()
+        )
+
+    @patch("applications.plants.tasks.stream_request")
+    def test_chunk_is_marked_failed_after_retries(self, mock_get):
+        mock_get.side_effect = requests.exceptions.RequestException(
+            "API request failed"
+        )
+        self.backfill.create_chunks()
+        chunk = self.backfill.chunks.first()
+
+        run_backfill_chunk.apply(args=[str(chunk.id)], retries=3)
+
+        chunk.refresh_from_db()
+        self.assertEqual(chunk.status, BackfillChunk.Status.FAILED)
+        self.assertEqual(chunk.error, "API request failed")
+        self.assertEqual(DataPoint.objects.count(), 0)
+
+    @patch("applications.plants.tasks.stream_request")
+    def test_chunk_is_retried_on_invalid_responses(self, mock_get):
+        def invalid_response(url):
+            yield from monitoring_response(url)
+            raise ValueError("Expected a JSON array.")
+
+        mock_get.side_effect = invalid_response
+        self.backfill.create_chunks()
+        chunk = self.backfill.chunks.first()
+
+        run_backfill_chunk.apply(args=[str(chunk.id)])
+
+        chunk.refresh_from_db()
+        self.assertEqual(mock_get.call_count, 4)
+        self.assertEqual(chunk.attempts, 4)
+        self.assertEqual(chunk.status, BackfillChunk.Status.FAILED)
+        self.assertEqual(chunk.error, "Expected a JSON array.")
+        self.assertEqual(DataPoint.objects.count(), 0)
+
+
+class BackfillViewSetTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.plant = PlantFactory()
+
+    @patch("applications.plants.viewsets.execute_backfill_in_background")
+    def test_create_backfill(self, mock_execute):
+        url = reverse("backfills-list")
+        data = {
+            "plants": [str(self.plant.id)],
+            "from_date": "2024-01-01",
+            "to_date": "2024-03-01",
+        }
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["status"], "pending")
+        mock_execute.assert_called_once()
+
+    def test_create_backfill_with_invalid_range(self):
+        url = reverse("backfills-list")
+        data = {
+            "plants": [str(self.plant.id)],
+            "from_date": "2024-03-01",
+            "to_date": "2024-01-01",
+        }
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_backfill_progress(self):
+        backfill = Backfill.objects.create(
+            from_date=date(2024, 1, 1),
+            to_date=date(2024, 1, 25),
+            chunk_days=10,
+        )
+        backfill.plants.set([self.plant])
+        backfill.create_chunks()
+        backfill.chunks.filter(from_date=date(2024, 1, 1)).update(
+            status=BackfillChunk.Status.COMPLETED
+        )
+        url = reverse("backfills-detail", kwargs={"pk": str(backfill.id)})
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "running")
+        self.assertEqual(
+            response.data["progress"],
+            {"total": 3, "completed": 1, "failed": 0, "pending": 2},
+        )
+
+    @patch("applications.plants.viewsets.execute_backfill_in_background")
+    def test_ingest_plant_with_range(self, mock_execute):
+        mock_execute.return_value = "task-id"
+        url = reverse("plants-ingest", kwargs={"pk": str(self.plant.id)})
+        data = {"from_date": "2024-01-01", "to_date": "2024-03-01"}
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        backfill = Backfill.objects.get(pk=response.data["backfill_id"])
+        self.assertEqual(list(backfill.plants.all()), [self.plant])
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from applications.plants.factories.plant import PlantFactory
+from applications.plants.models import DailyRollup, DataPoint
+from applications.plants.monitoring import DataPointRecord
+from applications.plants.partitions import ensure_partitions
+
+DAY = datetime(2024, 3, 4, tzinfo=timezone.utc)
+
+
+class DataPointBatchTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ensure_partitions([DAY, DAY + timedelta(days=1)])
+        cls.plants = [PlantFactory(), PlantFactory(), PlantFactory()]
+        # 1, 2 and 3 hourly data points.
+        DataPoint.objects.upsert(
+            [
+                DataPointRecord(
+                    plant.pk, DAY + timedelta(hours=hours), 1, hours, 1, 1
+                )
+                for count, plant in enumerate(cls.plants, start=1)
+                for hours in range(count)
+            ]
+        )
+        cls.url = reverse("datapoints-batch-list")
+
+    def query(self, **params):
+        response = self.client.post(self.url, params, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"]
+
+    def hours(self, result):
+        return [row["energy_observed"] for row in result["results"]]
+
+    def test_data_points_are_grouped_by_plant(self):
+        plants = [str(plant.pk) for plant in reversed(self.plants)]
+
+        with self.assertNumQueries(1):
+            results = self.query(plants=plants)
+
+        self.assertEqual(
+            [result["plant_id"] for result in results],
+            [plant.pk for plant in reversed(self.plants)],
+        )
+        self.assertEqual(
+            [self.hours(result) for result in results],
+            [[2.0, 1.0, 0.0], [1.0, 0.0], [0.0]],
+        )
+        self.assertEqual([result["next"] for result in results], [None] * 3)
+
+    def test_duplicate_plants_are_returned_once(self):
+        first, second, _ = (str(plant.pk) for plant in self.plants)
+
+        results = self.query(plants=[second, first, second, first], limit=1)
+
+        self.assertEqual(
+            [str(result["plant_id"]) for result in results], [second, first]
+        )
+        self.assertEqual(
+            [self.hours(result) for result in results], [[1.0], [0.0]]
+        )
+        self.assertIsNotNone(results[0]["next"])
+        self.assertIsNone(results[1]["next"])
+
+    def test_plants_without_data_points_have_no_results(self):
+        plant = PlantFactory()
+
+        (result,) = self.query(plants=[str(plant.pk)])
+
+        self.assertEqual(result["results"], [])
+        self.assertIsNone(result["next"])
+
+    def test_archived_plants_have_no_results(self):
+        self.plants[0].archive()
+
+        results = self.query(plants=[str(plant.pk) for plant in self.plants])
+
+        self.assertEqual(
+            [self.hours(result) for result in results],
+            [[], [1.0, 0.0], [2.0, 1.0, 0.0]],
+        )
+
+    def test_time_range(self):
+        results = self.query(
+            plants=[str(plant.pk) for plant in self.plants],
+            start_datetime=(DAY + timedelta(hours=1)).isoformat(),
+            end_datetime=(DAY + timedelta(hours=1)).isoformat(),
+        )
+
+        self.assertEqual(
+            [self.hours(result) for result in results], [[], [1.0], [1.0]]
+        )
+
+    def test_compacted_days_are_represented_by_their_rollup(self):
+        DailyRollup.objects.compact(DAY.date() + timedelta(days=1))
+        DataPoint.objects.filter(plant=self.plants[2]).delete_in_batches(100)
+
+        (result,) = self.query(plants=[str(self.plants[2].pk)])
+
+        (row,) = result["results"]
+        self.assertEqual(row["datapoints"], 3)
+        self.assertEqual(row["energy_observed"], 3.0)
+
+    def test_limit_and_cursors_continue_each_plant(self):
+        plants = [str(plant.pk) for plant in self.plants]
+
+        first = self.query(plants=plants, limit=1)
+        cursors = {
+            str(result["plant_id"]): result["next"]
+            for result in first
+            if result["next"]
+        }
+        second = self.query(plants=plants, limit=1, cursors=cursors)
+        cursors = {str(second[2]["plant_id"]): second[2]["next"]}
+        third = self.query(plants=plants[2:], limit=1, cursors=cursors)
+
+        self.assertEqual(
+            [self.hours(result) for result in first], [[0.0], [1.0], [2.0]]
+        )
+        self.assertEqual(list(cursors), plants[2:])
+        self.assertEqual(
+            [self.hours(result) for result in second], [[0.0], [0.0], [1.0]]
+        )
+        self.assertEqual([self.hours(result) for result in third], [[0.0]])
+        self.assertIsNone(third[0]["next"])
+
+    def test_invalid_parameters(self):
+        plant_id = str(self.plants[0].pk)
+        for params in (
+            {},
+            {"plants": []},
+            {"plants": ["invalid"]},
+            {"plants": [plant_id], "limit": 0},
+            {"plants": [plant_id], "limit": 101},
+            {"plants": [plant_id], "cursors": {plant_id: "invalid"}},
+            {
+                "plants": [plant_id],
+                "cursors": {str(self.plants[1].pk): "invalid"},
+            },
+            {
+                "plants": [plant_id],
+                "start_datetime": DAY.isoformat(),
+                "end_datetime": (DAY - timedelta(days=1)).isoformat(),
+            },
+        ):
+            with self.subTest(params=params):
+                response = self.client.post(self.url, params, format="json")
+
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
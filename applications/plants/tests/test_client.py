@@ -0,0 +1,220 @@
+import io
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from applications.plants.client import (
+    AdaptiveConcurrency,
+    CircuitBreaker,
+    CircuitOpenError,
+    MonitoringClient,
+    TokenBucket,
+)
+
+TEST_PREFIX = "test:monitoring"
+
+
+def clear_client_keys():
+    connection = get_redis_connection("default")
+    keys = connection.keys(f"{TEST_PREFIX}:*")
+    if keys:
+        connection.delete(*keys)
+
+
+def mock_response(status_code=200, data=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(b"[]" if data is None else data)
+    return response
+
+
+class TokenBucketTestCase(TestCase):
+    def setUp(self):
+        clear_client_keys()
+        self.bucket = TokenBucket(
+            get_redis_connection("default"),
+            f"{TEST_PREFIX}:rate_limit",
+            rate=1,
+            capacity=2,
+        )
+
+    def tearDown(self):
+        clear_client_keys()
+
+    def test_waits_once_the_burst_is_spent(self):
+        self.assertEqual(self.bucket.try_acquire(), 0)
+        self.assertEqual(self.bucket.try_acquire(), 0)
+        self.assertGreater(self.bucket.try_acquire(), 0)
+        self.assertLess(self.bucket.state()["tokens"], 1)
+
+
+class AdaptiveConcurrencyTestCase(TestCase):
+    def setUp(self):
+        clear_client_keys()
+        self.concurrency = AdaptiveConcurrency(
+            get_redis_connection("default"),
+            f"{TEST_PREFIX}:concurrency",
+            minimum=1,
+            maximum=8,
+            latency_target=1,
+        )
+
+    def tearDown(self):
+        clear_client_keys()
+
+    def test_halves_on_failure_and_slow_responses(self):
+        self.concurrency.adjust(0.1, failed=True)
+        self.assertEqual(self.concurrency.limit, 4)
+        self.concurrency.adjust(5, failed=False)
+        self.assertEqual(self.concurrency.limit, 2)
+        for _ in range(10):
+            self.concurrency.adjust(5, failed=False)
+        self.assertEqual(self.concurrency.limit, 1)
+
+    def test_grows_additively_up_to_maximum(self):
+        self.concurrency.limit = 2
+        for _ in range(3):
+            self.concurrency.adjust(0.1, failed=False)
+        self.assertEqual(int(self.concurrency.limit), 3)
+        for _ in range(100):
+            self.concurrency.adjust(0.1, failed=False)
+        self.assertEqual(self.concurrency.limit, 8)
+
+    def test_limit_is_published(self):
+        self.concurrency.adjust(0.1, failed=True)
+        workers = self.concurrency.state()["workers"]
+        self.assertEqual(workers[self.concurrency.worker]["limit"], 4, workers)
+
+
+class CircuitBreakerTestCase(TestCase):
+    def setUp(self):
+        clear_client_keys()
+        self.breaker = CircuitBreaker(
+            get_redis_connection("default"),
+            f"{TEST_PREFIX}:breaker",
+            failure_threshold=2,
+            reset_timeout=30,
+        )
+
+    def tearDown(self):
+        clear_client_keys()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.before_request()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state()["status"], CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state()["status"], CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.state()["failures"], 1)
+
+    def test_half_open_lets_a_single_probe_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        retry_at = self.breaker.state()["retry_at"]
+        with patch("applications.plants.client.time.time") as mock_time:
+            mock_time.return_value = retry_at + 1
+            self.assertEqual(
+                self.breaker.state()["status"], CircuitBreaker.HALF_OPEN
+            )
+            self.breaker.before_request()
+            with self.assertRaises(CircuitOpenError):
+                self.breaker.before_request()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state()["status"], CircuitBreaker.CLOSED)
+
+
+@override_settings(
+    MONITORING_CLIENT_KEY_PREFIX=TEST_PREFIX,
+    MONITORING_BREAKER_FAILURE_THRESHOLD=2,
+)
+class MonitoringClientTestCase(TestCase):
+    def setUp(self):
+        clear_client_keys()
+        self.session = MagicMock()
+        self.client = MonitoringClient(self.session)
+
+    def tearDown(self):
+        clear_client_keys()
+
+    def get(self):
+        with self.client.get("http://monitoring/") as response:
+            return response.json()
+
+    def test_successful_request(self):
+        self.session.get.return_value = mock_response(data=b"[1]")
+
+        self.assertEqual(self.get(), [1])
+        self.assertEqual(self.client.concurrency.in_flight, 0)
+
+    def test_server_errors_open_the_circuit(self):
+        self.session.get.return_value = mock_response(status_code=503)
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.get()
+        with self.assertRaises(CircuitOpenError):
+            self.get()
+
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertEqual(self.client.concurrency.in_flight, 0)
+        self.assertLess(
+            self.client.concurrency.limit, self.client.concurrency.maximum
+        )
+
+    def test_client_errors_do_not_open_the_circuit(self):
+        self.session.get.return_value = mock_response(status_code=404)
+
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.get()
+
+        self.assertEqual(self.session.get.call_count, 3)
+        self.assertEqual(
+            self.client.breaker.state()["status"], CircuitBreaker.CLOSED
+        )
+
+    def test_timeouts_open_the_circuit(self):
+        self.session.get.side_effect = requests.exceptions.Timeout()
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.Timeout):
+                self.get()
+
+        self.assertEqual(
+            self.client.breaker.state()["status"], CircuitBreaker.OPEN
+        )
+
+
+@override_settings(MONITORING_CLIENT_KEY_PREFIX=TEST_PREFIX)
+class MonitoringClientViewSetTestCase(APITestCase):
+    def tearDown(self):
+        clear_client_keys()
+
+    @patch("applications.plants.viewsets.get_client")
+    def test_state(self, mock_get_client):
+        mock_get_client.return_value = MonitoringClient(MagicMock())
+
+        response = self.client.get(reverse("monitoring-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["circuit_breaker"]["status"], CircuitBreaker.CLOSED
+        )
+        self.assertIn("tokens", response.data["rate_limit"])
+        self.assertIn("workers", response.data["concurrency"])
@@ -0,0 +1,137 @@
+import os
+import socket
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections
+from django.test import TestCase
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.postgresql.base import ConnectionMetrics, DatabaseWrapper
+
+KEY = "test:database:connections"
+
+
+class ConnectionMetricsTestCase(TestCase):
+    def setUp(self):
+        get_redis_connection("default").delete(KEY)
+        self.stats = {
+            "requests_num": 8,
+            "requests_queued": 1,
+            "requests_wait_ms": 40,
+            "connections_num": 2,
+            "connections_ms": 60,
+            "pool_available": 1,
+        }
+        pool = mock.Mock(get_stats=lambda: dict(self.stats))
+        self.metrics = ConnectionMetrics(
+            KEY, publish_interval=60, pools={"default": pool}
+        )
+
+    def test_snapshot(self):
+        self.assertEqual(
+            self.metrics.snapshot()["default"],
+            {
+                **self.stats,
+                "reuse_ratio": 0.75,
+                "connect_ms_avg": 30,
+                "wait_ms_avg": 5,
+            },
+        )
+
+    def test_snapshot_of_unused_pool(self):
+        self.stats = {"pool_available": 1}
+
+        self.assertEqual(
+            self.metrics.snapshot()["default"],
+            {
+                "pool_available": 1,
+                "reuse_ratio": None,
+                "connect_ms_avg": None,
+                "wait_ms_avg": None,
+            },
+        )
+
+    def test_metrics_are_published_per_process(self):
+        self.metrics.publish()
+        self.stats["requests_num"] += 1
+        self.metrics.publish()
+
+        (process, published), *others = self.metrics.state().items()
+        self.assertEqual(others, [])
+        self.assertEqual(process, f"{socket.gethostname()}:{os.getpid()}")
+        # Published at most once per interval, unless forced.
+        self.assertEqual(published["aliases"]["default"]["requests_num"], 8)
+        self.metrics.publish(force=True)
+        (published,) = self.metrics.state().values()
+        self.assertEqual(published["aliases"]["default"]["requests_num"], 9)
+
+
+class DatabaseWrapperTestCase(TestCase):
+    def setUp(self):
+        self.pool = connection.pool
+
+    def stats(self):
+        return {"requests_num": 0, **self.pool.get_stats()}
+
+    def test_checkouts_are_counted_per_connection(self):
+        before = self.stats()
+        new_connection = connections.create_connection("default")
+
+        for _ in range(3):
+            with new_connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        new_connection.close()
+
+        self.assertEqual(
+            self.stats()["requests_num"], before["requests_num"] + 1
+        )
+
+    def test_connections_are_returned_to_the_pool(self):
+        new_connection = connections.create_connection("default")
+        new_connection.ensure_connection()
+        pooled = new_connection.connection
+        available = self.stats()["pool_available"]
+
+        new_connection.close()
+
+        self.assertEqual(self.stats()["pool_available"], available + 1)
+        self.assertFalse(pooled.closed)
+        self.assertIsNone(new_connection.connection)
+
+    def test_queries_do_not_write_to_redis(self):
+        with mock.patch(
+            "core.postgresql.base.get_redis_connection"
+        ) as get_redis_connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+        get_redis_connection.assert_not_called()
+
+    def test_pool_needs_connections_closed_after_requests(self):
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, "CONN_MAX_AGE": 60}, alias="other"
+        )
+
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.ensure_connection()
+
+
+class DatabaseConnectionsTestCase(APITestCase):
+    def test_database_connections(self):
+        response = self.client.get(reverse("database-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        server = response.data["server"]
+        self.assertGreaterEqual(server["connections"], 1)
+        self.assertEqual(
+            server["saturation"],
+            server["connections"] / server["max_connections"],
+        )
+        self.assertIn(
+            f"{socket.gethostname()}:{os.getpid()}",
+            response.data["processes"],
+        )
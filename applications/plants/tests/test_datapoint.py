@@ -1,8 +1,18 @@
+import json
+
+from django.db import connection
+from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
 
 from applications.plants.factories.plant import DataPointFactory, PlantFactory
+from applications.plants.manager import MEASUREMENT_FIELDS
+from applications.plants.models import DataPoint, ReportSource
+from applications.plants.pagination import DataPointCursorPagination
+from applications.plants.serializers import PlantDataPointSerializer
 
 
 class PlantDataPointTestCase(APITestCase):
@@ -47,9 +57,95 @@ class PlantDataPointTestCase(APITestCase):
                 "plant_id": str(self.plants[0].id),
             },
         )
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_plant_datapoints_have_the_serializer_schema(self):
+        plant = self.plants[0]
+        rows = ReportSource.objects.filter_active().for_datapoint_list(
+            str(plant.id)
+        )
+        serializer = PlantDataPointSerializer(rows, many=True)
+        expected = json.loads(JSONRenderer().render(serializer.data))
+        url = reverse("datapoints-list", kwargs={"plant_id": str(plant.id)})
+
+        response = self.client.get(url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], expected)
+
+    def test_plant_datapoints_pages_follow_the_cursor(self):
+        url = reverse(
+            "datapoints-list",
+            kwargs={
+                "plant_id": str(self.plants[0].id),
+            },
+        )
+        url += "?page_size=2"
+        datetimes = []
+        pages = 0
+        while url:
             response = self.client.get(url, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            datetimes += [row["datetime"] for row in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(datetimes), 5)
+        self.assertEqual(datetimes, sorted(datetimes, reverse=True))
+
+    def test_cursor_breaks_datetime_ties_with_id(self):
+        # Data points of several plants share their datetime, like a
+        # compacted day and a data point at its midnight in the listing.
+        datetime = DataPointFactory(plant=self.archived_plant).datetime
+        for plant in self.plants:
+            DataPointFactory(plant=plant, datetime=datetime)
+        queryset = DataPoint.objects.filter(datetime=datetime).values(
+            "id", "datetime"
+        )
+        pagination = DataPointCursorPagination()
+        request = Request(APIRequestFactory().get("/", {"page_size": 2}))
+        ids = []
+        while request:
+            ids += [
+                row["id"]
+                for row in pagination.paginate_queryset(queryset, request)
+            ]
+            next_link = pagination.get_next_link()
+            request = next_link and Request(APIRequestFactory().get(next_link))
+
+        self.assertEqual(len(queryset), 6)
+        self.assertEqual(
+            ids, sorted(queryset.values_list("id", flat=True), reverse=True)
+        )
+
+    def test_plant_datapoints_invalid_cursor(self):
+        url = reverse(
+            "datapoints-list",
+            kwargs={
+                "plant_id": str(self.plants[0].id),
+            },
+        )
+        response = self.client.get(url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_plant_datapoints_by_page_number(self):
+        url = reverse(
+            "datapoints-list",
+            kwargs={
+                "plant_id": str(self.plants[0].id),
+            },
+        )
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                url, {"page": 2, "page_size": 2}, format="json"
+            )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_invalid_uuid(self):
         url = reverse(
@@ -61,3 +157,38 @@ class PlantDataPointTestCase(APITestCase):
         with self.assertNumQueries(0):
             response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DataPointIndexTestCase(TestCase):
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            # Tables of a few rows are scanned sequentially otherwise.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_plant_range_is_answered_by_covering_index(self):
+        plant = PlantFactory()
+        data_points = DataPointFactory.create_batch(5, plant=plant)
+
+        plan = self.explain(
+            DataPoint.objects.filter(
+                plant=plant, datetime__gte=data_points[-1].datetime
+            ).values("datetime", *MEASUREMENT_FIELDS)
+        )
+
+        # Indexes of each partition are named after the (plant, datetime)
+        # unique index columns.
+        self.assertIn("Index Only Scan using", plan)
+        self.assertIn("_plant_id_datetime_", plan)
+
+    def test_datetime_range_uses_brin_index(self):
+        data_points = DataPointFactory.create_batch(5)
+
+        plan = self.explain(
+            DataPoint.objects.filter(
+                datetime__gte=data_points[-1].datetime
+            ).values("datetime", *MEASUREMENT_FIELDS)
+        )
+
+        # BRIN indexes of each partition are named after the column.
+        self.assertIn("_datetime_idx", plan)
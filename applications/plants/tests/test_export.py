@@ -0,0 +1,146 @@
+import csv
+import json
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from applications.plants.exports import EXPORT_COLUMNS
+from applications.plants.factories.plant import PlantFactory
+from applications.plants.models import DailyRollup, DataPoint
+from applications.plants.monitoring import DataPointRecord
+from applications.plants.partitions import ensure_partitions
+
+DAY = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def open_cursors() -> int:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_cursors")
+        return cursor.fetchone()[0]
+
+
+class DataPointExportTestCase(APITestCase):
+    url = reverse("datapoints-export-list")
+
+    @classmethod
+    def setUpTestData(cls):
+        ensure_partitions([DAY])
+        cls.plant, cls.other = PlantFactory.create_batch(size=2)
+        DataPoint.objects.upsert(
+            [
+                DataPointRecord(
+                    plant.pk, DAY + timedelta(hours=hours), hours, 2, 3, 4
+                )
+                for plant in (cls.plant, cls.other)
+                for hours in range(0, 48, 6)
+            ]
+        )
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        response, content = self.export(
+            plants=str(self.plant.pk),
+            start_datetime=(DAY + timedelta(hours=6)).isoformat(),
+            end_datetime=(DAY + timedelta(hours=18)).isoformat(),
+        )
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row["datetime"] for row in rows],
+            [
+                (DAY + timedelta(hours=hours)).isoformat()
+                for hours in (6, 12, 18)
+            ],
+        )
+        self.assertEqual(list(rows[0]), list(EXPORT_COLUMNS))
+        self.assertEqual(rows[0]["plant_id"], str(self.plant.pk))
+        self.assertEqual(rows[0]["plant_name"], self.plant.name)
+        self.assertEqual(rows[0]["energy_expected"], 6.0)
+        self.assertEqual(rows[0]["datapoints"], 1)
+
+    @override_settings(DATAPOINT_EXPORT_CHUNK_SIZE=3)
+    def test_export_csv_of_several_plants(self):
+        response, content = self.export(
+            plants=f"{self.plant.pk},{self.other.pk}", file_format="csv"
+        )
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("datapoints.csv", response["Content-Disposition"])
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 16)
+        self.assertEqual(
+            [row["plant_id"] for row in rows],
+            sorted(row["plant_id"] for row in rows),
+        )
+        self.assertEqual(float(rows[1]["energy_expected"]), 6.0)
+
+    def test_export_every_plant(self):
+        _, content = self.export()
+
+        self.assertEqual(len(content.splitlines()), 16)
+
+    def test_empty_csv_export_has_a_header(self):
+        _, content = self.export(
+            file_format="csv", start_datetime=(DAY + timedelta(days=5))
+        )
+
+        self.assertEqual(content, ",".join(EXPORT_COLUMNS) + "\n")
+
+    def test_compacted_days_are_exported_from_their_rollup(self):
+        DailyRollup.objects.compact(DAY.date() + timedelta(days=1))
+        DataPoint.objects.filter(
+            datetime__lt=DAY + timedelta(days=1)
+        ).delete_in_batches(100)
+
+        _, content = self.export(
+            plants=str(self.plant.pk),
+            start_datetime=(DAY + timedelta(hours=12)).isoformat(),
+        )
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["datapoints"] for row in rows], [4, 1, 1, 1, 1])
+        self.assertEqual(rows[0]["energy_expected"], 0 + 6 + 12 + 18)
+
+    @override_settings(DATAPOINT_EXPORT_CHUNK_SIZE=2)
+    async def test_asgi_export_is_streamed(self):
+        response = await self.async_client.get(
+            self.url, {"plants": str(self.plant.pk)}
+        )
+        chunks = []
+        async for chunk in response.streaming_content:
+            if not chunks:
+                # The first chunk is sent while the named cursor is open.
+                self.assertEqual(len(chunk.splitlines()), 2)
+                self.assertEqual(await sync_to_async(open_cursors)(), 1)
+            chunks.append(chunk)
+
+        self.assertEqual(len(b"".join(chunks).splitlines()), 8)
+        self.assertEqual(await sync_to_async(open_cursors)(), 0)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"plants": "not-a-uuid"},
+            {"file_format": "xml"},
+            {
+                "start_datetime": (DAY + timedelta(days=1)).isoformat(),
+                "end_datetime": DAY.isoformat(),
+            },
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
@@ -0,0 +1,44 @@
+import uuid
+
+from django.test import TestCase
+
+from applications.plants.factories.plant import DataPointFactory, PlantFactory
+from applications.plants.identifiers import uuid7
+from applications.plants.models import DataPoint
+from applications.plants.monitoring import DataPointRecord
+
+
+class UUID7TestCase(TestCase):
+    def test_version_and_variant(self):
+        value = uuid7()
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+
+    def test_timestamp_is_stored_in_the_first_48_bits(self):
+        value = uuid7(milliseconds=1_700_000_000_123)
+
+        self.assertEqual(value.int >> 80, 1_700_000_000_123)
+
+    def test_ids_are_ordered_by_time(self):
+        values = [uuid7(milliseconds=ms) for ms in range(1000, 1100)]
+
+        self.assertEqual(sorted(values), values)
+        self.assertEqual(len(set(values)), len(values))
+
+    def test_new_rows_use_time_ordered_ids(self):
+        plant = PlantFactory()
+        saved = DataPointFactory(plant=plant)
+        DataPoint.objects.upsert(
+            [
+                DataPointRecord(
+                    plant.pk, saved.datetime.replace(minute=1), 1, 2, 3, 4
+                )
+            ]
+        )
+
+        self.assertEqual(plant.pk.version, 7)
+        self.assertEqual(
+            {data_point.pk.version for data_point in plant.datapoints.all()},
+            {7},
+        )
@@ -0,0 +1,192 @@
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from applications.plants.factories.plant import PlantFactory
+from applications.plants.loader import (
+    LoadError,
+    load_datapoints,
+    merge_staging_table,
+)
+from applications.plants.models import DataPoint
+from applications.plants.partitions import ensure_partitions
+
+DAY = datetime(2019, 6, 1, tzinfo=timezone.utc)
+HEADER = (
+    "plant,datetime,energy_expected,energy_observed,"
+    "irradiation_expected,irradiation_observed"
+)
+
+
+def csv_file(*rows, header=HEADER):
+    return StringIO("\n".join([header, *rows]) + "\n")
+
+
+def ndjson_file(*records):
+    return StringIO("".join(json.dumps(record) + "\n" for record in records))
+
+
+class LoadDataPointsTestCase(TestCase):
+    def setUp(self):
+        self.plant = PlantFactory(name="plant-1")
+
+    def record(self, hours, energy_expected=1.0):
+        return {
+            "plant": self.plant.name,
+            "datetime": (DAY + timedelta(hours=hours)).isoformat(),
+            "energy_expected": energy_expected,
+            "energy_observed": 2.0,
+            "irradiation_expected": 3.0,
+            "irradiation_observed": 4.0,
+        }
+
+    def test_load_csv(self):
+        file = csv_file(
+            f"plant-1,{DAY.isoformat()},1,2,3,4",
+            f"plant-1,{(DAY + timedelta(hours=1)).isoformat()},5,6,7,8",
+        )
+
+        summary = load_datapoints(file, "csv")
+
+        self.assertEqual(
+            summary,
+            {
+                "rows": 2,
+                "created": 2,
+                "updated": 0,
+                "unchanged": 0,
+                "skipped": 0,
+                "unknown_plants": [],
+            },
+        )
+        data_point = self.plant.datapoints.get(datetime=DAY)
+        self.assertEqual(data_point.energy_expected, 1.0)
+        self.assertEqual(data_point.irradiation_observed, 4.0)
+        self.assertEqual(data_point.pk.version, 7)
+        rollup = self.plant.daily_rollups.get()
+        self.assertEqual(rollup.datapoints, 2)
+        self.assertEqual(rollup.energy_expected_sum, 6.0)
+        self.assertEqual(
+            self.plant.__class__.objects.get(
+                pk=self.plant.pk
+            ).last_ingested_at,
+            DAY + timedelta(hours=1),
+        )
+
+    def test_csv_columns_in_any_order(self):
+        file = csv_file(
+            f"2,1,4,3,{DAY.isoformat()},plant-1",
+            header="energy_observed,energy_expected,irradiation_observed,"
+            "irradiation_expected,datetime,plant",
+        )
+
+        load_datapoints(file, "csv")
+
+        data_point = self.plant.datapoints.get()
+        self.assertEqual(data_point.energy_expected, 1.0)
+        self.assertEqual(data_point.energy_observed, 2.0)
+
+    def test_csv_with_missing_columns(self):
+        with self.assertRaises(LoadError):
+            load_datapoints(csv_file(header="plant,datetime"), "csv")
+
+    def test_load_ndjson_with_upsert_semantics(self):
+        load_datapoints(ndjson_file(self.record(0), self.record(1)), "ndjson")
+
+        summary = load_datapoints(
+            ndjson_file(
+                self.record(0),
+                self.record(1, energy_expected=9.0),
+                self.record(2, energy_expected=5.0),
+                # The last line of a plant and datetime wins.
+                self.record(2, energy_expected=7.0),
+            ),
+            "ndjson",
+        )
+
+        self.assertEqual(summary["rows"], 4)
+        self.assertEqual(summary["created"], 1)
+        self.assertEqual(summary["updated"], 1)
+        self.assertEqual(summary["unchanged"], 1)
+        self.assertEqual(
+            list(
+                self.plant.datapoints.order_by("datetime").values_list(
+                    "energy_expected", flat=True
+                )
+            ),
+            [1.0, 9.0, 7.0],
+        )
+        self.assertEqual(
+            self.plant.daily_rollups.get().energy_expected_sum, 17.0
+        )
+
+    def test_rows_of_unknown_plants_are_skipped(self):
+        summary = load_datapoints(
+            ndjson_file(self.record(0), {**self.record(0), "plant": "other"}),
+            "ndjson",
+        )
+
+        self.assertEqual(summary["created"], 1)
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(summary["unknown_plants"], ["other"])
+        self.assertEqual(DataPoint.objects.count(), 1)
+
+    def test_invalid_ndjson_line(self):
+        with self.assertRaisesMessage(LoadError, "Invalid line 2"):
+            load_datapoints(
+                StringIO(json.dumps(self.record(0)) + "\n{not json}\n"),
+                "ndjson",
+            )
+
+        self.assertFalse(DataPoint.objects.exists())
+        # The staging table of the failed load was dropped.
+        load_datapoints(ndjson_file(self.record(0)), "ndjson")
+        self.assertTrue(DataPoint.objects.exists())
+
+    def test_partitions_are_created_before_the_merge_transaction(self):
+        depths = {}
+
+        def record_depth(name, function):
+            def wrapper(*args, **kwargs):
+                depths[name] = len(connection.atomic_blocks)
+                return function(*args, **kwargs)
+
+            return wrapper
+
+        with (
+            patch(
+                "applications.plants.loader.ensure_partitions",
+                record_depth("partitions", ensure_partitions),
+            ),
+            patch(
+                "applications.plants.loader.merge_staging_table",
+                record_depth("merge", merge_staging_table),
+            ),
+        ):
+            load_datapoints(ndjson_file(self.record(0)), "ndjson")
+
+        self.assertEqual(depths["partitions"], len(connection.atomic_blocks))
+        self.assertEqual(depths["merge"], depths["partitions"] + 1)
+        self.assertTrue(self.plant.datapoints.exists())
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as file:
+            file.write(ndjson_file(self.record(0)).getvalue())
+            file.flush()
+            out = StringIO()
+
+            call_command("load_datapoints", file.name, stdout=out)
+
+        self.assertIn("rows/s", out.getvalue())
+        self.assertIn("created 1", out.getvalue())
+        self.assertTrue(self.plant.datapoints.exists())
+
+    def test_command_with_unknown_format(self):
+        with self.assertRaises(CommandError):
+            call_command("load_datapoints", "data.parquet")
@@ -0,0 +1,150 @@
+import json
+import threading
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+
+from applications.plants.monitoring import (
+    DataPointRecord,
+    decode_entries,
+    fetch_concurrently,
+    iter_json_array,
+)
+
+
+class IterJsonArrayTestCase(SimpleTestCase):
+    data = [
+        {
+            "datetime": f"2024-01-01T{hour:02}:00:00",
+            "expected": {"energy": 14.4380684864, "irradiation": 49.7},
+            "observed": {"energy": -1.5e-3, "irradiation": 31},
+        }
+        for hour in range(24)
+    ]
+
+    def split(self, raw: bytes, size: int):
+        return [
+            raw[index : index + size] for index in range(0, len(raw), size)
+        ]
+
+    def test_decode_elements_split_in_chunks(self):
+        raw = json.dumps(self.data, indent=2).encode()
+        for size in (1, 7, 64, len(raw)):
+            with self.subTest(size=size):
+                self.assertEqual(
+                    list(iter_json_array(self.split(raw, size))), self.data
+                )
+
+    def test_decode_multibyte_characters_split_in_chunks(self):
+        data = [{"name": "φωτοβολταϊκό ☀"}, 1.25, "end"]
+        raw = json.dumps(data, ensure_ascii=False).encode()
+        self.assertEqual(list(iter_json_array(self.split(raw, 1))), data)
+
+    def test_elements_are_yielded_before_the_response_ends(self):
+        chunks = iter([b'[{"a": 1}, ', b'{"b": 2}'])
+        elements = iter_json_array(chunks)
+        self.assertEqual(next(elements), {"a": 1})
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array([b" [ ", b"] "])), [])
+
+    def test_invalid_arrays(self):
+        for raw in (b"{}", b"[1 2]", b"[1,", b'[{"a": '):
+            with self.subTest(raw=raw), self.assertRaises(ValueError):
+                list(iter_json_array([raw]))
+
+
+class DecodeEntriesTestCase(SimpleTestCase):
+    def entry(self, **overrides):
+        entry = {
+            "datetime": "2024-01-01T10:00:00",
+            "expected": {"energy": 14.4, "irradiation": 49},
+            "observed": {"energy": 15.6, "irradiation": "31.5"},
+        }
+        entry.update(overrides)
+        return entry
+
+    def test_decode_entry(self):
+        self.assertEqual(
+            list(decode_entries("plant-id", [self.entry()])),
+            [
+                DataPointRecord(
+                    "plant-id",
+                    datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+                    14.4,
+                    15.6,
+                    49.0,
+                    31.5,
+                )
+            ],
+        )
+
+    def test_datetime_with_offset_is_converted_to_utc(self):
+        (record,) = decode_entries(
+            "plant-id", [self.entry(datetime="2024-01-01T12:00:00+02:00")]
+        )
+        self.assertEqual(
+            record.datetime, datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+        )
+
+    def test_invalid_entries_are_skipped(self):
+        entries = [
+            self.entry(datetime="not a datetime"),
+            self.entry(expected={"energy": 1.0}),
+            self.entry(observed={"energy": None, "irradiation": 1.0}),
+            self.entry(observed={"energy": True, "irradiation": 1.0}),
+            self.entry(observed={"energy": "nan", "irradiation": 1.0}),
+            {"datetime": "2024-01-01T10:00:00"},
+            self.entry(),
+        ]
+        self.assertEqual(len(list(decode_entries("plant-id", entries))), 1)
+
+    def test_entries_up_to_since_are_skipped(self):
+        entries = [
+            self.entry(datetime=f"2024-01-01T{hour:02}:00:00")
+            for hour in range(24)
+        ]
+        since = datetime(2024, 1, 1, 20, tzinfo=timezone.utc)
+        records = list(decode_entries("plant-id", entries, since=since))
+        self.assertEqual(
+            [record.datetime.hour for record in records], [21, 22, 23]
+        )
+
+
+class FetchConcurrentlyTestCase(SimpleTestCase):
+    def test_requests_are_submitted_in_a_bounded_window(self):
+        lock = threading.Lock()
+        started = []
+
+        def fetch(url):
+            with lock:
+                started.append(url)
+            return url.upper()
+
+        requests_by_key = ((index, f"url-{index}") for index in range(20))
+        results = fetch_concurrently(fetch, requests_by_key, max_workers=2)
+
+        key, result = next(results)
+        self.assertEqual(result, f"URL-{key}")
+        self.assertLessEqual(len(started), 4)
+        remaining = dict(results)
+        self.assertEqual(len(remaining), 19)
+        self.assertEqual(len(started), 20)
+
+    def test_caught_exceptions_are_yielded(self):
+        def fetch(url):
+            raise ValueError(url)
+
+        ((key, result),) = fetch_concurrently(
+            fetch, [("plant", "url")], max_workers=1, catch=(ValueError,)
+        )
+
+        self.assertEqual(key, "plant")
+        self.assertIsInstance(result, ValueError)
+
+    def test_uncaught_exceptions_are_raised(self):
+        def fetch(url):
+            raise ValueError(url)
+
+        with self.assertRaises(ValueError):
+            list(fetch_concurrently(fetch, [("plant", "url")], max_workers=1))
@@ -0,0 +1,163 @@
+from datetime import date, datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from applications.plants.factories.plant import DataPointFactory, PlantFactory
+from applications.plants.models import DataPoint
+from applications.plants.monitoring import DataPointRecord
+from applications.plants.partitions import (
+    Partition,
+    create_future_partitions,
+    ensure_partitions,
+    list_partitions,
+    months_between,
+    remove_expired_partitions,
+)
+from applications.plants.tasks import (
+    manage_datapoint_partitions,
+    store_data_points,
+)
+
+
+class PartitionsTestCase(TestCase):
+    def test_partition_name_and_bounds(self):
+        partition = Partition(date(2024, 12, 1))
+
+        self.assertEqual(partition.name, "plants_datapoint_y2024m12")
+        self.assertEqual(partition.end, date(2025, 1, 1))
+
+    def test_create_future_partitions(self):
+        created = create_future_partitions(date(2100, 11, 15), ahead=2)
+
+        self.assertEqual(
+            [partition.month for partition in created],
+            [date(2100, 11, 1), date(2100, 12, 1), date(2101, 1, 1)],
+        )
+        self.assertTrue(set(created) <= set(list_partitions()))
+        # Existing partitions are not created twice.
+        self.assertEqual(create_future_partitions(date(2100, 11, 1), 2), [])
+
+    def test_store_data_points_of_a_month_without_partition(self):
+        plant = PlantFactory()
+        timestamp = datetime(1990, 3, 31, 23, tzinfo=timezone.utc)
+        self.assertNotIn(Partition(date(1990, 3, 1)), list_partitions())
+
+        store_data_points(
+            [DataPointRecord(plant.pk, timestamp, 1, 2, 3, 4)],
+            datetime.now(tz=timezone.utc),
+        )
+
+        self.assertIn(Partition(date(1990, 3, 1)), list_partitions())
+        self.assertEqual(plant.datapoints.get().datetime, timestamp)
+
+    def test_partitions_are_created_before_the_upsert_transaction(self):
+        plant = PlantFactory()
+        records = [
+            DataPointRecord(
+                plant.pk, datetime(1990, 4, 2, tzinfo=timezone.utc), 1, 2, 3, 4
+            )
+        ]
+        now = datetime.now(tz=timezone.utc)
+
+        with CaptureQueriesContext(connection) as queries:
+            store_data_points(records, now)
+        statements = [query["sql"].lstrip() for query in queries]
+        with CaptureQueriesContext(connection) as queries:
+            store_data_points(records, now)
+
+        create = next(
+            index
+            for index, sql in enumerate(statements)
+            if sql.startswith("CREATE TABLE")
+        )
+        upsert = next(
+            index
+            for index, sql in enumerate(statements)
+            if sql.startswith("INSERT INTO")
+        )
+        # The upsert transaction (a savepoint in tests) starts after the
+        # partition was created in its own one.
+        upsert_savepoint = max(
+            index
+            for index, sql in enumerate(statements[:upsert])
+            if sql.startswith("SAVEPOINT")
+        )
+        self.assertLess(create, upsert_savepoint)
+        self.assertNotIn("CREATE", " ".join(q["sql"] for q in queries))
+
+    def test_months_between(self):
+        self.assertEqual(
+            list(months_between(date(2024, 11, 20), date(2025, 1, 1))),
+            [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)],
+        )
+
+    def test_remove_expired_partitions(self):
+        ensure_partitions(
+            [
+                datetime(1990, 1, 5, tzinfo=timezone.utc),
+                datetime(1990, 2, 5, tzinfo=timezone.utc),
+            ]
+        )
+        DataPointFactory(datetime=datetime(1990, 1, 5, tzinfo=timezone.utc))
+        DataPointFactory(datetime=datetime(1990, 2, 5, tzinfo=timezone.utc))
+
+        removed = remove_expired_partitions(date(1990, 3, 10), 1)
+
+        self.assertEqual(removed, [Partition(date(1990, 1, 1))])
+        self.assertNotIn(Partition(date(1990, 1, 1)), list_partitions())
+        # Data points of detached partitions are no longer queried.
+        self.assertEqual(
+            DataPoint.objects.filter(datetime__year=1990).count(), 1
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM plants_datapoint_y1990m01")
+            self.assertEqual(cursor.fetchone(), (1,))
+
+    def test_drop_expired_partitions(self):
+        ensure_partitions([datetime(1990, 1, 5, tzinfo=timezone.utc)])
+
+        remove_expired_partitions(date(1990, 3, 10), 1, drop=True)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT to_regclass('plants_datapoint_y1990m01') IS NULL"
+            )
+            self.assertEqual(cursor.fetchone(), (True,))
+
+    def test_datetime_range_is_pruned_to_its_partitions(self):
+        DataPointFactory()
+        start = datetime.now(tz=timezone.utc).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+
+        plan = DataPoint.objects.filter(datetime__gte=start).explain()
+
+        current = Partition(start.date())
+        self.assertIn(current.name, plan)
+        self.assertNotIn(Partition(date(2023, 1, 1)).name, plan)
+        self.assertLess(plan.count(" on plants_datapoint_y"), 6)
+
+
+class ManagePartitionsTestCase(TestCase):
+    @override_settings(DATAPOINT_PARTITIONS_AHEAD=24)
+    def test_task_creates_future_partitions(self):
+        summary = manage_datapoint_partitions()
+
+        self.assertTrue(summary["created"])
+        self.assertEqual(summary["removed"], [])
+        names = {partition.name for partition in list_partitions()}
+        self.assertTrue(set(summary["created"]) <= names)
+
+    def test_command_lists_partitions(self):
+        out = StringIO()
+
+        call_command("manage_partitions", "--list", stdout=out)
+
+        self.assertEqual(
+            out.getvalue().split(),
+            [partition.name for partition in list_partitions()],
+        )
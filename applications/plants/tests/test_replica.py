@@ -0,0 +1,183 @@
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from applications.plants.factories.plant import DataPointFactory, PlantFactory
+from applications.plants.models import Plant
+from applications.plants.report_cache import ReportCache
+from core.replica import (
+    PIN_COOKIE,
+    ReplicaRouter,
+    read_from,
+    replica_lag,
+    replica_lags,
+)
+
+
+@override_settings(REPLICA_DATABASE="replica", REPLICA_MAX_LAG=30)
+class ReplicaRoutingTestCase(APITransactionTestCase):
+    # The replica is a test mirror with its own connection, it only sees
+    # committed data.
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.plant = PlantFactory()
+        DataPointFactory.create_batch(3, plant=self.plant)
+        replica_lags.clear()
+        self.url = reverse(
+            "datapoints-list", kwargs={"plant_id": str(self.plant.pk)}
+        )
+
+    def get(self, url, **kwargs):
+        """
+        Response of a GET request and the number of queries sent to each
+        database.
+        """
+        with (
+            CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as default,
+            CaptureQueriesContext(connections["replica"]) as replica,
+        ):
+            response = self.client.get(url, **kwargs)
+        return response, len(default), len(replica)
+
+    def test_listing_reads_from_the_replica(self):
+        response, default, replica = self.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(default, 0)
+        # Lag check, then the page of data points.
+        self.assertEqual(replica, 2)
+
+    def test_cached_reports_are_computed_on_the_default_database(self):
+        ReportCache().clear()
+        self.addCleanup(ReportCache().clear)
+
+        response, default, replica = self.get(reverse("reports-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertTrue(default)
+        # Only the lag check.
+        self.assertEqual(replica, 1)
+
+    @override_settings(REPORT_CACHE_TIMEOUT=0)
+    def test_uncached_reports_read_from_the_replica(self):
+        response, default, replica = self.get(reverse("reports-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(default, 0)
+        self.assertTrue(replica)
+
+    def test_exports_are_streamed_from_the_replica(self):
+        response, _, _ = self.get(reverse("datapoints-export-list"))
+
+        # Rows are only read once the response is streamed.
+        with (
+            CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as default,
+            CaptureQueriesContext(connections["replica"]) as replica,
+        ):
+            content = b"".join(response.streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 3)
+        self.assertEqual(len(default), 0)
+        self.assertTrue(replica)
+
+    def test_batch_queries_read_from_the_replica(self):
+        with (
+            CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as default,
+            CaptureQueriesContext(connections["replica"]) as replica,
+        ):
+            response = self.client.post(
+                reverse("datapoints-batch-list"),
+                {"plants": [str(self.plant.pk)]},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"][0]["results"]), 3)
+        self.assertEqual(len(default), 0)
+        self.assertTrue(replica)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_lag_is_only_checked_once_per_interval(self):
+        self.get(self.url)
+
+        _, _, replica = self.get(self.url)
+
+        self.assertEqual(replica, 1)
+
+    def test_header_reads_from_the_default_database(self):
+        response, default, replica = self.get(
+            self.url, HTTP_X_READ_PRIMARY="true"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(replica, 0)
+        self.assertEqual(default, 1)
+
+    def test_reads_after_a_write_are_pinned_to_the_default_database(self):
+        response = self.client.post(
+            reverse("plants-list"), {"name": "new-plant"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        _, default, replica = self.get(self.url)
+
+        self.assertEqual(replica, 0)
+        self.assertEqual(default, 1)
+
+    def test_failed_writes_do_not_pin_reads(self):
+        response = self.client.post(reverse("plants-list"), {})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @mock.patch("core.replica.replica_lag", return_value=31.0)
+    def test_lagging_replica_is_not_read(self, replica_lag):
+        _, default, replica = self.get(self.url)
+
+        self.assertEqual(replica, 0)
+        self.assertEqual(default, 1)
+
+    def test_unavailable_replica_is_not_read(self):
+        with mock.patch.object(
+            connections["replica"],
+            "cursor",
+            side_effect=OperationalError("connection refused"),
+        ):
+            self.assertIsNone(replica_lag("replica"))
+
+        _, default, replica = self.get(self.url)
+
+        self.assertEqual(replica, 0)
+        self.assertEqual(default, 1)
+
+    def test_writes_go_to_the_default_database(self):
+        router = ReplicaRouter()
+
+        with read_from("replica"):
+            self.assertEqual(router.db_for_read(Plant), "replica")
+            self.assertEqual(router.db_for_write(Plant), DEFAULT_DB_ALIAS)
+            # Later reads of the block see the write.
+            self.assertIsNone(router.db_for_read(Plant))
+
+        self.assertIsNone(router.db_for_read(Plant))
+
+
+class ReplicaDisabledTestCase(APITestCase):
+    def test_reads_use_the_default_database_without_replica(self):
+        plant = PlantFactory()
+
+        response = self.client.get(
+            reverse("datapoints-list", kwargs={"plant_id": str(plant.pk)})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,174 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from applications.plants.factories.plant import PlantFactory
+from applications.plants.models import DataPoint
+from applications.plants.monitoring import DataPointRecord
+from applications.plants.partitions import ensure_partitions
+from applications.plants.report_cache import ReportCache
+
+TEST_PREFIX = "test:reports"
+DAY = date(2024, 5, 10)
+PARAMS = {"page": "1"}
+
+
+class ReportCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = ReportCache(get_redis_connection("default"), TEST_PREFIX)
+        self.cache.clear()
+        self.compute = mock.Mock(side_effect=lambda: {"results": []})
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def report(self, first_day="2024-05-01", last_day="2024-05-31"):
+        return self.cache.get_or_compute(
+            PARAMS, first_day, last_day, self.compute
+        )
+
+    def test_reports_are_computed_once(self):
+        self.assertEqual(self.report(), {"results": []})
+        self.assertEqual(self.report(), {"results": []})
+
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_changes_of_a_day_of_the_range_invalidate_the_report(self):
+        self.report()
+
+        self.cache.invalidate([DAY])
+        self.report()
+
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_changes_outside_of_the_range_keep_the_report(self):
+        self.report()
+
+        self.cache.invalidate([DAY + timedelta(days=30)])
+        self.report()
+        self.cache.invalidate([DAY])
+        self.report(first_day=None, last_day="2024-05-09")
+
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_invalidating_every_day(self):
+        self.report(first_day=None, last_day=None)
+
+        self.cache.invalidate()
+        self.report(first_day=None, last_day=None)
+
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_concurrent_misses_wait_for_the_report(self):
+        self.cache.redis.set(self.cache.key("lock", PARAMS), 1)
+
+        def computed_meanwhile(seconds):
+            self.cache.set(PARAMS, 0, {"results": ["cached"]})
+
+        with mock.patch(
+            "applications.plants.report_cache.time.sleep",
+            side_effect=computed_meanwhile,
+        ) as sleep:
+            report = self.report()
+
+        self.assertEqual(report, {"results": ["cached"]})
+        self.assertEqual(sleep.call_count, 1)
+        self.compute.assert_not_called()
+
+    @override_settings(REPORT_CACHE_LOCK_TIMEOUT=0)
+    def test_misses_compute_the_report_once_the_lock_times_out(self):
+        self.cache.redis.set(self.cache.key("lock", PARAMS), 1)
+
+        self.assertEqual(self.report(), {"results": []})
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_failed_computations_release_the_lock(self):
+        self.compute.side_effect = ValueError
+
+        with self.assertRaises(ValueError):
+            self.report()
+
+        lock_key = self.cache.key("lock", PARAMS)
+        self.assertFalse(self.cache.redis.exists(lock_key))
+
+    @override_settings(REPORT_CACHE_TIMEOUT=0)
+    def test_cache_is_disabled_without_timeout(self):
+        self.report()
+        self.report()
+
+        self.assertEqual(self.compute.call_count, 2)
+
+
+class CachedReportsTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.start = datetime.combine(DAY, datetime.min.time(), timezone.utc)
+        ensure_partitions([cls.start])
+        cls.plant = PlantFactory()
+        cls.upsert(cls.start, 1.0)
+
+    @classmethod
+    def upsert(cls, timestamp, energy_expected):
+        DataPoint.objects.upsert(
+            [
+                DataPointRecord(
+                    cls.plant.pk, timestamp, energy_expected, 1.0, 1.0, 1.0
+                )
+            ]
+        )
+
+    def setUp(self):
+        ReportCache().clear()
+
+    def tearDown(self):
+        ReportCache().clear()
+
+    def get_report(self, **params):
+        response = self.client.get(reverse("reports-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"]
+
+    def test_cached_reports_do_not_query_the_database(self):
+        self.get_report()
+
+        with self.assertNumQueries(0):
+            (report,) = self.get_report()
+
+        self.assertEqual(report["energy_expected_sum"], 1.0)
+
+    def test_ingestion_invalidates_the_reports_of_its_days(self):
+        params = {"end_datetime": (self.start + timedelta(days=1)).isoformat()}
+        past_params = {
+            "end_datetime": (self.start - timedelta(hours=1)).isoformat()
+        }
+        self.get_report(**params)
+        self.get_report(**past_params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upsert(self.start + timedelta(hours=1), 2.0)
+
+        (report,) = self.get_report(**params)
+        self.assertEqual(report["energy_expected_sum"], 3.0)
+        with self.assertNumQueries(0):
+            self.get_report(**past_params)
+
+    def test_unchanged_data_keeps_the_reports(self):
+        self.get_report()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upsert(self.start, 1.0)
+
+        with self.assertNumQueries(0):
+            self.get_report()
+
+    def test_archived_plants_invalidate_every_report(self):
+        self.get_report()
+
+        self.plant.archive()
+
+        self.assertEqual(self.get_report(), [])
@@ -0,0 +1,376 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from applications.plants.factories.plant import DataPointFactory, PlantFactory
+from applications.plants.manager import start_of_day
+from applications.plants.models import DailyRollup, DataPoint, ReportSource
+from applications.plants.monitoring import DataPointRecord
+from applications.plants.partitions import ensure_partitions
+from applications.plants.serializers import ReportsSerializer
+from applications.plants.tasks import compact_datapoints
+
+DAY = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def random_record(plant, timestamp):
+    data_point = DataPointFactory.build(plant=plant)
+    return DataPointRecord(
+        plant.pk,
+        timestamp,
+        data_point.energy_expected,
+        data_point.energy_observed,
+        data_point.irradiation_expected,
+        data_point.irradiation_observed,
+    )
+
+
+class DailyRollupTestCase(TestCase):
+    def setUp(self):
+        ensure_partitions([DAY])
+        self.plant = PlantFactory()
+
+    def record(self, hour, energy_expected):
+        return DataPointRecord(
+            self.plant.pk,
+            DAY + timedelta(hours=hour),
+            energy_expected,
+            2.0,
+            3.0,
+            4.0,
+        )
+
+    def test_upsert_rolls_up_each_day(self):
+        DataPoint.objects.upsert(
+            [self.record(0, 1.0), self.record(23, 5.0), self.record(24, 7.0)]
+        )
+
+        first, second = self.plant.daily_rollups.order_by("day")
+        self.assertEqual(first.day, DAY.date())
+        self.assertEqual(first.datapoints, 2)
+        self.assertEqual(first.energy_expected_sum, 6.0)
+        self.assertEqual(first.energy_expected_min, 1.0)
+        self.assertEqual(first.energy_expected_max, 5.0)
+        self.assertEqual(first.irradiation_observed_sum, 8.0)
+        self.assertEqual(second.day, DAY.date() + timedelta(days=1))
+        self.assertEqual(second.datapoints, 1)
+
+    def test_updated_data_points_refresh_their_day(self):
+        DataPoint.objects.upsert([self.record(0, 1.0), self.record(1, 5.0)])
+        DataPoint.objects.upsert([self.record(1, 2.0)])
+
+        rollup = self.plant.daily_rollups.get()
+        self.assertEqual(rollup.datapoints, 2)
+        self.assertEqual(rollup.energy_expected_sum, 3.0)
+        self.assertEqual(rollup.energy_expected_max, 2.0)
+
+    def test_unchanged_data_points_do_not_refresh_rollups(self):
+        DataPoint.objects.upsert([self.record(0, 1.0)])
+
+        with self.assertNumQueries(1):
+            DataPoint.objects.upsert([self.record(0, 1.0)])
+
+    def test_saved_and_deleted_data_points_refresh_their_day(self):
+        data_point = DataPointFactory(plant=self.plant, datetime=DAY)
+        other = DataPointFactory(
+            plant=self.plant, datetime=DAY + timedelta(hours=1)
+        )
+        self.assertEqual(self.plant.daily_rollups.get().datapoints, 2)
+
+        other.delete()
+
+        rollup = self.plant.daily_rollups.get()
+        self.assertEqual(rollup.datapoints, 1)
+        self.assertEqual(
+            rollup.energy_expected_sum, data_point.energy_expected
+        )
+
+
+class ReportSourceTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ensure_partitions([DAY])
+        cls.plants = PlantFactory.create_batch(size=3)
+        for plant in cls.plants:
+            DataPoint.objects.upsert(
+                [
+                    random_record(plant, DAY + timedelta(hours=hours))
+                    for hours in range(0, 24 * 4, 3)
+                ]
+            )
+
+    def assertSameMetrics(self, start=None, end=None):
+        expected = DataPoint.objects.all()
+        if start is not None:
+            expected = expected.filter(datetime__gte=start)
+        if end is not None:
+            expected = expected.filter(datetime__lte=end)
+        expected = {
+            row.pop("plant_name"): row
+            for row in expected.annotate_metrics().order_by("plant_name")
+        }
+
+        response = self.client.get(
+            reverse("reports-list"),
+            {
+                key: value.isoformat()
+                for key, value in (
+                    ("start_datetime", start),
+                    ("end_datetime", end),
+                )
+                if value is not None
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {
+            row.pop("plant_name"): row for row in response.data["results"]
+        }
+        self.assertEqual(results.keys(), expected.keys())
+        for plant_name, metrics in expected.items():
+            for name, value in metrics.items():
+                self.assertAlmostEqual(
+                    results[plant_name][name], value, msg=name
+                )
+
+    def test_report_without_range(self):
+        self.assertSameMetrics()
+
+    def test_report_of_whole_days(self):
+        self.assertSameMetrics(
+            DAY + timedelta(days=1),
+            DAY + timedelta(days=3) - timedelta(microseconds=1),
+        )
+
+    def test_report_of_partial_days(self):
+        self.assertSameMetrics(
+            DAY + timedelta(hours=7), DAY + timedelta(days=2, hours=14)
+        )
+        self.assertSameMetrics(
+            DAY + timedelta(hours=7), DAY + timedelta(hours=20)
+        )
+
+    def test_report_with_a_single_bound(self):
+        self.assertSameMetrics(start=DAY + timedelta(days=1, hours=5))
+        self.assertSameMetrics(end=DAY + timedelta(days=2, hours=5))
+
+    def test_whole_days_are_read_from_rollups(self):
+        start = DAY + timedelta(hours=7)
+        end = DAY + timedelta(days=3, hours=2)
+
+        sources = ReportSource.objects.filter_datetime_range(start, end)
+
+        self.assertEqual(
+            sources.filter(is_rollup=True).count(), 2 * len(self.plants)
+        )
+        self.assertEqual(
+            set(
+                sources.filter(is_rollup=False).values_list(
+                    "datetime", flat=True
+                )
+            ),
+            {
+                DAY + timedelta(hours=hours)
+                for hours in (9, 12, 15, 18, 21, 72)
+            },
+        )
+        self.assertEqual(DailyRollup.objects.count(), 4 * len(self.plants))
+
+    def test_report_has_the_serializer_schema(self):
+        rows = ReportSource.objects.filter_datetime_range().annotate_metrics()
+        expected = json.loads(
+            JSONRenderer().render(ReportsSerializer(rows, many=True).data)
+        )
+
+        response = self.client.get(reverse("reports-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(response.json()["results"], expected)
+
+    def test_invalid_datetime(self):
+        response = self.client.get(
+            reverse("reports-list"), {"start_datetime": "yesterday"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CompactionTestCase(APITestCase):
+    def setUp(self):
+        self.now = datetime.now(tz=timezone.utc)
+        self.old_day = start_of_day(self.now - timedelta(days=40))
+        ensure_partitions([self.old_day, self.now])
+        self.plant = PlantFactory()
+        DataPoint.objects.upsert(
+            [
+                random_record(self.plant, day + timedelta(hours=hours))
+                for day in (self.old_day, start_of_day(self.now))
+                for hours in range(0, 24, 6)
+            ]
+        )
+        self.old_rollup = self.plant.daily_rollups.get(day=self.old_day)
+
+    def test_old_data_points_are_compacted_and_deleted(self):
+        summary = compact_datapoints(retention_days=30)
+
+        self.assertEqual(summary, {"compacted": 1, "deleted": 4})
+        self.assertEqual(self.plant.datapoints.count(), 4)
+        rollup = self.plant.daily_rollups.get(day=self.old_day)
+        self.assertTrue(rollup.is_compacted)
+        self.assertEqual(rollup.datapoints, 4)
+        self.assertAlmostEqual(
+            rollup.energy_expected_sum, self.old_rollup.energy_expected_sum
+        )
+        # Nothing is left to compact on the next run.
+        self.assertEqual(
+            compact_datapoints(retention_days=30),
+            {"compacted": 0, "deleted": 0},
+        )
+
+    @override_settings(DATAPOINT_COMPACTION_BATCH_SIZE=3)
+    def test_data_points_are_deleted_in_batches(self):
+        # Compaction in a transaction, then a select and a delete per
+        # batch and a last select finding no data points left.
+        with self.assertNumQueries(5 + 2 * 2 + 1):
+            summary = compact_datapoints(retention_days=30)
+
+        self.assertEqual(summary["deleted"], 4)
+
+    @override_settings(DATAPOINT_RAW_RETENTION_DAYS=0)
+    def test_compaction_is_disabled_without_retention(self):
+        self.assertEqual(compact_datapoints(), {"compacted": 0, "deleted": 0})
+        self.assertEqual(self.plant.datapoints.count(), 8)
+
+    def test_late_data_points_are_merged_into_compacted_rollups(self):
+        compact_datapoints(retention_days=30)
+        late = random_record(self.plant, self.old_day + timedelta(hours=1))
+        self.old_rollup.refresh_from_db()
+
+        DataPoint.objects.upsert([late])
+
+        rollup = self.plant.daily_rollups.get(day=self.old_day)
+        self.assertEqual(rollup.datapoints, 5)
+        self.assertAlmostEqual(
+            rollup.energy_expected_sum,
+            self.old_rollup.energy_expected_sum + late.energy_expected,
+        )
+        self.assertEqual(
+            rollup.energy_expected_min,
+            min(self.old_rollup.energy_expected_min, late.energy_expected),
+        )
+        self.assertEqual(
+            rollup.energy_expected_max,
+            max(self.old_rollup.energy_expected_max, late.energy_expected),
+        )
+        # The data point is not read twice, from itself and the rollup.
+        self.assertFalse(
+            self.plant.datapoints.filter(datetime=late.datetime).exists()
+        )
+        # And is still counted after the next compaction.
+        compact_datapoints(retention_days=30)
+        rollup = self.plant.daily_rollups.get(day=self.old_day)
+        self.assertEqual(rollup.datapoints, 5)
+        self.assertAlmostEqual(
+            rollup.energy_expected_sum,
+            self.old_rollup.energy_expected_sum + late.energy_expected,
+        )
+
+    def assert_old_rollup_unchanged(self):
+        rollup = self.plant.daily_rollups.get(day=self.old_day)
+        self.assertEqual(rollup.datapoints, self.old_rollup.datapoints)
+        self.assertEqual(
+            rollup.energy_expected_sum, self.old_rollup.energy_expected_sum
+        )
+        self.assertEqual(
+            rollup.energy_expected_max, self.old_rollup.energy_expected_max
+        )
+        self.assertFalse(
+            self.plant.datapoints.filter(
+                datetime__lt=self.old_day + timedelta(days=1)
+            ).exists()
+        )
+
+    def test_re_ingested_compacted_days_are_not_counted_twice(self):
+        compact_datapoints(retention_days=30)
+        self.old_rollup.refresh_from_db()
+        records = [
+            random_record(self.plant, self.old_day + timedelta(hours=hours))
+            for hours in range(0, 24, 6)
+        ]
+
+        for _ in range(2):
+            counters = DataPoint.objects.upsert(records)
+
+            self.assertEqual(
+                counters, {"created": 0, "updated": 0, "unchanged": 4}
+            )
+            self.assert_old_rollup_unchanged()
+
+    def test_data_points_of_covered_hours_are_not_merged(self):
+        compact_datapoints(retention_days=30)
+        self.old_rollup.refresh_from_db()
+        # Written without the upsert, at a covered hour and a second time
+        # in an hour that was not covered.
+        late = self.old_day + timedelta(hours=1)
+        DataPointFactory(
+            plant=self.plant, datetime=self.old_day + timedelta(minutes=30)
+        )
+        DataPointFactory(plant=self.plant, datetime=late)
+        DataPointFactory(
+            plant=self.plant, datetime=late + timedelta(minutes=30)
+        )
+
+        DailyRollup.objects.refresh([(self.plant.pk, self.old_day.date())])
+
+        rollup = self.plant.daily_rollups.get(day=self.old_day)
+        self.assertEqual(rollup.datapoints, 5)
+        self.assertEqual(
+            rollup.hours, 1 << 0 | 1 << 1 | 1 << 6 | 1 << 12 | 1 << 18
+        )
+        self.assertFalse(
+            self.plant.datapoints.filter(
+                datetime__lt=self.old_day + timedelta(days=1)
+            ).exists()
+        )
+
+    def test_reports_read_compacted_days_from_rollups(self):
+        start = self.old_day + timedelta(hours=7)
+        end = self.old_day + timedelta(hours=20)
+        params = {
+            "start_datetime": start.isoformat(),
+            "end_datetime": end.isoformat(),
+        }
+        compact_datapoints(retention_days=30)
+
+        response = self.client.get(reverse("reports-list"), params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        (report,) = response.data["results"]
+        self.assertAlmostEqual(
+            report["energy_expected_sum"],
+            self.old_rollup.energy_expected_sum,
+        )
+
+    def test_datapoint_list_shows_compacted_days(self):
+        compact_datapoints(retention_days=30)
+
+        response = self.client.get(
+            reverse("datapoints-list", kwargs={"plant_id": self.plant.pk})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 5)
+        compacted = [
+            row for row in response.data["results"] if row["datapoints"] > 1
+        ]
+        self.assertEqual(len(compacted), 1)
+        self.assertEqual(compacted[0]["datapoints"], 4)
+        self.assertAlmostEqual(
+            compacted[0]["energy_expected"],
+            self.old_rollup.energy_expected_sum,
+        )
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDay
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from applications.plants.downsampling import lttb
+from applications.plants.factories.plant import PlantFactory
+from applications.plants.models import DailyRollup, DataPoint
+from applications.plants.monitoring import DataPointRecord
+from applications.plants.partitions import ensure_partitions
+
+DAY = datetime(2024, 2, 27, tzinfo=timezone.utc)
+
+
+class PlantSeriesTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ensure_partitions([DAY, DAY + timedelta(days=3)])
+        cls.plant = PlantFactory()
+        DataPoint.objects.upsert(
+            [
+                DataPointRecord(
+                    cls.plant.pk, DAY + timedelta(hours=hours), 1, hours, 1, 1
+                )
+                for hours in range(0, 24 * 4, 2)
+            ]
+        )
+        cls.url = reverse("series-list", kwargs={"plant_id": cls.plant.pk})
+
+    def series(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"]
+
+    def test_daily_series(self):
+        start = DAY + timedelta(hours=5)
+        end = DAY + timedelta(days=2, hours=12)
+
+        series = self.series(
+            bucket="day",
+            start_datetime=start.isoformat(),
+            end_datetime=end.isoformat(),
+        )
+
+        expected = (
+            DataPoint.objects.filter(datetime__range=(start, end))
+            .values(bucket=TruncDay("datetime", tzinfo=timezone.utc))
+            .annotate(energy_observed_sum=Sum("energy_observed"))
+            .order_by("bucket")
+        )
+        self.assertEqual(
+            [(row["bucket"], row["energy_observed_sum"]) for row in series],
+            [(row["bucket"], row["energy_observed_sum"]) for row in expected],
+        )
+        self.assertEqual(series[0]["energy_expected_avg"], 1.0)
+
+    def test_hourly_series(self):
+        series = self.series(
+            bucket="hour",
+            start_datetime=DAY.isoformat(),
+            end_datetime=(DAY + timedelta(hours=23)).isoformat(),
+        )
+
+        self.assertEqual(len(series), 12)
+        self.assertEqual(series[1]["bucket"], DAY + timedelta(hours=2))
+        self.assertEqual(series[1]["energy_observed_sum"], 2.0)
+
+    def test_weekly_and_monthly_series(self):
+        weeks = self.series(bucket="week")
+        months = self.series(bucket="month")
+
+        # The 2024-02-26 week, then March.
+        self.assertEqual(
+            [row["bucket"] for row in weeks], [DAY - timedelta(days=1)]
+        )
+        self.assertEqual(
+            [row["bucket"] for row in months],
+            [DAY.replace(day=1), datetime(2024, 3, 1, tzinfo=timezone.utc)],
+        )
+        self.assertEqual(
+            sum(row["energy_observed_sum"] for row in months),
+            sum(range(0, 24 * 4, 2)),
+        )
+
+    def test_compacted_days_are_counted_in_their_first_hour(self):
+        DailyRollup.objects.compact(DAY.date() + timedelta(days=1))
+        DataPoint.objects.filter(
+            datetime__lt=DAY + timedelta(days=1)
+        ).delete_in_batches(100)
+
+        series = self.series(
+            bucket="hour", end_datetime=(DAY + timedelta(hours=23)).isoformat()
+        )
+
+        (row,) = series
+        self.assertEqual(row["bucket"], DAY)
+        self.assertEqual(row["energy_observed_sum"], sum(range(0, 24, 2)))
+
+    def test_downsampled_series(self):
+        series = self.series(bucket="hour")
+
+        downsampled = self.series(
+            bucket="hour", points=10, metric="energy_observed_sum"
+        )
+
+        self.assertEqual(len(series), 48)
+        self.assertEqual(len(downsampled), 10)
+        self.assertEqual(downsampled[0], series[0])
+        self.assertEqual(downsampled[-1], series[-1])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"bucket": "minute"},
+            {"points": 2},
+            {"metric": "energy_efficiency"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+
+        response = self.client.get(
+            reverse("series-list", kwargs={"plant_id": "invalid"})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LTTBTestCase(SimpleTestCase):
+    def test_keeps_the_ends_and_the_peaks(self):
+        rows = [(x, 10.0 if x in (30, 70) else 0.0) for x in range(100)]
+
+        sampled = lttb(rows, 6, x=lambda row: row[0], y=lambda row: row[1])
+
+        self.assertEqual(len(sampled), 6)
+        self.assertEqual(sampled[0], rows[0])
+        self.assertEqual(sampled[-1], rows[-1])
+        self.assertIn(rows[30], sampled)
+        self.assertIn(rows[70], sampled)
+        self.assertEqual(sampled, sorted(sampled))
+
+    def test_short_series_are_kept(self):
+        rows = [(x, x) for x in range(5)]
+
+        self.assertEqual(lttb(rows, 5, x=len, y=len), rows)
+        self.assertEqual(lttb(rows, 2, x=len, y=len), rows)
@@ -1,15 +1,31 @@
+from datetime import timedelta
 from unittest.mock import patch
 
 import requests
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from applications.plants.factories.plant import DataPointFactory, PlantFactory
-from applications.plants.models import DataPoint
-from applications.plants.tasks import fetch_monitoring_data
+from applications.plants.ledger import FailureLedger
+from applications.plants.models import DataPoint, Plant
+from applications.plants.monitoring import DataPointRecord
+from applications.plants.tasks import (
+    dispatch_monitoring_data_fetching,
+    fetch_monitoring_data,
+    retry_failed_ingestions,
+    summarize_monitoring_data,
+)
+from core.celery import app
 
 
+@override_settings(INGESTION_LEDGER_KEY_PREFIX="test:ingestion")
 class FetchMonitoringDataTestCase(TestCase):
+    def setUp(self):
+        FailureLedger().clear()
+
+    def tearDown(self):
+        FailureLedger().clear()
+
     @patch("applications.plants.tasks.make_request")
     def test_fetch_monitoring_data_success(self, mock_get):
         """
@@ -48,9 +64,75 @@ class FetchMonitoringDataTestCase(TestCase):
         self.assertEqual(float(datapoint.irradiation_observed), 31.5543806849)
 
     @patch("applications.plants.tasks.make_request")
-    def test_fetch_monitoring_data_retry_on_failure(self, mock_get):
+    def test_fetch_monitoring_data_for_multiple_plants(self, mock_get):
+        """
+        Test that fetch_monitoring_data fetches every active plant
+        and stores the data points of each one.
+        """
+        now = timezone.now().date()
+        mock_get.return_value = [
+            {
+                "datetime": now.strftime("%Y-%m-%dT%H:%M:%S"),
+                "expected": {"energy": 14.4, "irradiation": 49.7},
+                "observed": {"energy": 15.6, "irradiation": 31.5},
+            }
+        ]
+        plants = PlantFactory.create_batch(size=5)
+        PlantFactory(is_archived=True)
+
+        fetch_monitoring_data()
+
+        self.assertEqual(mock_get.call_count, len(plants))
+        for plant in plants:
+            self.assertEqual(plant.datapoints.count(), 1)
+
+    @patch("applications.plants.tasks.make_request")
+    def test_fetch_monitoring_data_resumes_from_watermark(self, mock_get):
         """
-        Test that fetch_monitoring_data retries when the API request fails.
+        Test that fetch_monitoring_data requests data from the plant
+        watermark, skips entries already stored and advances it.
+        """
+        now = timezone.now()
+        watermark = (now - timedelta(days=3)).replace(
+            hour=5, minute=0, second=0, microsecond=0
+        )
+        plant = PlantFactory(name="my-plant-id", last_ingested_at=watermark)
+        mock_get.return_value = [
+            {
+                "datetime": (watermark + timedelta(hours=hours)).strftime(
+                    "%Y-%m-%dT%H:%M:%S"
+                ),
+                "expected": {"energy": 14.4, "irradiation": 49.7},
+                "observed": {"energy": 15.6, "irradiation": 31.5},
+            }
+            for hours in (-1, 0, 1, 2)
+        ]
+
+        fetch_monitoring_data()
+
+        (url,), _ = mock_get.call_args
+        self.assertIn(f"from={watermark.strftime('%Y-%m-%d')}", url)
+        self.assertEqual(
+            list(
+                plant.datapoints.order_by("datetime").values_list(
+                    "datetime", flat=True
+                )
+            ),
+            [
+                watermark + timedelta(hours=1),
+                watermark + timedelta(hours=2),
+            ],
+        )
+        plant.refresh_from_db()
+        self.assertEqual(
+            plant.last_ingested_at, watermark + timedelta(hours=2)
+        )
+
+    @patch("applications.plants.tasks.make_request")
+    def test_fetch_monitoring_data_records_failure(self, mock_get):
+        """
+        Test that a failed request does not fail the task and records
+        the plant in the failure ledger instead.
         """
 
         # Simulate a network error or failed request
@@ -59,14 +141,17 @@ class FetchMonitoringDataTestCase(TestCase):
         )
 
         # Create a mock plant
-        PlantFactory(name="my-plant-id")
+        plant = PlantFactory(name="my-plant-id")
 
-        with self.assertRaises(requests.exceptions.RequestException):
-            fetch_monitoring_data()
+        summary = fetch_monitoring_data()
 
         mock_get.assert_called_once()
         # Check that no DataPoints are created
         self.assertEqual(DataPoint.objects.count(), 0)
+        self.assertEqual(summary["failed"], 1)
+        entry = FailureLedger().get(plant.pk)
+        self.assertEqual(entry.plant_name, plant.name)
+        self.assertEqual(entry.attempts, 1)
 
     @patch("applications.plants.tasks.make_request")
     def test_fetch_monitoring_data_update_existing_datapoint(self, mock_get):
@@ -120,3 +205,261 @@ class FetchMonitoringDataTestCase(TestCase):
         self.assertEqual(
             float(existing_datapoint.irradiation_observed), 31.5543806849
         )
+
+
+@override_settings(INGESTION_LEDGER_KEY_PREFIX="test:ingestion")
+class DispatchMonitoringDataFetchingTestCase(TestCase):
+    def setUp(self):
+        app.conf.task_always_eager = True
+
+    def tearDown(self):
+        app.conf.task_always_eager = False
+        FailureLedger().clear()
+
+    @patch("applications.plants.tasks.summarize_monitoring_data.run")
+    @patch("applications.plants.tasks.make_request")
+    def test_dispatch_fetches_plants_in_batches(self, mock_get, mock_summary):
+        """
+        Test that every active plant is fetched once, split in batches,
+        and that the batch results reach the chord callback.
+        """
+        mock_get.return_value = [
+            {
+                "datetime": timezone.now().strftime("%Y-%m-%dT%H:00:00"),
+                "expected": {"energy": 14.4, "irradiation": 49.7},
+                "observed": {"energy": 15.6, "irradiation": 31.5},
+            }
+        ]
+        plants = PlantFactory.create_batch(size=5)
+        PlantFactory(is_archived=True)
+
+        dispatch_monitoring_data_fetching(batch_size=2)
+
+        self.assertEqual(mock_get.call_count, len(plants))
+        self.assertEqual(DataPoint.objects.count(), len(plants))
+        (batch_summaries,), _ = mock_summary.call_args
+        self.assertEqual(
+            [
+                (summary["plants"], summary["created"])
+                for summary in batch_summaries
+            ],
+            [(2, 2), (2, 2), (1, 1)],
+        )
+
+    def test_summarize_monitoring_data(self):
+        summary = summarize_monitoring_data(
+            [
+                {
+                    "plants": 2,
+                    "datapoints": 48,
+                    "created": 24,
+                    "updated": 4,
+                    "unchanged": 20,
+                    "failed": 1,
+                },
+                {
+                    "plants": 1,
+                    "datapoints": 24,
+                    "created": 24,
+                    "updated": 0,
+                    "unchanged": 0,
+                    "failed": 0,
+                },
+            ]
+        )
+        self.assertEqual(
+            summary,
+            {
+                "batches": 2,
+                "plants": 3,
+                "datapoints": 72,
+                "created": 48,
+                "updated": 4,
+                "unchanged": 20,
+                "failed": 1,
+            },
+        )
+
+
+class UpsertDataPointsTestCase(TestCase):
+    def test_upsert_data_points_of_many_plants_in_one_query(self):
+        plants = PlantFactory.create_batch(size=3)
+        existing = DataPointFactory(plant=plants[0])
+        data_points = [
+            DataPoint(
+                plant=plant,
+                datetime=existing.datetime,
+                energy_expected=1.0,
+                energy_observed=2.0,
+                irradiation_expected=3.0,
+                irradiation_observed=4.0,
+            )
+            for plant in plants
+        ]
+
+        # One query for the data points and one for their daily rollups.
+        with self.assertNumQueries(2):
+            counters = DataPoint.objects.upsert(data_points)
+
+        self.assertEqual(
+            counters, {"created": 2, "updated": 1, "unchanged": 0}
+        )
+        self.assertEqual(DataPoint.objects.count(), len(plants))
+        existing.refresh_from_db()
+        self.assertEqual(existing.energy_expected, 1.0)
+        self.assertEqual(existing.irradiation_observed, 4.0)
+
+    def test_upsert_keeps_measurements_as_floats(self):
+        plant = PlantFactory()
+        measurements = (14.4380684864, -1.5e-3, 49.73438, 31.55438)
+        DataPoint.objects.upsert(
+            [DataPointRecord(plant.pk, timezone.now(), *measurements)]
+        )
+
+        stored = plant.datapoints.values_list(
+            "energy_expected",
+            "energy_observed",
+            "irradiation_expected",
+            "irradiation_observed",
+        ).get()
+
+        self.assertEqual(stored, measurements)
+        self.assertTrue(all(type(value) is float for value in stored))
+
+    def test_upsert_skips_unchanged_data_points(self):
+        existing = DataPointFactory()
+        data_point = DataPoint(
+            plant=existing.plant,
+            datetime=existing.datetime,
+            energy_expected=existing.energy_expected,
+            energy_observed=existing.energy_observed,
+            irradiation_expected=existing.irradiation_expected,
+            irradiation_observed=existing.irradiation_observed,
+        )
+        ctid = DataPoint.objects.extra(select={"ctid": "ctid"}).values_list(
+            "ctid", flat=True
+        )
+
+        before = ctid.get(pk=existing.pk)
+        counters = DataPoint.objects.upsert([data_point])
+
+        self.assertEqual(
+            counters, {"created": 0, "updated": 0, "unchanged": 1}
+        )
+        # The row was not rewritten to a new location.
+        self.assertEqual(ctid.get(pk=existing.pk), before)
+
+    def test_advance_ingestion_watermarks(self):
+        now = timezone.now()
+        behind = PlantFactory(last_ingested_at=now - timedelta(days=2))
+        ahead = PlantFactory(last_ingested_at=now)
+        new = PlantFactory()
+
+        with self.assertNumQueries(1):
+            Plant.objects.advance_ingestion_watermarks(
+                {
+                    behind.pk: now - timedelta(days=1),
+                    ahead.pk: now - timedelta(days=1),
+                    new.pk: now - timedelta(days=1),
+                }
+            )
+
+        for plant in (behind, ahead, new):
+            plant.refresh_from_db()
+        self.assertEqual(behind.last_ingested_at, now - timedelta(days=1))
+        self.assertEqual(ahead.last_ingested_at, now)
+        self.assertEqual(new.last_ingested_at, now - timedelta(days=1))
+
+
+@override_settings(INGESTION_LEDGER_KEY_PREFIX="test:ingestion")
+class RetryFailedIngestionsTestCase(TestCase):
+    def setUp(self):
+        self.ledger = FailureLedger()
+        self.ledger.clear()
+        self.now = timezone.now()
+        self.window = (self.now - timedelta(days=1), self.now)
+
+    def tearDown(self):
+        self.ledger.clear()
+
+    def record_failure(self, plant):
+        # Recorded a while ago, so the entry is already due.
+        self.ledger.record(
+            plant,
+            *self.window,
+            requests.exceptions.RequestException("API request failed"),
+            self.now - timedelta(days=1),
+        )
+
+    @patch("applications.plants.tasks.make_request")
+    def test_retry_only_fetches_failed_plants(self, mock_get):
+        mock_get.return_value = [
+            {
+                "datetime": self.now.strftime("%Y-%m-%dT%H:00:00"),
+                "expected": {"energy": 14.4, "irradiation": 49.7},
+                "observed": {"energy": 15.6, "irradiation": 31.5},
+            }
+        ]
+        failed = PlantFactory()
+        PlantFactory()
+        self.record_failure(failed)
+
+        summary = retry_failed_ingestions()
+
+        mock_get.assert_called_once()
+        (url,), _ = mock_get.call_args
+        self.assertIn(f"plant-id={failed.name}", url)
+        self.assertEqual(summary["created"], 1)
+        self.assertEqual(failed.datapoints.count(), 1)
+        self.assertIsNone(self.ledger.get(failed.pk))
+
+    @patch("applications.plants.tasks.make_request")
+    def test_retry_backs_off_after_failure(self, mock_get):
+        mock_get.side_effect = requests.exceptions.RequestException(
+            "API request failed"
+        )
+        plant = PlantFactory()
+        self.record_failure(plant)
+
+        retry_failed_ingestions()
+        # The next attempt is not due yet.
+        retry_failed_ingestions()
+
+        mock_get.assert_called_once()
+        self.assertEqual(self.ledger.get(plant.pk).attempts, 2)
+
+    @override_settings(INGESTION_RETRY_MAX_ATTEMPTS=2)
+    @patch("applications.plants.tasks.make_request")
+    def test_plant_is_dead_lettered_after_max_attempts(self, mock_get):
+        mock_get.side_effect = requests.exceptions.RequestException(
+            "API request failed"
+        )
+        plant = PlantFactory()
+        self.record_failure(plant)
+
+        retry_failed_ingestions()
+
+        self.assertIsNone(self.ledger.get(plant.pk))
+        self.assertEqual(
+            [entry.plant_id for entry in self.ledger.dead_letters()],
+            [str(plant.pk)],
+        )
+
+    @override_settings(INGESTION_RETRY_MAX_ATTEMPTS=1)
+    @patch("applications.plants.tasks.make_request")
+    def test_recovered_plant_leaves_dead_letters(self, mock_get):
+        mock_get.return_value = [
+            {
+                "datetime": self.now.strftime("%Y-%m-%dT%H:00:00"),
+                "expected": {"energy": 14.4, "irradiation": 49.7},
+                "observed": {"energy": 15.6, "irradiation": 31.5},
+            }
+        ]
+        plant = PlantFactory()
+        self.record_failure(plant)
+        self.assertEqual(len(self.ledger.dead_letters()), 1)
+
+        fetch_monitoring_data()
+
+        self.assertEqual(plant.datapoints.count(), 1)
+        self.assertEqual(self.ledger.dead_letters(), [])
@@ -1,6 +1,16 @@
 from rest_framework.routers import DefaultRouter
 
-from .viewsets import PlantDataPointViewSet, PlantViewSet, ReportsViewSet
+from .viewsets import (
+    BackfillViewSet,
+    DatabaseConnectionsViewSet,
+    DataPointBatchViewSet,
+    DataPointExportViewSet,
+    MonitoringClientViewSet,
+    PlantDataPointViewSet,
+    PlantSeriesViewSet,
+    PlantViewSet,
+    ReportsViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"plants", PlantViewSet, basename="plants")
@@ -9,5 +19,23 @@ router.register(
     PlantDataPointViewSet,
     basename="datapoints",
 )
+router.register(
+    r"plants/(?P<plant_id>[-\w]+)/series",
+    PlantSeriesViewSet,
+    basename="series",
+)
+router.register(
+    r"datapoints/export",
+    DataPointExportViewSet,
+    basename="datapoints-export",
+)
+router.register(
+    r"datapoints/batch",
+    DataPointBatchViewSet,
+    basename="datapoints-batch",
+)
 router.register(r"reports", ReportsViewSet, basename="reports")
+router.register(r"backfills", BackfillViewSet, basename="backfills")
+router.register(r"monitoring", MonitoringClientViewSet, basename="monitoring")
+router.register(r"database", DatabaseConnectionsViewSet, basename="database")
 urlpatterns = router.urls
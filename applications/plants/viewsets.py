@@ -1,5 +1,12 @@
 import uuid
+from datetime import timezone
+from functools import partial
+from operator import itemgetter
 
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.http import StreamingHttpResponse
 from rest_framework import filters, status
 from rest_framework.decorators import action
 from rest_framework.mixins import (
@@ -9,21 +16,49 @@ from rest_framework.mixins import (
     RetrieveModelMixin,
     UpdateModelMixin,
 )
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
-from rest_framework.viewsets import GenericViewSet
+from rest_framework.viewsets import GenericViewSet, ViewSet
 
-from applications.plants.filters import ReportsFilterBackend
-from applications.plants.mixins import SerializerActionClassMixin
-from applications.plants.pagination import PageNumberPagination
-from applications.plants.tasks import execute_fetching_in_background
+from applications.plants.client import get_client
+from applications.plants.downsampling import lttb
+from applications.plants.exports import (
+    CONTENT_TYPES,
+    async_export_stream,
+    export_stream,
+)
+from applications.plants.filters import (
+    ReportsFilterBackend,
+    parse_datetime_param,
+)
+from applications.plants.mixins import (
+    ReplicaReadMixin,
+    SerializerActionClassMixin,
+    ValuesListMixin,
+)
+from applications.plants.pagination import (
+    DataPointCursorPagination,
+    PageNumberPagination,
+)
+from applications.plants.report_cache import ReportCache
+from applications.plants.tasks import (
+    execute_backfill_in_background,
+    execute_fetching_in_background,
+)
+from core.postgresql.base import connection_metrics, server_connections
+from core.renderers import FastJSONRenderer
 
-from .models import DataPoint, Plant
+from .models import Backfill, DataPoint, Plant, ReportSource
 from .serializers import (
+    BackfillSerializer,
+    DataPointBatchSerializer,
+    DataPointExportSerializer,
     DataPointSerializer,
     PlantDataPointSerializer,
     PlantSerializer,
     ReportsSerializer,
+    SeriesSerializer,
 )
 
 
@@ -65,7 +100,7 @@ class PlantViewSet(
 
         Assuming that plant exists.
         Steps:
-        - Retrieve plant_id (Could also include from and to)
+        - Retrieve plant_id
         - Pass arguments into a function that submits
           a shared celery task and run in the background
         - Perform pulling of data and update or create
@@ -75,6 +110,9 @@ class PlantViewSet(
         monitoring service creates on the fly when asking
         for future dates.
 
+        When `from_date` and `to_date` are given, a backfill
+        of the plant over that range is started instead.
+
         TODO:
         - A similar action (or adjust this) that could support bulk actions.
           Accept a list of plant_ids and perform celery task.
@@ -82,6 +120,22 @@ class PlantViewSet(
         - Add flower for dev visibility.
         """
         plant = self.get_object()
+        if "from_date" in request.data or "to_date" in request.data:
+            serializer = BackfillSerializer(
+                data={
+                    "plants": [plant.pk],
+                    "from_date": request.data.get("from_date"),
+                    "to_date": request.data.get("to_date"),
+                }
+            )
+            serializer.is_valid(raise_exception=True)
+            backfill = serializer.save()
+            task_id = execute_backfill_in_background(backfill)
+            return Response(
+                data={"task_id": task_id, "backfill_id": str(backfill.id)},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
         task_id = execute_fetching_in_background([plant.name])
 
         return Response(
@@ -90,6 +144,8 @@ class PlantViewSet(
 
 
 class PlantDataPointViewSet(
+    ReplicaReadMixin,
+    ValuesListMixin,
     ListModelMixin,
     RetrieveModelMixin,
     SerializerActionClassMixin,
@@ -101,9 +157,17 @@ class PlantDataPointViewSet(
 
     queryset = DataPoint.objects.select_related("plant").filter_active()
     serializer_class = PlantDataPointSerializer
-    pagination_class = PageNumberPagination
     serializer_action_classes = {"retrieve": DataPointSerializer}
 
+    @property
+    def pagination_class(self):
+        """
+        Keyset pagination, or page numbers when a `page` is requested.
+        """
+        if "page" in self.request.query_params:
+            return PageNumberPagination
+        return DataPointCursorPagination
+
     def get_queryset(self):
         if self.action == "list":
             if plant_id := self.kwargs.get("plant_id"):
@@ -117,15 +181,179 @@ class PlantDataPointViewSet(
                         "Valid Plant id is required."
                     ) from err
                 else:
-                    return self.queryset.for_datapoint_list(plant_id)
+                    # Compacted days are only left in the daily rollups.
+                    queryset = ReportSource.objects.filter_active()
+                    return queryset.for_datapoint_list(plant_id)
             raise ValidationError("Plant id is required.")
         if self.action == "retrieve":
             return self.queryset.for_datapoint_retrieval()
         return super().get_queryset()
 
 
-class ReportsViewSet(ListModelMixin, GenericViewSet):
-    queryset = DataPoint.objects.select_related("plant").annotate_metrics()
+class DataPointExportViewSet(ReplicaReadMixin, GenericViewSet):
+    """
+    Viewset for streaming exports of data points.
+    """
+
+    queryset = ReportSource.objects.filter_active()
+    serializer_class = DataPointExportSerializer
+
+    def list(self, request, *args, **kwargs):
+        """
+        Stream the data points of the `plants` (comma separated ids, every
+        plant when omitted) between `start_datetime` and `end_datetime` as
+        NDJSON or CSV (`file_format`), ordered by plant and datetime.
+        """
+        plants = [
+            plant_id
+            for value in request.query_params.getlist("plants")
+            for plant_id in value.split(",")
+            if plant_id
+        ]
+        serializer = self.get_serializer(
+            data={
+                **request.query_params.dict(),
+                **({"plants": plants} if plants else {}),
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        queryset = self.get_queryset().for_datapoint_export(
+            params.get("plants"),
+            params.get("start_datetime"),
+            params.get("end_datetime"),
+        )
+        # Rows are read while the response is streamed, after `dispatch`
+        # returned, so the database routed to has to be pinned now.
+        queryset = queryset.using(queryset.db)
+        file_format = params["file_format"]
+        stream = (
+            async_export_stream
+            if isinstance(request._request, ASGIRequest)
+            else export_stream
+        )
+        chunk_size = settings.DATAPOINT_EXPORT_CHUNK_SIZE
+        response = StreamingHttpResponse(
+            stream(queryset, file_format, chunk_size),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="datapoints.{file_format}"'
+        )
+        return response
+
+
+class DataPointBatchViewSet(ReplicaReadMixin, GenericViewSet):
+    """
+    Viewset for querying the data points of many plants at once.
+    """
+
+    queryset = ReportSource.objects.all()
+    serializer_class = DataPointBatchSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    # Queries are sent with POST for long lists of plants to fit, they
+    # do not write anything.
+    read_only = True
+
+    def create(self, request, *args, **kwargs):
+        """
+        Latest data points of each of the `plants` between
+        `start_datetime` and `end_datetime`, newest first and at most
+        `limit` per plant, read with a single query.
+
+        Plants with more data points have a `next` cursor, continuing
+        them when passed in `cursors`.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        limit, cursors = params["limit"], params["cursors"]
+
+        # One more data point tells whether a plant has more.
+        rows = self.get_queryset().latest_per_plant(
+            params["plants"],
+            limit + 1,
+            params.get("start_datetime"),
+            params.get("end_datetime"),
+            cursors,
+        )
+
+        pagination = DataPointCursorPagination()
+        plant_rows = {plant_id: [] for plant_id in params["plants"]}
+        for row in rows:
+            plant_rows[row["plant_id"]].append(row)
+        results = [
+            {
+                "plant_id": plant_id,
+                "next": (
+                    pagination.encode_cursor(rows[limit - 1])
+                    if len(rows) > limit
+                    else None
+                ),
+                "results": rows[:limit],
+            }
+            for plant_id, rows in plant_rows.items()
+        ]
+        return Response(data={"results": results})
+
+
+class PlantSeriesViewSet(ReplicaReadMixin, GenericViewSet):
+    """
+    Viewset for the metrics series of a plant, for charts.
+    """
+
+    queryset = ReportSource.objects.filter_active()
+    serializer_class = SeriesSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def list(self, request, *args, **kwargs):
+        """
+        Metrics of the plant per `bucket` (hour, day, week or month) between
+        `start_datetime` and `end_datetime`, computed in SQL.
+
+        With `points`, long series are downsampled with LTTB to that many
+        buckets, keeping the peaks and drops of the `metric`.
+        """
+        plant_id = self.kwargs["plant_id"]
+        try:
+            uuid.UUID(plant_id)
+        except ValueError as err:
+            raise ValidationError("Valid Plant id is required.") from err
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        rows = list(
+            self.get_queryset()
+            .filter(plant_id=plant_id)
+            .series(
+                params["bucket"],
+                params.get("start_datetime"),
+                params.get("end_datetime"),
+            )
+        )
+        if "points" in params:
+            rows = lttb(
+                rows,
+                params["points"],
+                x=lambda row: row["bucket"].timestamp(),
+                y=itemgetter(params["metric"]),
+            )
+        return Response(data={"bucket": params["bucket"], "results": rows})
+
+
+class ReportsViewSet(
+    ReplicaReadMixin, ValuesListMixin, ListModelMixin, GenericViewSet
+):
+    """
+    Viewset for the metrics of each plant over a datetime range.
+
+    Whole days of the range are read from the daily rollups and only the
+    partial days at its edges from the data points.
+    """
+
+    queryset = ReportSource.objects.annotate_metrics()
     serializer_class = ReportsSerializer
     pagination_class = PageNumberPagination
     filter_backends = [
@@ -136,3 +364,108 @@ class ReportsViewSet(ListModelMixin, GenericViewSet):
     search_fields = ["plant_name"]
     ordering_fields = ["plant_name"]
     ordering = ["plant_name"]
+
+    def list(self, request, *args, **kwargs):
+        """
+        Reports are cached under their normalized query parameters until
+        data of the days of their range changes, see `ReportCache`.
+        """
+        start, end = (
+            value and value.astimezone(timezone.utc)
+            for value in (
+                parse_datetime_param(request, "start_datetime"),
+                parse_datetime_param(request, "end_datetime"),
+            )
+        )
+        query_params = request.query_params
+        params = {
+            # Pagination links are absolute.
+            "host": request.get_host(),
+            "start_datetime": start and start.isoformat(),
+            "end_datetime": end and end.isoformat(),
+            "search": query_params.get("search", "").strip(),
+            "ordering": query_params.get("ordering", ""),
+            "show_archived": (
+                query_params.get("show_archived", "false").lower() == "true"
+            ),
+            "page": query_params.get("page", "1"),
+            "page_size": query_params.get("page_size", ""),
+        }
+        report = partial(super().list, request, *args, **kwargs)
+        data = ReportCache().get_or_compute(
+            params,
+            start and start.date().isoformat(),
+            end and end.date().isoformat(),
+            lambda: report().data,
+        )
+        return Response(data)
+
+
+class BackfillViewSet(
+    ListModelMixin,
+    RetrieveModelMixin,
+    CreateModelMixin,
+    GenericViewSet,
+):
+    """
+    Viewset for starting historical backfills and querying their progress.
+    """
+
+    queryset = (
+        Backfill.objects.prefetch_related("plants")
+        .annotate_progress()
+        .order_by("-created_at")
+    )
+    serializer_class = BackfillSerializer
+    pagination_class = PageNumberPagination
+
+    def perform_create(self, serializer):
+        backfill = serializer.save()
+        execute_backfill_in_background(backfill)
+
+    @action(
+        detail=True, methods=["POST"], url_name="resume", url_path="resume"
+    )
+    def resume(self, request, *args, **kwargs):
+        """
+        Action for resuming a backfill.
+        Only the chunks that are not completed are fetched again.
+        """
+        backfill = self.get_object()
+        task_id = execute_backfill_in_background(backfill)
+
+        return Response(
+            data={"task_id": task_id}, status=status.HTTP_202_ACCEPTED
+        )
+
+
+class MonitoringClientViewSet(ViewSet):
+    """
+    Viewset for inspecting the client of the monitoring service.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """
+        State of the circuit breaker, the shared rate limit and the
+        concurrency limit of every worker.
+        """
+        return Response(data=get_client().state())
+
+
+class DatabaseConnectionsViewSet(ViewSet):
+    """
+    Viewset for inspecting the database connections.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """
+        Connections of the database server and connection metrics of
+        every web and Celery process.
+        """
+        connection_metrics.publish(force=True)
+        return Response(
+            data={
+                "server": server_connections(connection),
+                "processes": connection_metrics.state(),
+            }
+        )
@@ -0,0 +1,80 @@
+"""
+Rendering throughput of data point list rows through the serializer and
+the DRF renderer (previous), and of the `.values()` rows rendered as they
+are by the DRF renderer and by orjson (current).
+
+Rows are built in memory with the keys and value types of
+`ReportSource.objects.for_datapoint_list`, so only the rendering is
+measured.
+
+    python -m benchmarks.datapoint_rendering [rows]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from applications.plants.identifiers import uuid7  # noqa: E402
+from applications.plants.serializers import (  # noqa: E402
+    PlantDataPointSerializer,
+)
+from core import renderers  # noqa: E402
+
+
+def datapoint_rows(count: int) -> list:
+    plant_id = uuid7()
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": uuid7(),
+            "energy_expected": random.random() * 100,
+            "energy_observed": random.random() * 100,
+            "irradiation_expected": random.random() * 100,
+            "irradiation_observed": random.random() * 100,
+            "datetime": start + timedelta(hours=index),
+            "datapoints": 1,
+            "plant_id": plant_id,
+            "plant_name": "plant-1",
+        }
+        for index in range(count)
+    ]
+
+
+def best_of(repeat: int, function) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rows = datapoint_rows(count)
+    paths = {
+        "serializer": lambda: JSONRenderer().render(
+            PlantDataPointSerializer(rows, many=True).data
+        ),
+        "values, json": lambda: JSONRenderer().render(rows),
+        "values, orjson": lambda: renderers.FastJSONRenderer().render(rows),
+    }
+
+    repeat = max(5, 100_000 // count)
+    print(f"{count} rows per response")
+    for path, render in paths.items():
+        rows_per_second = count / best_of(repeat, render)
+        print(f"{path:>20}{rows_per_second:>14,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
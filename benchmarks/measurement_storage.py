@@ -0,0 +1,138 @@
+"""
+Row width, aggregate speed and Python allocations of the data point
+measurements stored as numeric(15, 10) (previous) and as double
+precision (current).
+
+Each layout is loaded in a temporary table with the same columns as the
+data points table, so it does not touch the stored data.
+
+    python -m benchmarks.measurement_storage [rows]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+LAYOUTS = {
+    "numeric": "numeric(15, 10)",
+    "float8": "double precision",
+}
+
+MEASUREMENTS = (
+    "energy_expected",
+    "energy_observed",
+    "irradiation_expected",
+    "irradiation_observed",
+)
+
+
+def create_table(cursor, name: str, column_type: str, rows: int):
+    columns = ", ".join(f"{column} {column_type}" for column in MEASUREMENTS)
+    values = ", ".join(
+        f"round((random() * 100)::numeric, 10)::{column_type}"
+        for _ in MEASUREMENTS
+    )
+    cursor.execute(
+        f"""
+        CREATE TEMPORARY TABLE {name} (
+            id uuid NOT NULL,
+            plant_id integer NOT NULL,
+            datetime timestamp with time zone NOT NULL,
+            {columns}
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {name}
+        SELECT
+            gen_random_uuid(),
+            series %% 1000,
+            now() - series * interval '1 hour',
+            {values}
+        FROM generate_series(1, %s) AS series
+        """,
+        [rows],
+    )
+    cursor.execute(f"VACUUM ANALYZE {name}")
+
+
+def best_of(repeat: int, function) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure(cursor, name: str) -> dict:
+    cursor.execute(
+        f"""
+        SELECT avg(pg_column_size({name}.*)),
+               pg_total_relation_size('{name}')
+        FROM {name}
+        """
+    )
+    row_width, table_size = cursor.fetchone()
+
+    sums = ", ".join(f"sum({column})" for column in MEASUREMENTS)
+    averages = ", ".join(f"avg({column})" for column in MEASUREMENTS)
+
+    def aggregate():
+        cursor.execute(
+            f"SELECT plant_id, {sums}, {averages} "
+            f"FROM {name} GROUP BY plant_id"
+        )
+        cursor.fetchall()
+
+    def fetch():
+        cursor.execute(f"SELECT {', '.join(MEASUREMENTS)} FROM {name}")
+        return cursor.fetchall()
+
+    fetch_time = best_of(3, fetch)
+    tracemalloc.start()
+    rows = fetch()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "row width (bytes)": float(row_width),
+        "table size (MiB)": table_size / 2**20,
+        "aggregate (ms)": best_of(5, aggregate) * 1000,
+        "fetch (ms)": fetch_time * 1000,
+        "python (bytes/row)": allocated / len(rows),
+    }
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{rows} rows")
+    with connection.cursor() as cursor:
+        results = {}
+        for layout, column_type in LAYOUTS.items():
+            name = f"benchmark_{layout}"
+            create_table(cursor, name, column_type, rows)
+            results[layout] = measure(cursor, name)
+            cursor.execute(f"DROP TABLE {name}")
+
+    print(f"{'':>20}" + "".join(f"{layout:>12}" for layout in results))
+    for metric in results["numeric"]:
+        print(
+            f"{metric:>20}"
+            + "".join(
+                f"{result[metric]:>12,.1f}" for result in results.values()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Records/sec of decoding monitoring service responses.
+
+Compares the previous path (DRF serializer validation of the response
+followed by a second pass with `parse_datetime`) to `decode_entries`.
+
+    python -m benchmarks.monitoring_decoder [plants]
+"""
+
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.utils.dateparse import parse_datetime  # noqa: E402
+from rest_framework import serializers  # noqa: E402
+
+from applications.plants.monitoring import decode_entries  # noqa: E402
+
+
+class MonitoringServiceSerializer(serializers.Serializer):
+    datetime = serializers.DateTimeField()
+    expected = serializers.DictField(child=serializers.FloatField())
+    observed = serializers.DictField(child=serializers.FloatField())
+
+
+def previous_path(plant_id, data):
+    serializer = MonitoringServiceSerializer(data=data, many=True)
+    serializer.is_valid()
+
+    records = []
+    for entry in data:
+        datetime_str = entry.get("datetime")
+        expected = entry.get("expected", {})
+        observed = entry.get("observed", {})
+        if datetime_str and expected and observed:
+            timestamp = parse_datetime(datetime_str).replace(
+                tzinfo=timezone.utc
+            )
+            records.append(
+                (
+                    plant_id,
+                    timestamp,
+                    expected.get("energy"),
+                    observed.get("energy"),
+                    expected.get("irradiation"),
+                    observed.get("irradiation"),
+                )
+            )
+    return records
+
+
+def fast_path(plant_id, data):
+    return list(decode_entries(plant_id, data))
+
+
+def response(day: datetime):
+    return [
+        {
+            "datetime": (day + timedelta(hours=hour)).strftime(
+                "%Y-%m-%dT%H:%M:%S"
+            ),
+            "expected": {"energy": 14.4380684864, "irradiation": 49.73438},
+            "observed": {"energy": 15.6980684864, "irradiation": 31.55438},
+        }
+        for hour in range(24)
+    ]
+
+
+def run(name, decode, responses):
+    start = time.perf_counter()
+    records = sum(len(decode(plant_id, data)) for plant_id, data in responses)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {records / elapsed:>12,.0f} records/sec")
+
+
+def main():
+    plants = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    day = datetime(2024, 1, 1)
+    responses = [(uuid.uuid4(), response(day)) for _ in range(plants)]
+    print(f"{plants} plants, {plants * 24} records")
+    run("previous", previous_path, responses)
+    run("fast", fast_path, responses)
+
+
+if __name__ == "__main__":
+    main()
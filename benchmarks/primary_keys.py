@@ -0,0 +1,134 @@
+"""
+Bulk insert throughput and primary key index size of data points keyed
+by random `uuid4` (previous) and time-ordered `uuid7` (current) ids.
+
+Each key kind is loaded in a temporary table with the same columns and
+primary key as the data points table, already holding `rows` data
+points, so it does not touch the stored data.
+
+    python -m benchmarks.primary_keys [rows] [inserted]
+"""
+
+import os
+import sys
+import time
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from applications.plants.identifiers import uuid7  # noqa: E402
+
+BATCH_SIZE = 1000
+
+KEYS = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+
+def existing_ids(kind: str, rows: int) -> list:
+    if kind == "uuid4":
+        return [uuid.uuid4() for _ in range(rows)]
+    # Existing rows were keyed in the past, one millisecond apart.
+    now = time.time_ns() // 1_000_000
+    return [uuid7(milliseconds=now - rows + index) for index in range(rows)]
+
+
+def create_table(cursor, name: str, ids: list):
+    cursor.execute(
+        f"""
+        CREATE TEMPORARY TABLE {name} (
+            id uuid NOT NULL PRIMARY KEY,
+            plant_id integer NOT NULL,
+            datetime timestamp with time zone NOT NULL,
+            energy_expected double precision NOT NULL,
+            energy_observed double precision NOT NULL,
+            irradiation_expected double precision NOT NULL,
+            irradiation_observed double precision NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {name}
+        SELECT
+            ids.id,
+            series %% 1000,
+            now() - series * interval '1 hour',
+            random(), random(), random(), random()
+        FROM unnest(%s::uuid[]) WITH ORDINALITY AS ids (id, series)
+        """,
+        [ids],
+    )
+    cursor.execute(f"VACUUM ANALYZE {name}")
+
+
+def insert(cursor, name: str, new_id, inserted: int) -> float:
+    """
+    Insert in batches like the ingestion, with keys generated by the
+    application. Other columns are generated by the database, so the
+    timing is dominated by the index maintenance.
+    """
+    elapsed = 0
+    for offset in range(0, inserted, BATCH_SIZE):
+        ids = [new_id() for _ in range(min(BATCH_SIZE, inserted - offset))]
+        start = time.perf_counter()
+        cursor.execute(
+            f"""
+            INSERT INTO {name}
+            SELECT
+                ids.id,
+                ids.series %% 1000,
+                now() + (%s + ids.series) * interval '1 hour',
+                random(), random(), random(), random()
+            FROM unnest(%s::uuid[]) WITH ORDINALITY AS ids (id, series)
+            """,
+            [offset, ids],
+        )
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def measure(cursor, name: str, new_id, inserted: int) -> dict:
+    elapsed = insert(cursor, name, new_id, inserted)
+    cursor.execute(
+        f"SELECT pg_relation_size('{name}_pkey'), pg_relation_size('{name}')"
+    )
+    index_size, table_size = cursor.fetchone()
+    return {
+        "inserts (rows/s)": inserted / elapsed,
+        "pkey size (MiB)": index_size / 2**20,
+        "table size (MiB)": table_size / 2**20,
+    }
+
+
+def main():
+    arguments = [int(value) for value in sys.argv[1:]]
+    rows = arguments[0] if arguments else 1_000_000
+    inserted = arguments[1] if len(arguments) > 1 else 200_000
+    print(f"{rows} existing rows, {inserted} inserted rows")
+    with connection.cursor() as cursor:
+        results = {}
+        for kind, new_id in KEYS.items():
+            name = f"benchmark_{kind}"
+            create_table(cursor, name, existing_ids(kind, rows))
+            results[kind] = measure(cursor, name, new_id, inserted)
+            cursor.execute(f"DROP TABLE {name}")
+
+    print(f"{'':>20}" + "".join(f"{kind:>12}" for kind in results))
+    for metric in results["uuid4"]:
+        print(
+            f"{metric:>20}"
+            + "".join(
+                f"{result[metric]:>12,.1f}" for result in results.values()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
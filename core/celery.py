@@ -24,10 +24,26 @@ app.autodiscover_tasks()
 
 app.conf.beat_schedule = {
     "task_to_pull_data_from_monitoring_service": {
-        "task": "applications.plants.tasks.fetch_monitoring_data",
+        "task": "applications.plants.tasks.dispatch_monitoring_data_fetching",
         # Execute everyday at 1am.
         "schedule": crontab(hour=1, minute=0),
         # For testing purpose. Execute every 2 minutes.
         # "schedule": crontab(minute="*/2"),
     },
+    "task_to_retry_failed_monitoring_data_fetching": {
+        "task": "applications.plants.tasks.retry_failed_ingestions",
+        # Execute every 5 minutes, plants are only retried
+        # once their backoff has elapsed.
+        "schedule": crontab(minute="*/5"),
+    },
+    "task_to_manage_datapoint_partitions": {
+        "task": "applications.plants.tasks.manage_datapoint_partitions",
+        # Execute everyday at midnight, before the data ingestion.
+        "schedule": crontab(hour=0, minute=0),
+    },
+    "task_to_compact_datapoints": {
+        "task": "applications.plants.tasks.compact_datapoints",
+        # Execute everyday at 3am, after the data ingestion.
+        "schedule": crontab(hour=3, minute=0),
+    },
 }
@@ -0,0 +1,191 @@
+"""
+PostgreSQL backend with a connection pool per process.
+
+Django 4.2 has no connection pool: every thread opens its own connection,
+and the ASGI server runs each request in a new thread, so connections
+could only be closed after every request. With `OPTIONS["pool"]` (the
+keyword arguments of `psycopg_pool.ConnectionPool`, as in Django 5.1),
+connecting takes a connection from the pool of the process and closing
+returns it, so requests and Celery tasks reuse the same few connections.
+
+The statistics of the pools are published in Redis, so the pools of every
+web and Celery process can be inspected.
+"""
+
+import json
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from django_redis import get_redis_connection
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+from redis.exceptions import RedisError
+
+from core.postgresql.creation import DatabaseCreation
+from core.postgresql.pool import connection_pools, connection_pools_lock
+
+
+class ConnectionMetrics:
+    """
+    Statistics of the connection pools of the current process per database
+    alias, published in a Redis hash at most every `publish_interval`
+    seconds, so the pools of every web and Celery process can be inspected
+    without a Redis write per request.
+    """
+
+    def __init__(self, key: str, publish_interval: float, pools: dict):
+        self.key = key
+        self.publish_interval = publish_interval
+        self.pools = pools
+        self.reset()
+
+    def reset(self):
+        self.published_at = 0.0
+
+    def snapshot(self) -> dict:
+        aliases = {}
+        for alias, pool in list(self.pools.items()):
+            stats = pool.get_stats()
+            # Counters are only present once incremented.
+            checkouts = stats.get("requests_num", 0)
+            opened = stats.get("connections_num", 0)
+            aliases[alias] = {
+                **stats,
+                "reuse_ratio": 1 - opened / checkouts if checkouts else None,
+                "connect_ms_avg": (
+                    stats.get("connections_ms", 0) / opened if opened else None
+                ),
+                "wait_ms_avg": (
+                    stats.get("requests_wait_ms", 0) / checkouts
+                    if checkouts
+                    else None
+                ),
+            }
+        return aliases
+
+    def publish(self, force: bool = False):
+        now = time.time()
+        if not force and now - self.published_at < self.publish_interval:
+            return
+        self.published_at = now
+        try:
+            get_redis_connection("default").hset(
+                self.key,
+                f"{socket.gethostname()}:{os.getpid()}",
+                json.dumps({"aliases": self.snapshot(), "updated_at": now}),
+            )
+        except RedisError as e:
+            print(f"Error publishing database connection metrics: {e}")
+
+    def state(self) -> dict:
+        return {
+            process.decode(): json.loads(value)
+            for process, value in get_redis_connection("default")
+            .hgetall(self.key)
+            .items()
+        }
+
+
+def server_connections(connection) -> dict:
+    """
+    Client connections of the database server, the saturation being the
+    share of `max_connections` they use.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT
+                count(*),
+                count(*) FILTER (WHERE state = 'active'),
+                current_setting('max_connections')::integer
+            FROM pg_stat_activity
+            WHERE backend_type = 'client backend'
+            """
+        )
+        total, active, max_connections = cursor.fetchone()
+    return {
+        "connections": total,
+        "active": active,
+        "max_connections": max_connections,
+        "saturation": total / max_connections,
+    }
+
+
+connection_metrics = ConnectionMetrics(
+    settings.DATABASE_METRICS_KEY,
+    settings.DATABASE_METRICS_PUBLISH_INTERVAL,
+    connection_pools,
+)
+# Forked web and Celery worker processes report their own metrics.
+os.register_at_fork(after_in_child=connection_metrics.reset)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self):
+        options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or not options:
+            return None
+        with connection_pools_lock:
+            if self.alias not in connection_pools:
+                if self.settings_dict["CONN_MAX_AGE"] != 0:
+                    raise ImproperlyConfigured(
+                        "Pooled connections are returned to the pool after "
+                        "every request, set CONN_MAX_AGE to 0."
+                    )
+                if "isolation_level" in self.settings_dict["OPTIONS"]:
+                    raise ImproperlyConfigured(
+                        "Pooled connections use the default isolation level."
+                    )
+                connect_kwargs = self.get_connection_params()
+                # Django sets the autocommit mode of every checkout.
+                connect_kwargs["autocommit"] = True
+                connection_pools[self.alias] = ConnectionPool(
+                    kwargs=connect_kwargs,
+                    # Opened on the first connection of the process.
+                    open=False,
+                    check=(
+                        ConnectionPool.check_connection
+                        if self.settings_dict["CONN_HEALTH_CHECKS"]
+                        else None
+                    ),
+                    name=self.alias,
+                    **options,
+                )
+            return connection_pools[self.alias]
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        self.isolation_level = IsolationLevel.READ_COMMITTED
+        pool.open()
+        return pool.getconn()
+
+    def close_if_unusable_or_obsolete(self):
+        # Called when requests and Celery tasks start and finish.
+        super().close_if_unusable_or_obsolete()
+        connection_metrics.publish()
+
+    def _close(self):
+        # Pooled connections know their pool. Connections of a closed pool
+        # or of the pool of the parent process are closed instead.
+        pool = getattr(self.connection, "_pool", None)
+        if pool is None or pool is not connection_pools.get(self.alias):
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
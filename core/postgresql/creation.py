@@ -0,0 +1,17 @@
+from django.db.backends.postgresql import creation
+
+from core.postgresql.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    # Pools opened before the test database is created connect to the
+    # database it replaces, and the connections they keep open would
+    # prevent dropping it.
+
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        close_pools()
+        return super()._create_test_db(verbosity, autoclobber, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,34 @@
+import os
+import threading
+
+# Connection pool of each database alias, in the current process.
+connection_pools = {}
+connection_pools_lock = threading.Lock()
+
+
+def close_pools():
+    """
+    Close the pools of the process, they are created again on the next
+    connection.
+    """
+    with connection_pools_lock:
+        pools = list(connection_pools.values())
+        connection_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def forget_pools():
+    # The connections and threads of the pools of the parent process
+    # belong to it, the child process creates its own pools.
+    connection_pools.clear()
+    connection_pools_lock.release()
+
+
+# The lock is held while forking, so it is never copied held by a thread
+# that does not exist in the child process.
+os.register_at_fork(
+    before=connection_pools_lock.acquire,
+    after_in_parent=connection_pools_lock.release,
+    after_in_child=forget_pools,
+)
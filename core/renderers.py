@@ -0,0 +1,30 @@
+"""
+JSON rendering of large responses.
+
+orjson encodes dicts of UUIDs, datetimes and floats, like the `.values()`
+rows of a queryset, in C, the output being the same as the one of the DRF
+renderer.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer encoding with orjson, falling back to the DRF renderer
+    when an indented output is requested (browsable API).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Datetimes are rendered like DRF does, with a `Z` for UTC, and
+        # non-str keys (errors of list items) like the json module does.
+        return orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
@@ -0,0 +1,152 @@
+"""
+Routing of the reads of read-only endpoints to a replica database.
+
+Endpoints opt in with `read_from(replica_for(request))`, every other read
+and all the writes (ingestion, admin, Celery tasks) use the default
+database.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http import HTTPStatus
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Clients can read their own writes by sending `X-Read-Primary: true`.
+PRIMARY_HEADER = "X-Read-Primary"
+# Set after a write, so the following reads of the client are not served
+# by a replica that did not replay the write yet.
+PIN_COOKIE = "read_primary"
+
+# Database read by the current request, the default one when unset.
+read_database: ContextVar[Optional[str]] = ContextVar(
+    "read_database", default=None
+)
+
+# Last lag of each replica, as (checked at, lag in seconds).
+replica_lags = {}
+
+
+def replica_lag(alias: str) -> Optional[float]:
+    """
+    Seconds the replica is behind the default database, or None when it
+    cannot be reached. Checked at most every REPLICA_LAG_CHECK_INTERVAL
+    seconds per process.
+    """
+    now = time.monotonic()
+    checked_at, lag = replica_lags.get(alias, (None, None))
+    if checked_at is not None and (
+        now - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL
+    ):
+        return lag
+
+    try:
+        with connections[alias].cursor() as cursor:
+            # A replica that replayed everything it received is not
+            # lagging, however old its last replayed transaction is.
+            cursor.execute(
+                """
+                SELECT CASE
+                    WHEN NOT pg_is_in_recovery()
+                        OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+                    THEN 0
+                    ELSE extract(
+                        epoch FROM now() - pg_last_xact_replay_timestamp()
+                    )
+                END
+                """
+            )
+            (lag,) = cursor.fetchone()
+            lag = float(lag)
+    except DatabaseError as e:
+        print(f"Replica {alias} is unavailable: {e}")
+        lag = None
+    replica_lags[alias] = (now, lag)
+    return lag
+
+
+def is_read_only(request) -> bool:
+    """
+    Whether the request only reads: a safe method, or a query sent with
+    POST to a view flagging the request as `read_only`.
+    """
+    return request.method in SAFE_METHODS or getattr(
+        request, "read_only", False
+    )
+
+
+def replica_for(request) -> Optional[str]:
+    """
+    Database alias of the replica the reads of `request` can be served
+    by, None when they have to read the default database.
+    """
+    alias = settings.REPLICA_DATABASE
+    if not alias or not is_read_only(request):
+        return None
+    if request.headers.get(PRIMARY_HEADER, "").lower() == "true":
+        return None
+    if PIN_COOKIE in request.COOKIES:
+        return None
+    lag = replica_lag(alias)
+    if lag is None or lag > settings.REPLICA_MAX_LAG:
+        return None
+    return alias
+
+
+@contextmanager
+def read_from(alias: Optional[str]):
+    """
+    Route the reads within the block to `alias`, or to the default
+    database when it is None.
+    """
+    token = read_database.set(alias)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Reads following a write in the same request have to see it.
+        read_database.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class PinPrimaryMiddleware:
+    """
+    Pin the reads of a client to the default database for
+    REPLICA_PIN_SECONDS after each of its successful writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.REPLICA_DATABASE
+            and not is_read_only(request)
+            and response.status_code < HTTPStatus.BAD_REQUEST
+        ):
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
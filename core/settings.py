@@ -70,6 +70,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.replica.PinPrimaryMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -98,14 +99,51 @@ WSGI_APPLICATION = "core.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        # PostgreSQL backend recording connection metrics.
+        "ENGINE": "core.postgresql",
         "NAME": env.get("POSTGRES_NAME", "laughing_octo_pancake"),
         "USER": env.get("POSTGRES_USER", "postgres"),
         "HOST": env.get("POSTGRES_HOST", "postgres"),
         "PORT": env.get("POSTGRES_PORT", 5432),
         "PASSWORD": env.get("POSTGRES_PASSWORD", "laughing_octo_pancake"),
+        # Every web and Celery worker process has a pool of
+        # POSTGRES_POOL_MIN_SIZE to POSTGRES_POOL_MAX_SIZE connections per
+        # database. Requests and tasks take a connection from the pool,
+        # waiting at most POSTGRES_POOL_TIMEOUT seconds for one, and return
+        # it when they finish. Connections are checked before reuse.
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(env.get("POSTGRES_POOL_MIN_SIZE", 1)),
+                "max_size": int(env.get("POSTGRES_POOL_MAX_SIZE", 4)),
+                "timeout": float(env.get("POSTGRES_POOL_TIMEOUT", 10)),
+            },
+        },
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
     }
 }
+# Replica of the default database, the default database itself unless
+# POSTGRES_REPLICA_HOST is set. Tests read it through the default one.
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "HOST": env.get("POSTGRES_REPLICA_HOST", DATABASES["default"]["HOST"]),
+    "PORT": env.get("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+    "TEST": {"MIRROR": "default"},
+}
+DATABASE_ROUTERS = ["core.replica.ReplicaRouter"]
+# Read-only endpoints read from REPLICA_DATABASE, only when a replica is
+# configured. Reads go to the default database while the replica lags more
+# than REPLICA_MAX_LAG seconds (checked every REPLICA_LAG_CHECK_INTERVAL
+# seconds), and for REPLICA_PIN_SECONDS after a write of the same client.
+REPLICA_DATABASE = "replica" if env.get("POSTGRES_REPLICA_HOST") else None
+REPLICA_MAX_LAG = float(env.get("REPLICA_MAX_LAG", 30))
+REPLICA_LAG_CHECK_INTERVAL = float(env.get("REPLICA_LAG_CHECK_INTERVAL", 5))
+REPLICA_PIN_SECONDS = int(env.get("REPLICA_PIN_SECONDS", 10))
+# Connection pool statistics of every process are published in a Redis hash.
+DATABASE_METRICS_KEY = "database:connections"
+DATABASE_METRICS_PUBLISH_INTERVAL = float(
+    env.get("DATABASE_METRICS_PUBLISH_INTERVAL", 10)
+)
 
 # Redis
 REDIS_HOST = env.get("REDIS_HOST", "redis")
@@ -191,7 +229,94 @@ CELERY_BROKER_URL = CACHES["celery"]["LOCATION"]
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_VISIBILITY_TIMEOUT = 3600  # Default value: 1 hour
+# Prefork processes of each worker, each with its own database connection
+# pools. Defaults to the number of CPUs.
+CELERY_WORKER_CONCURRENCY = (
+    int(env["CELERY_WORKER_CONCURRENCY"])
+    if env.get("CELERY_WORKER_CONCURRENCY")
+    else None
+)
 
 
 EXTERNAL_MONITORING_API_URL = "http://localhost:5000/"
 INTERNAL_MONITORING_API_URL = "http://monitoring-service:5000/"
+
+# Max number of concurrent requests (and pooled keep-alive connections)
+# against the monitoring service per ingestion task.
+MONITORING_FETCH_CONCURRENCY = int(env.get("MONITORING_FETCH_CONCURRENCY", 16))
+# Number of plants fetched by each subtask of the periodic ingestion.
+MONITORING_INGESTION_BATCH_SIZE = int(
+    env.get("MONITORING_INGESTION_BATCH_SIZE", 100)
+)
+# Max number of data points written by a single upsert statement.
+MONITORING_UPSERT_BATCH_SIZE = int(
+    env.get("MONITORING_UPSERT_BATCH_SIZE", 5000)
+)
+# Days of data fetched for plants that have never been ingested.
+MONITORING_INITIAL_LOOKBACK_DAYS = int(
+    env.get("MONITORING_INITIAL_LOOKBACK_DAYS", 1)
+)
+# Days of data requested by each chunk of a historical backfill.
+MONITORING_BACKFILL_CHUNK_DAYS = int(
+    env.get("MONITORING_BACKFILL_CHUNK_DAYS", 30)
+)
+# Size (in bytes) of the chunks read from streamed responses.
+MONITORING_STREAM_CHUNK_SIZE = int(
+    env.get("MONITORING_STREAM_CHUNK_SIZE", 64 * 1024)
+)
+# Failure ledger of plants whose data could not be fetched.
+# Failed plants are retried after INGESTION_RETRY_BASE_DELAY seconds,
+# doubled after each failed attempt up to INGESTION_RETRY_MAX_DELAY,
+# and dead-lettered after INGESTION_RETRY_MAX_ATTEMPTS failed attempts.
+INGESTION_LEDGER_KEY_PREFIX = "ingestion"
+INGESTION_RETRY_BASE_DELAY = int(env.get("INGESTION_RETRY_BASE_DELAY", 60))
+INGESTION_RETRY_MAX_DELAY = int(env.get("INGESTION_RETRY_MAX_DELAY", 3600))
+INGESTION_RETRY_MAX_ATTEMPTS = int(env.get("INGESTION_RETRY_MAX_ATTEMPTS", 8))
+# Per plant request timeouts (in seconds).
+MONITORING_CONNECT_TIMEOUT = float(env.get("MONITORING_CONNECT_TIMEOUT", 3))
+MONITORING_READ_TIMEOUT = float(env.get("MONITORING_READ_TIMEOUT", 10))
+# Data points are partitioned by month. Partitions are created
+# DATAPOINT_PARTITIONS_AHEAD months in advance. Partitions older than
+# DATAPOINT_RETENTION_MONTHS (kept forever when unset) are detached,
+# and dropped as well when DATAPOINT_DROP_EXPIRED_PARTITIONS is set.
+DATAPOINT_PARTITIONS_AHEAD = int(env.get("DATAPOINT_PARTITIONS_AHEAD", 3))
+DATAPOINT_RETENTION_MONTHS = int(env.get("DATAPOINT_RETENTION_MONTHS", 0))
+DATAPOINT_DROP_EXPIRED_PARTITIONS = (
+    env.get("DATAPOINT_DROP_EXPIRED_PARTITIONS", "false").lower() == "true"
+)
+# Data points older than DATAPOINT_RAW_RETENTION_DAYS (kept forever when
+# unset) are compacted into their daily rollups, then deleted in batches
+# of DATAPOINT_COMPACTION_BATCH_SIZE rows.
+DATAPOINT_RAW_RETENTION_DAYS = int(env.get("DATAPOINT_RAW_RETENTION_DAYS", 0))
+DATAPOINT_COMPACTION_BATCH_SIZE = int(
+    env.get("DATAPOINT_COMPACTION_BATCH_SIZE", 5000)
+)
+# Reports are cached in Redis until data of the days they cover changes, or
+# for REPORT_CACHE_TIMEOUT seconds (not cached when 0). Concurrent requests
+# missing the same report wait up to REPORT_CACHE_LOCK_TIMEOUT seconds for
+# the first one to compute it.
+REPORT_CACHE_KEY_PREFIX = "reports"
+REPORT_CACHE_TIMEOUT = int(env.get("REPORT_CACHE_TIMEOUT", 300))
+REPORT_CACHE_LOCK_TIMEOUT = float(env.get("REPORT_CACHE_LOCK_TIMEOUT", 10))
+# Max number of plants of a batch data point query.
+DATAPOINT_BATCH_MAX_PLANTS = int(env.get("DATAPOINT_BATCH_MAX_PLANTS", 1000))
+# Rows fetched from the database and encoded at once by data point exports.
+DATAPOINT_EXPORT_CHUNK_SIZE = int(env.get("DATAPOINT_EXPORT_CHUNK_SIZE", 2000))
+# Client of the monitoring service, its state is shared through Redis.
+# Requests per second allowed across every worker, and the burst size.
+MONITORING_CLIENT_KEY_PREFIX = "monitoring"
+MONITORING_RATE_LIMIT = float(env.get("MONITORING_RATE_LIMIT", 50))
+MONITORING_RATE_LIMIT_BURST = float(env.get("MONITORING_RATE_LIMIT_BURST", 50))
+# Each worker adapts its concurrency between MONITORING_MIN_CONCURRENCY
+# and MONITORING_FETCH_CONCURRENCY, backing off when responses are slower
+# than MONITORING_LATENCY_TARGET seconds or fail.
+MONITORING_MIN_CONCURRENCY = int(env.get("MONITORING_MIN_CONCURRENCY", 1))
+MONITORING_LATENCY_TARGET = float(env.get("MONITORING_LATENCY_TARGET", 2))
+# Consecutive failures that open the circuit breaker, and seconds before
+# a probe request is let through again.
+MONITORING_BREAKER_FAILURE_THRESHOLD = int(
+    env.get("MONITORING_BREAKER_FAILURE_THRESHOLD", 5)
+)
+MONITORING_BREAKER_RESET_TIMEOUT = float(
+    env.get("MONITORING_BREAKER_RESET_TIMEOUT", 30)
+)
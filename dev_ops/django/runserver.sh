@@ -3,8 +3,8 @@
 set -o errexit
 set -o pipefail
 
-# the number of CPUs + 1
-WORKERS=$(( $(cat /proc/cpuinfo | grep -c processor) + 1 ))
+# the number of CPUs + 1, unless sized with GUNICORN_WORKERS
+WORKERS=${GUNICORN_WORKERS:-$(( $(cat /proc/cpuinfo | grep -c processor) + 1 ))}
 
 echo "${WORKERS} workers will be used."
 